@@ -0,0 +1,90 @@
+"""Compare memory use and traversal speed of the KGExecutor backends.
+
+Builds a synthetic graph with a skewed (hub-heavy) degree distribution, loads
+it into each backend and reports:
+- memory allocated while loading (tracemalloc)
+- load time
+- mean query_neighbors latency at several depths
+- query_neighbors_batch latency for all start nodes in one pass
+
+Usage:
+    python benchmarks/bench_backends.py --triples 200000 --entities 50000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+import networkx as nx
+
+from kg_agent.core import KGExecutor
+
+
+def synthetic_triples(num_triples: int, num_entities: int, num_predicates: int = 50, seed: int = 0):
+    """Generate (s, p, o) triples with a power-law-like degree distribution.
+
+    Objects, and half of the subjects, are skewed towards low IDs, producing
+    hub nodes with both large in- and out-degree.
+    """
+    rng = random.Random(seed)
+
+    def skewed():
+        # paretovariate skews towards low IDs
+        return min(int(rng.paretovariate(0.6)) - 1, num_entities - 1)
+
+    for _ in range(num_triples):
+        s = skewed() if rng.random() < 0.5 else rng.randrange(num_entities)
+        o = skewed()
+        p = rng.randrange(num_predicates)
+        yield (f"e{s}", f"p{p}", f"e{o}")
+
+
+def bench_backend(backend: str, args):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    executor = KGExecutor(backend=backend)
+    executor.load_triples(synthetic_triples(args.triples, args.entities, seed=args.seed))
+    # First query forces lazy index construction on the compact backend
+    executor.query_neighbors("e0", 1)
+    load_s = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    rng = random.Random(args.seed + 1)
+    starts = [f"e{rng.randrange(args.entities)}" for _ in range(args.queries)]
+    print(f"[{backend}] load {load_s:.2f}s, memory {current / 2**20:.1f} MiB (peak {peak / 2**20:.1f} MiB)")
+    for depth in args.depths:
+        t0 = time.perf_counter()
+        total = 0
+        for node in starts:
+            try:
+                total += len(executor.query_neighbors(node, depth))
+            except (KeyError, nx.NetworkXError):
+                continue
+        elapsed = time.perf_counter() - t0
+        print(f"[{backend}] depth={depth}: {elapsed / len(starts) * 1e3:.3f} ms/query, avg {total / len(starts):.0f} results")
+
+    known = executor.entity_names(executor.entity_set(starts))
+    for depth in args.depths:
+        t0 = time.perf_counter()
+        executor.query_neighbors_batch(known, depth)
+        elapsed = time.perf_counter() - t0
+        print(f"[{backend}] batch depth={depth}: {len(known)} sources in {elapsed * 1e3:.1f} ms ({elapsed / len(known) * 1e3:.3f} ms/source)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--triples", type=int, default=200_000)
+    parser.add_argument("--entities", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--depths", type=int, nargs="+", default=[2, 3, 4])
+    parser.add_argument("--backends", nargs="+", default=["networkx", "compact"])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for backend in args.backends:
+        bench_backend(backend, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Measure KGExecutor.load_file throughput for different worker counts.
+
+Writes a synthetic N-Triples dump (unless --path is given) and loads it with
+each requested number of parser processes.
+
+Usage:
+    python benchmarks/bench_loading.py --triples 2000000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import random
+import tempfile
+
+from kg_agent.core import KGExecutor
+
+
+def write_dump(path: str, num_triples: int, num_entities: int, seed: int = 0):
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(num_triples):
+            s = rng.randrange(num_entities)
+            o = rng.randrange(num_entities)
+            p = rng.randrange(50)
+            f.write(f"<http://kg/e{s}> <http://kg/p{p}> <http://kg/e{o}> .\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", help="existing dump to load instead of a synthetic one")
+    parser.add_argument("--triples", type=int, default=1_000_000)
+    parser.add_argument("--entities", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--backend", default="compact")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.path
+        if path is None:
+            path = os.path.join(tmp, "synthetic.nt")
+            write_dump(path, args.triples, args.entities)
+        for workers in args.workers:
+            executor = KGExecutor(backend=args.backend)
+            stats = executor.load_file(path, workers=workers)
+            print(f"workers={workers}: {stats.triples} triples in {stats.seconds:.2f}s ({stats.triples_per_second:,.0f} triples/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""LRU cache for executor query results.
+
+Entries are tagged with the graph version they were computed against. The
+first lookup or insertion under a newer version drops every older entry, and
+results computed against an older version (a reader still pinned to it) are
+neither served nor stored, so ``load_triples`` only has to bump the
+executor's version counter. Lookups
+and insertions hold a short lock, so readers on several threads can share
+one cache.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, Optional, Tuple
+
+
+@dataclass
+class CacheStats:
+    """Counters reported by :class:`QueryCache`.
+
+    Attributes:
+        hits: lookups answered from the cache
+        misses: lookups that had to be computed (including stale entries)
+        evictions: entries dropped to stay within the budget
+        entries: entries currently cached
+        nbytes: estimated size of the cached results
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    nbytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def estimate_nbytes(value: Any) -> int:
+    """Rough size of a cached result: the container plus its items, nested containers included."""
+    if hasattr(value, "nbytes"):
+        return sys.getsizeof(value) + value.nbytes
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list, frozenset, set)):
+        size += sum(estimate_nbytes(item) for item in value)
+    return size
+
+
+class QueryCache:
+    """Size- and byte-bounded LRU cache keyed by query parameters.
+
+    Args:
+        max_entries: maximum number of cached results
+        max_bytes: optional budget for the estimated size of cached results
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[int, Any, int]]" = OrderedDict()
+        # newest graph version seen; every entry was computed against it
+        self._version: Optional[int] = None
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, version: int) -> Tuple[bool, Any]:
+        """Look up ``key`` for graph ``version``.
+
+        Returns:
+            (found, value); value is None on a miss
+        """
+        with self._lock:
+            self._advance(version)
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.stats.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return True, entry[1]
+
+    def put(self, key: Hashable, version: int, value: Any):
+        """Cache ``value`` for ``key`` at graph ``version``, evicting LRU entries as needed."""
+        nbytes = estimate_nbytes(value)
+        if self.max_entries <= 0 or (self.max_bytes is not None and nbytes > self.max_bytes):
+            return
+        with self._lock:
+            self._advance(version)
+            if version != self._version:
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (version, value, nbytes)
+            self.stats.nbytes += nbytes
+            self.stats.entries = len(self._entries)
+            while len(self._entries) > self.max_entries or (self.max_bytes is not None and self.stats.nbytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.stats.evictions += 1
+
+    def advance(self, version: int):
+        """Drop all entries if ``version`` is newer than the one they were computed against."""
+        with self._lock:
+            self._advance(version)
+
+    def _advance(self, version: int):
+        if self._version is None or version > self._version:
+            self._version = version
+            self._entries.clear()
+            self.stats.nbytes = 0
+            self.stats.entries = 0
+
+    def _drop(self, key: Hashable):
+        _, _, nbytes = self._entries.pop(key)
+        self.stats.nbytes -= nbytes
+        self.stats.entries = len(self._entries)
+
+    def clear(self):
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.stats.nbytes = 0
+            self.stats.entries = 0
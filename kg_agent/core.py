@@ -9,9 +9,34 @@ This module provides lightweight skeleton classes for:
 TODO: Fill in real implementations for each component and integrate with your LLM.
 """
 
+import base64
+import contextlib
+import functools
+import hashlib
+import itertools
+import json
+import secrets
+import threading
+import weakref
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Union
 import networkx as nx
+import numpy as np
+
+from .cache import CacheStats, QueryCache
+from .paths import RelationPaths, find_relation_paths, simple_relation_paths
+from .literals import NumericColumn
+from .protocol import (
+    BATCH_NEIGHBORS, CONCURRENT_READS, FANOUT_CAPS, RELATION_PATHS, SPARQL, Executor, FanoutCap, GraphStore, HopFilters,
+    NeighborList,
+)
+from .sets import EntitySet
+from .linking import DEFAULT_LABEL_PREDICATES, LabelIndex, local_name
+from .loaders import EncodedChunk, LoadStats, parallel_stream_file, stream_file
+from .shared import SharedGraph, SharedGraphSpec, attach_store, share_store
+from .snapshot import open_snapshot, save_snapshot
+from .store import DEFAULT_TYPE_PREDICATES, CompactGraphStore, NetworkXStore, _StepTraversal, check_direction
 
 
 @dataclass
@@ -45,15 +70,602 @@ class KnowledgeMemory:
         self.store[key] = value
 
 
+@dataclass(frozen=True)
+class ReadView:
+    """Immutable published state of an executor's graph.
+
+    Attributes:
+        version: executor version the view was published at
+        store: store to read from; never written after publishing
+    """
+
+    version: int
+    store: Any
+
+
+class _ReadWriteLock:
+    """Many readers or one writer; waiting writers keep new readers out.
+
+    Reads nest on the same thread. A thread holding a read must not write,
+    since it would wait for itself.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writing = False
+        self._waiting_writers = 0
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def read(self):
+        local = self._local
+        depth = getattr(local, "depth", 0)
+        if not depth:
+            with self._cond:
+                while self._writing or self._waiting_writers:
+                    self._cond.wait()
+                self._readers += 1
+        local.depth = depth + 1
+        try:
+            yield
+        finally:
+            local.depth = depth
+            if not depth:
+                with self._cond:
+                    self._readers -= 1
+                    if not self._readers:
+                        self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def write(self):
+        if getattr(self._local, "depth", 0):
+            raise RuntimeError("Cannot write while this thread holds a read view of a live store")
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writing or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+
+class _LockedStore:
+    """Live store whose calls hold the executor's read lock.
+
+    Published for stores that can neither ``freeze`` nor be read during a
+    write; lazy results (iterators) take the lock again for every item.
+    """
+
+    def __init__(self, store: Any, lock: _ReadWriteLock):
+        self._store = store
+        self._lock = lock
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._store, name)
+        if not callable(attr):
+            return attr
+        lock = self._lock
+
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            with lock.read():
+                result = attr(*args, **kwargs)
+            return _locked_iter(result, lock) if isinstance(result, Iterator) else result
+
+        return call
+
+
+def _locked_iter(items: Iterator, lock: _ReadWriteLock) -> Iterator:
+    while True:
+        with lock.read():
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+        yield item
+
+
+class _UndoView(_StepTraversal):
+    """Read view of a live store as it was when the view was pinned.
+
+    Before a write touches the live store, the executor hands every pinned
+    view the state it is about to change (see :meth:`remember`): each triple
+    the write names plus every triple between the same two nodes, which
+    covers stores that replace an edge on insert. A view keeps the first
+    state it is given per triple. Reads answer from the live store and put
+    those triples back as they were; nodes and predicates no write touched
+    since the pin go straight to the live store. Calls must hold the
+    executor's read lock, so the view is published inside a :class:`_LockedStore`.
+    """
+
+    def __init__(self, store: Any):
+        self.store = store
+        self.type_predicates = store.type_predicates
+        self.capabilities = getattr(store, "capabilities", frozenset())
+        # triple -> whether it was in the graph at the pin
+        self._before: Dict[tuple, bool] = {}
+        self._out: Dict[Any, Dict[tuple, bool]] = {}
+        self._in: Dict[Any, Dict[tuple, bool]] = {}
+        self._predicates: set = set()
+        self._numeric_columns: Dict[Any, NumericColumn] = {}
+
+    def __getattr__(self, name: str):
+        # anything without an undo (e.g. SPARQL) reads the live store
+        return getattr(self.__dict__["store"], name)
+
+    def remember(self, triples: List[tuple], prior: Dict[tuple, List[tuple]]):
+        """Record the state ``triples`` are in before a write (``prior``: (s, o) -> triples between them)."""
+        present = [(t, True) for rows in prior.values() for t in rows]
+        for t, state in itertools.chain(present, ((tuple(t), False) for t in triples)):
+            if t not in self._before:
+                s, p, o = t
+                self._before[t] = state
+                self._out.setdefault(s, {})[(p, o)] = state
+                self._in.setdefault(o, {})[(s, p)] = state
+                self._predicates.add(p)
+        self._numeric_columns.clear()
+
+    def _touched(self, n: Hashable) -> bool:
+        return n in self._out or n in self._in
+
+    def _edges(self, n: Hashable, direction: str) -> List[tuple]:
+        """Return the triples around ``n`` in this view."""
+        rows = []
+        if direction != "in":
+            rows += self.store.match(subject=n)
+        if direction != "out":
+            rows += self.store.match(obj=n)
+        rows = [t for t in rows if t not in self._before]
+        if direction != "in":
+            rows += [(n, p, o) for (p, o), state in self._out.get(n, {}).items() if state]
+        if direction != "out":
+            rows += [(s, p, n) for (s, p), state in self._in.get(n, {}).items() if state]
+        return rows
+
+    def _has_node(self, n: Hashable) -> bool:
+        if not self._touched(n):
+            return self.store._has_node(n)
+        return bool(self._edges(n, "both"))
+
+    def _degree(self, n: Hashable, direction: str) -> Optional[int]:
+        if not self._touched(n):
+            return self.store._degree(n, direction)
+        return len(self._edges(n, direction))
+
+    def _step(self, n: Hashable, allowed: Optional[frozenset], direction: str) -> Iterator[Any]:
+        if not self._touched(n):
+            yield from self.store._step(n, allowed, direction)
+            return
+        for s, p, o in self._edges(n, direction):
+            if allowed is None or p in allowed:
+                yield o if s == n else s
+
+    def neighbors(self, node: Hashable, depth: int = 1, hop_filters: HopFilters = None, direction: str = "out",
+                  fanout: Optional[FanoutCap] = None) -> List[Any]:
+        if not self._before:
+            if fanout is None:
+                return self.store.neighbors(node, depth, hop_filters, direction)
+            return self.store.neighbors(node, depth, hop_filters, direction, fanout)
+        return super().neighbors(node, depth, hop_filters, direction, fanout)
+
+    def iter_neighbors(self, node: Hashable, depth: int = 1, hop_filters: HopFilters = None,
+                       direction: str = "out") -> Iterator[Any]:
+        if not self._before:
+            return self.store.iter_neighbors(node, depth, hop_filters, direction)
+        return super().iter_neighbors(node, depth, hop_filters, direction)
+
+    def neighbors_batch(
+        self, nodes: Iterable[Hashable], depth: int = 1, hop_filters: HopFilters = None, direction: str = "out"
+    ) -> Dict[Any, Dict[Any, int]]:
+        if not self._before:
+            return self.store.neighbors_batch(nodes, depth, hop_filters, direction)
+        return super().neighbors_batch(nodes, depth, hop_filters, direction)
+
+    def entity_set(self, nodes: Iterable[Hashable]) -> frozenset:
+        if not self._before:
+            return self.store.entity_set(nodes)
+        return frozenset(n for n in nodes if self._has_node(n))
+
+    def subjects(self) -> List[Any]:
+        subjects = dict.fromkeys(self.store.subjects())
+        for s in self._out:
+            if self._edges(s, "out"):
+                subjects[s] = None
+            else:
+                subjects.pop(s, None)
+        return list(subjects)
+
+    def entities_of_type(self, type_: Hashable, candidates: Optional[frozenset] = None) -> frozenset:
+        members = self.store.entities_of_type(type_, candidates)
+        changed = {s for s, p in self._in.get(type_, {}) if p in self.type_predicates}
+        if not changed:
+            return members
+        typed = {s for s in changed if type_ in self.types_of(s)}
+        members = (members - changed) | typed
+        return members if candidates is None else members & candidates
+
+    def types_of(self, entity: Hashable) -> List[Any]:
+        if not self._touched(entity):
+            return self.store.types_of(entity)
+        return list(dict.fromkeys(o for _, p, o in self._edges(entity, "out") if p in self.type_predicates))
+
+    def relations_of(self, entity: Hashable, direction: str = "out") -> Dict[Any, int]:
+        check_direction(direction)
+        if not self._touched(entity):
+            return self.store.relations_of(entity, direction)
+        counts: Dict[Any, int] = {}
+        for _, p, _ in self._edges(entity, direction):
+            counts[p] = counts.get(p, 0) + 1
+        return dict(sorted(counts.items(), key=lambda kv: str(kv[0])))
+
+    def numeric_column(self, predicate: Hashable) -> NumericColumn:
+        if predicate not in self._predicates:
+            return self.store.numeric_column(predicate)
+        column = self._numeric_columns.get(predicate)
+        if column is None:
+            pairs = self.match(predicate=predicate)
+            entities = np.empty(len(pairs), dtype=object)
+            entities[:] = [s for s, _, _ in pairs]
+            column = self._numeric_columns[predicate] = NumericColumn(entities, [o for _, _, o in pairs])
+        return column
+
+    def match(self, subject=None, predicate=None, obj=None) -> List[tuple]:
+        rows = self.store.match(subject, predicate, obj)
+        if not self._before:
+            return rows
+        rows = [t for t in rows if t not in self._before]
+        if subject is not None:
+            candidates = ((subject, p, o) for (p, o), state in self._out.get(subject, {}).items() if state)
+        elif obj is not None:
+            candidates = ((s, p, obj) for (s, p), state in self._in.get(obj, {}).items() if state)
+        else:
+            candidates = (t for t, state in self._before.items() if state)
+        rows.extend(
+            t for t in candidates
+            if (predicate is None or t[1] == predicate) and (obj is None or t[2] == obj)
+        )
+        return rows
+
+
+@dataclass(frozen=True)
+class NeighborPage:
+    """One page of :meth:`KGExecutor.neighbor_page` results.
+
+    Attributes:
+        items: neighbors on this page, in hop order
+        cursor: opaque token for the next page; None once the traversal is exhausted
+    """
+
+    items: List[str]
+    cursor: Optional[str] = None
+
+
+def _hop_filters(depth: int, predicates=None, hop_predicates=None):
+    """Normalize predicate filter arguments into one frozenset (or None) per hop."""
+    if hop_predicates is not None:
+        if len(hop_predicates) != depth:
+            raise ValueError(f"hop_predicates has {len(hop_predicates)} entries for depth {depth}")
+        return [None if allowed is None else _as_predicate_set(allowed) for allowed in hop_predicates]
+    if predicates is not None:
+        return [_as_predicate_set(predicates)] * depth
+    return None
+
+
+# Suspended neighbor-page traversals kept for resuming; older cursors are replayed
+_MAX_CURSORS = 64
+
+
+def _query_digest(node, depth: int, hop_filters, direction: str) -> str:
+    """Fingerprint a traversal so a cursor cannot be replayed against another one."""
+    filters = [None if f is None else sorted(map(str, f)) for f in hop_filters] if hop_filters else None
+    text = json.dumps([str(node), depth, filters, direction])
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+_CURSOR_FIELDS = {"q": str, "v": int, "at": int, "id": str}
+
+
+def _encode_cursor(state: Dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(state, dict) or not all(
+            isinstance(state.get(key), types) and not isinstance(state.get(key), bool)
+            for key, types in _CURSOR_FIELDS.items()
+        ) or state["at"] < 0:
+            raise ValueError
+        return state
+    except ValueError:
+        raise ValueError("Invalid cursor") from None
+
+
+def _as_predicate_set(predicates) -> frozenset:
+    if isinstance(predicates, str):
+        return frozenset([predicates])
+    return frozenset(predicates)
+
+
+def _networkx_store(graph, type_predicates, path) -> GraphStore:
+    return NetworkXStore(graph, type_predicates)
+
+
+def _compact_store(graph, type_predicates, path) -> GraphStore:
+    if graph is not None:
+        raise ValueError("A networkx graph cannot be used with the compact backend")
+    return CompactGraphStore(type_predicates)
+
+
+def _partitioned_store(graph, type_predicates, path) -> GraphStore:
+    from .partition import PartitionedStore
+
+    if graph is not None:
+        raise ValueError("A networkx graph cannot be used with the partitioned backend")
+    return PartitionedStore(type_predicates)
+
+
+def _durable_store(graph, type_predicates, path) -> GraphStore:
+    from .durable import DurableStore
+
+    if path is None:
+        raise ValueError("The durable backend needs a directory (path=...)")
+    return DurableStore(path, type_predicates)
+
+
+def _rdflib_store(graph, type_predicates, path) -> GraphStore:
+    from .rdf_store import RDFLibStore
+
+    return RDFLibStore(graph, type_predicates)
+
+
+def _sqlite_store(graph, type_predicates, path) -> GraphStore:
+    from .sqlite_store import SQLiteStore
+
+    return SQLiteStore(path, type_predicates)
+
+
+# Backend name -> factory(graph, type_predicates, path) returning a GraphStore
+BACKENDS: Dict[str, Callable[..., GraphStore]] = {
+    "networkx": _networkx_store,
+    "compact": _compact_store,
+    "partitioned": _partitioned_store,
+    "rdflib": _rdflib_store,
+    "sqlite": _sqlite_store,
+    "durable": _durable_store,
+}
+
+
+def register_backend(name: str, factory: Callable[..., GraphStore]):
+    """Make a store factory available as ``KGExecutor(backend=name)``.
+
+    Args:
+        name: backend name
+        factory: callable ``factory(graph, type_predicates, path)`` returning
+            an object implementing :class:`kg_agent.protocol.GraphStore`
+    """
+    BACKENDS[name] = factory
+
+
 class KGExecutor:
     """Executor to run KG operations against an in-memory graph.
 
-    This is a minimal example using networkx directed graphs. Replace
-    with your executor (RDF/SPARQL, graph database, or custom KG engine).
+    Storage backends (``BACKENDS``, extensible with :func:`register_backend`):
+    - "networkx" (default): a networkx multi-digraph, exposed as ``graph``
+    - "compact": interned integer IDs with CSR adjacency arrays
+      (see :class:`kg_agent.store.CompactGraphStore`)
+    - "partitioned": the compact layout with traversals distributed over
+      hash-partitioned shard processes (one per CPU)
+    - "rdflib": an rdflib graph queried with prepared SPARQL
+    - "sqlite": a disk-resident SQLite database
+    - "durable": a base snapshot plus a write-ahead log of inserts and deletes
+      (see :class:`kg_agent.durable.DurableStore`)
+
+    The active store is exposed as ``store``; any object implementing
+    :class:`kg_agent.protocol.GraphStore` may also be passed as ``backend``.
+    Optional fast paths are advertised in :attr:`capabilities`; operations a
+    store lacks fall back to generic implementations.
+
+    ``version`` is bumped on every load; with ``cache_size > 0``,
+    ``query_neighbors`` results are cached per version in an LRU cache.
+    Mutating ``graph`` directly bypasses the version counter, so call
+    :meth:`invalidate_cache` afterwards.
+
+    Reads and writes may run on different threads. Writers serialize on a
+    lock and change only the live ``store``; readers go through a
+    :class:`ReadView` published from it (see :meth:`read_view`) and never
+    observe a load half-applied. Stores with ``freeze`` (the compact ones,
+    ``SNAPSHOTS``) publish an immutable view in O(1), so readers never wait
+    for a load. Stores that synchronize themselves (``CONCURRENT_READS``,
+    SQLite) are read live; all others (networkx, rdflib) are read live under
+    a reader/writer lock, so a single read waits for a running write and vice
+    versa. :meth:`pinned` keeps one view for a whole sequence of reads on the
+    current thread without holding that lock in between.
     """
 
-    def __init__(self, graph: Optional[nx.DiGraph] = None):
-        self.graph = graph or nx.DiGraph()
+    def __init__(
+        self,
+        graph: Optional[nx.DiGraph] = None,
+        backend: Union[str, GraphStore] = "networkx",
+        cache_size: int = 0,
+        cache_bytes: Optional[int] = None,
+        type_predicates: Iterable[str] = DEFAULT_TYPE_PREDICATES,
+        path: Optional[str] = None,
+    ):
+        """Initialize the executor.
+
+        Args:
+            graph: optional pre-built graph: a networkx graph for the networkx
+                backend or an ``rdflib.Graph`` for the rdflib backend
+            backend: backend name ("networkx", "compact", "partitioned", "rdflib",
+                "sqlite", "durable" or a registered one) or a store instance
+            cache_size: maximum number of cached query results (0 disables caching)
+            cache_bytes: optional byte budget for cached results
+            type_predicates: predicates indexed as class membership (rdf:type)
+            path: database file of the sqlite backend (temporary when None) or
+                directory of the durable backend
+
+        Raises:
+            ValueError: on an unknown backend or a networkx graph passed to
+                "compact" / "partitioned"
+        """
+        if isinstance(backend, str):
+            if backend not in BACKENDS:
+                raise ValueError(f"Unknown backend {backend}")
+            self.store = BACKENDS[backend](graph, type_predicates, path)
+        else:
+            self.store = backend
+            backend = type(backend).__name__
+        self.graph = self.store.graph if isinstance(self.store, NetworkXStore) else None
+        self.backend = backend
+        self.version = 0
+        self.cache = QueryCache(cache_size, cache_bytes) if cache_size > 0 else None
+        self.label_index: Optional[LabelIndex] = None
+        self._label_index_version = -1
+        self._label_index_options: Dict[str, Any] = {}
+        self._label_lock = threading.Lock()
+        # entity -> version of its last write that may change its labels; None until an index is built
+        self._label_changes: Optional[Dict[Hashable, int]] = None
+        # writes up to this version may be missing from _label_changes
+        self._label_forgotten = -1
+        self._write_lock = threading.Lock()
+        self._rw_lock = _ReadWriteLock()
+        self._local = threading.local()
+        # cursor id -> (view, suspended traversal) of neighbor pages in flight
+        self._cursors: "OrderedDict[str, tuple]" = OrderedDict()
+        self._cursor_lock = threading.Lock()
+        # undo views of pinned reads on a live store, dropped with their last reference
+        self._pins: "weakref.WeakSet[_UndoView]" = weakref.WeakSet()
+        # pinned view of the live store shared by readers until the next write
+        self._live_pin: Optional[ReadView] = None
+        self._publish()
+        if hasattr(self.store, "merge_listener"):
+            self.store.merge_listener = self._republish
+
+    def _publish(self) -> ReadView:
+        """Freeze the live store as the view for the current version (write lock held)."""
+        store = self.store
+        if hasattr(store, "freeze"):
+            store = store.freeze()
+        elif CONCURRENT_READS not in getattr(store, "capabilities", ()):
+            store = _LockedStore(store, self._rw_lock)
+        self._published = ReadView(self.version, store)
+        return self._published
+
+    def _republish(self):
+        """Publish the live store again once its background merge is ready (called from the merge thread).
+
+        Skipped while a write holds the lock: that write installs the merge
+        and publishes anyway. The graph is unchanged, so the version is too.
+        """
+        if not self._write_lock.acquire(blocking=False):
+            return
+        try:
+            self._publish()
+        finally:
+            self._write_lock.release()
+
+    @contextlib.contextmanager
+    def _writing(self, publish: bool = True):
+        """Serialize a write against other writers and against readers of a live store.
+
+        With ``publish`` the version is bumped and the new view published
+        before the locks are released, so readers never see a stale version.
+        """
+        with self._write_lock, self._rw_lock.write():
+            try:
+                yield
+            finally:
+                self._live_pin = None
+                if publish:
+                    self.version += 1
+                    self._publish()
+                    if self.cache is not None:
+                        self.cache.advance(self.version)
+
+    def read_view(self) -> ReadView:
+        """Return the view reads on this thread use.
+
+        Inside :meth:`pinned` that is the pinned view. Otherwise it is the
+        view the last write published; readers never block on a load and a
+        reader racing one keeps the previous version.
+        """
+        view = getattr(self._local, "view", None)
+        return view if view is not None else self._published
+
+    @contextlib.contextmanager
+    def pinned(self) -> Iterator[ReadView]:
+        """Pin one read view for every read on this thread within the block.
+
+        Loads on other threads proceed meanwhile but stay invisible until the
+        block exits; nested pins reuse the outer view. Stores read under the
+        reader/writer lock are pinned as an undo view (see :class:`_UndoView`),
+        so the lock is only held for each call, not for the block. SQLite is
+        pinned as a read transaction started between two writes.
+        """
+        local = self._local
+        if getattr(local, "view", None) is not None:
+            yield local.view
+            return
+        with contextlib.ExitStack() as stack:
+            view = self.read_view()
+            if isinstance(view.store, _LockedStore):
+                with self._rw_lock.read():
+                    view = self._live_pin
+                    if view is None:
+                        pin = _UndoView(self.store)
+                        self._pins.add(pin)
+                        view = self._live_pin = ReadView(self._published.version, _LockedStore(pin, self._rw_lock))
+            elif hasattr(view.store, "snapshot"):
+                # no write is running, so the transaction sees exactly the published version
+                with self._write_lock:
+                    view = ReadView(self._published.version, stack.enter_context(view.store.snapshot()))
+            local.view = view
+            try:
+                yield view
+            finally:
+                local.view = None
+
+    def _remember(self, triples: Iterable[tuple]) -> Iterable[tuple]:
+        """Hand pinned undo views and the label index the state a write is about to change (write lock held).
+
+        Returns ``triples``, as a list if there was anything to update.
+        """
+        if not self._pins and self._label_changes is None:
+            return triples
+        triples = [tuple(t) for t in triples]
+        if self._label_changes is not None:
+            self._label_changed((s, p) for s, p, _ in triples)
+        if not self._pins:
+            return triples
+        pairs = dict.fromkeys((s, o) for s, _, o in triples)
+        prior = {(s, o): self.store.match(subject=s, obj=o) for s, o in pairs}
+        for pin in list(self._pins):
+            pin.remember(triples, prior)
+        return triples
+
+    def _label_changed(self, edges: Iterable[tuple]):
+        """Mark the subjects of written (subject, predicate) edges whose labels may change (write lock held).
+
+        Past the size of the index it is cheaper to rebuild it, so the marks
+        are dropped instead.
+        """
+        options = self._label_index_options
+        names, label_predicates = options["include_names"], options["label_predicates"]
+        changes, version = self._label_changes, self.version + 1
+        for s, p in edges:
+            if names or p in label_predicates:
+                changes[s] = version
+        if len(changes) > max(len(self.label_index or ()), 1024):
+            changes.clear()
+            self._label_forgotten = version
 
     def load_triples(self, triples: List[tuple]):
         """Load triples into the graph.
@@ -61,30 +673,702 @@ class KGExecutor:
         Args:
             triples: list of (subject, predicate, object)
         """
-        for s, p, o in triples:
-            # For simplicity, we add edges with predicate as attribute
-            self.graph.add_edge(s, o, predicate=p)
+        with self._writing():
+            self.store.add_triples(self._remember(triples))
+
+    def _append(self, triples: List[tuple]):
+        """Add one chunk of a file load; the view is published once the file is done."""
+        with self._writing(publish=False):
+            self.store.add_triples(self._remember(triples))
+
+    def remove_triples(self, triples: List[tuple]):
+        """Remove triples from the graph; triples not in the graph are ignored.
+
+        On the compact backends removed edges are tombstoned, so the cost
+        grows with the number of triples removed rather than the graph size;
+        :meth:`compact` reclaims their space.
+
+        Args:
+            triples: list of (subject, predicate, object)
+
+        Raises:
+            NotImplementedError: if the store cannot remove triples
+        """
+        if not hasattr(self.store, "remove_triples"):
+            raise NotImplementedError(f"The {self.backend} backend cannot remove triples")
+        with self._writing():
+            self.store.remove_triples(self._remember(triples))
+
+    def compact(self):
+        """Reclaim the space held by removed triples.
+
+        Compact stores rewrite their index arrays without tombstoned edges,
+        the durable store writes a new base snapshot and SQLite vacuums;
+        other stores need no compaction.
+        """
+        if hasattr(self.store, "compact"):
+            with self._writing():
+                self.store.compact()
+
+    def load_file(
+        self,
+        path: str,
+        format: Optional[str] = None,
+        chunk_size: int = 100_000,
+        progress: Optional[Callable[[LoadStats], None]] = None,
+        strict: bool = False,
+        workers: int = 1,
+    ) -> LoadStats:
+        """Stream triples from a KG dump into the graph.
+
+        The file is parsed lazily and handed to the store in chunks, so peak
+        memory stays close to the size of the loaded graph. With ``workers > 1``
+        the file is split on line boundaries and parsed in a process pool;
+        each worker interns terms locally and the partial dictionaries are
+        merged into the executor's graph. Readers of frozen views see the
+        loaded triples once the whole file is in.
+
+        Args:
+            path: dump file (N-Triples, gzip'd N-Triples or TSV)
+            format: "nt", "nt.gz", "tsv" or "tsv.gz"; inferred from the file name when None
+            chunk_size: number of triples per chunk
+            progress: optional callback receiving LoadStats after each chunk
+            strict: raise on malformed lines instead of skipping them
+            workers: number of parser processes; 1 parses in-process
+
+        Returns:
+            LoadStats with triple count, skipped lines, elapsed time and triples/sec
+        """
+        try:
+            if workers > 1:
+                return parallel_stream_file(path, self._load_encoded, format, workers, chunk_size, progress, strict)
+            return stream_file(path, self._append, format, chunk_size, progress, strict)
+        finally:
+            with self._writing():
+                pass
+
+    def save_snapshot(self, directory: str):
+        """Persist the graph as a memory-mappable snapshot.
+
+        Graphs held by other backends are converted to the compact layout on
+        the way out.
+
+        Args:
+            directory: target directory (see :mod:`kg_agent.snapshot`)
+        """
+        save_snapshot(self._compact_store(), directory)
+
+    @classmethod
+    def open_snapshot(cls, directory: str, **kwargs) -> "KGExecutor":
+        """Open a snapshot written by :meth:`save_snapshot`.
+
+        The returned executor uses the compact backend and reads directly from
+        the memory-mapped files, so startup takes milliseconds regardless of
+        graph size and processes share the pages through the OS page cache.
+
+        Args:
+            directory: snapshot directory
+            kwargs: other KGExecutor options (cache_size, type_predicates, ...)
+
+        Returns:
+            A KGExecutor with backend "compact"
+        """
+        executor = cls(backend="compact", **kwargs)
+        store = open_snapshot(directory)
+        store.type_predicates = executor.store.type_predicates
+        executor.store = store
+        executor._publish()
+        return executor
+
+    def _compact_store(self) -> CompactGraphStore:
+        view = self.read_view().store
+        if isinstance(view, CompactGraphStore):
+            return view
+        store = CompactGraphStore(view.type_predicates)
+        store.add_triples(view.match())
+        return store
+
+    def share(self, name: Optional[str] = None) -> SharedGraph:
+        """Publish the graph in shared memory for worker processes.
+
+        Graphs held by other backends are converted to the compact layout.
+        Hand ``shared.spec`` to the workers (it pickles to a few hundred
+        bytes) and call ``shared.unlink()`` once they are done.
+
+        Args:
+            name: optional shared-memory segment name
+
+        Returns:
+            SharedGraph owning the segment
+        """
+        return share_store(self._compact_store(), name)
+
+    @classmethod
+    def attach_shared(cls, spec: SharedGraphSpec, **kwargs) -> "KGExecutor":
+        """Attach to a graph published with :meth:`share` (zero-copy, read-only).
+
+        Args:
+            spec: ``SharedGraph.spec`` from the publishing process
+            kwargs: other KGExecutor options (cache_size, ...)
+
+        Returns:
+            A KGExecutor with backend "compact"
+        """
+        executor = cls(backend="compact", **kwargs)
+        executor.store = attach_store(spec)
+        executor._publish()
+        return executor
 
-    def query_neighbors(self, node: str, depth: int = 1):
+    def _load_encoded(self, chunk: EncodedChunk):
+        """Merge a worker-encoded chunk, remapping IDs when the store supports it."""
+        if hasattr(self.store, "add_encoded"):
+            with self._writing(publish=False):
+                if self._label_changes is not None:
+                    self._label_changed((chunk.entities[s], chunk.predicates[p]) for s, p in zip(chunk.s, chunk.p))
+                self.store.add_encoded(chunk)
+        else:
+            self._append(chunk.triples())
+
+    def query_neighbors(
+        self,
+        node: str,
+        depth: int = 1,
+        predicates: Optional[Iterable[str]] = None,
+        hop_predicates: Optional[Sequence[Optional[Iterable[str]]]] = None,
+        direction: str = "out",
+        as_set: bool = False,
+        max_fanout: Optional[int] = None,
+        sample: str = "degree",
+        seed: int = 0,
+    ):
         """Return neighbor nodes up to given depth.
 
+        A hub (a country, a common type) can pull a huge part of the graph
+        into the frontier; ``max_fanout`` caps how many edges any one node
+        follows per hop. Nodes over the cap keep the edges to their
+        highest-degree neighbors (``sample="degree"``) or a sample seeded by
+        ``seed`` (``sample="random"``); the check against the cap uses
+        degrees the store already knows, so nodes under it cost nothing extra.
+
+        Args:
+            node: start node
+            depth: maximum hop distance
+            predicates: optional allowed predicates, applied to every hop
+            hop_predicates: optional per-hop allowed predicates (one entry per
+                hop, None allows every predicate); overrides ``predicates``.
+                A node is returned if some walk of at most ``depth`` hops
+                reaches it with hop ``i`` following ``hop_predicates[i]``
+            direction: follow "out"going edges, "in"coming edges or "both"
+            as_set: return an entity set (see :meth:`entity_set`) instead of a list
+            max_fanout: optional per-node, per-hop edge limit
+            sample: "degree" or "random" (see above)
+            seed: seed of the "random" sample
+
+        Returns:
+            :class:`kg_agent.protocol.NeighborList` of neighbor node
+            identifiers, whose ``truncated`` flag tells whether the cap cut
+            anything; or an entity set with ``as_set``
+
+        Raises:
+            ValueError: if ``max_fanout`` is combined with ``as_set`` (sets
+                cannot carry the truncation flag) or is not positive
+            NotImplementedError: if ``max_fanout`` is given and the store has
+                no ``FANOUT_CAPS`` capability
+        """
+        hop_filters = _hop_filters(depth, predicates, hop_predicates)
+        fanout = None
+        if max_fanout is not None:
+            if as_set:
+                raise ValueError("max_fanout results are lists flagged as truncated; as_set is not supported")
+            if not self.supports(FANOUT_CAPS):
+                raise NotImplementedError(f"The {self.backend} backend cannot cap fan-out")
+            fanout = FanoutCap(max_fanout, sample, seed)
+        # pinned so the cache entry is keyed by the version actually read
+        with self.pinned() as view:
+            store = view.store
+
+            def query():
+                if as_set:
+                    return store.neighbor_set(node, depth, hop_filters, direction)
+                if fanout is None:
+                    return NeighborList(store.neighbors(node, depth, hop_filters, direction))
+                return store.neighbors(node, depth, hop_filters, direction, fanout)
+
+            if self.cache is None:
+                return query()
+            key = ("neighbors", node, depth, tuple(hop_filters) if hop_filters else None, direction, as_set, fanout)
+            found, result = self.cache.get(key, view.version)
+            if not found:
+                result = query()
+                # sets are immutable; lists are cached as tuples and copied out
+                result = result if as_set else (tuple(result), result.truncated)
+                self.cache.put(key, view.version, result)
+            return result if as_set else NeighborList(*result)
+
+    def iter_neighbors(
+        self,
+        node: str,
+        depth: int = 1,
+        predicates: Optional[Iterable[str]] = None,
+        hop_predicates: Optional[Sequence[Optional[Iterable[str]]]] = None,
+        direction: str = "out",
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Iterator[str]:
+        """Lazily yield neighbor nodes in hop order: all 1-hop neighbors, then 2-hop, ...
+
+        Takes the same filters as :meth:`query_neighbors`. The traversal reads
+        the version current at the call and only expands as far as the caller
+        consumes, so the first results arrive after a bounded amount of work
+        and stopping early (or ``limit``) skips the rest of the neighborhood.
+
         Args:
             node: start node
             depth: maximum hop distance
+            limit: optional maximum number of neighbors to yield
+            offset: number of leading neighbors to skip
+
+        Raises:
+            KeyError: if ``node`` is not in the graph
+        """
+        hop_filters = _hop_filters(depth, predicates, hop_predicates)
+        stream = self._stream(self.read_view().store, node, depth, hop_filters, direction)
+        return itertools.islice(stream, offset, None if limit is None else offset + limit)
+
+    def _stream(self, store, node: str, depth: int, hop_filters, direction: str) -> Iterator[str]:
+        if hasattr(store, "iter_neighbors"):
+            return store.iter_neighbors(node, depth, hop_filters, direction)
+        return iter(store.neighbors(node, depth, hop_filters, direction))
+
+    def neighbor_page(
+        self,
+        node: str,
+        depth: int = 1,
+        predicates: Optional[Iterable[str]] = None,
+        hop_predicates: Optional[Sequence[Optional[Iterable[str]]]] = None,
+        direction: str = "out",
+        limit: int = 50,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+    ) -> NeighborPage:
+        """Return one page of :meth:`iter_neighbors` results with a cursor for the next.
+
+        Pass the returned ``cursor`` (with the same traversal arguments) to
+        continue where the page ended. The executor keeps the suspended
+        traversals of recent cursors, so a follow-up page resumes without
+        re-expanding and reads the same view as the first one (a fixed
+        version on stores with ``freeze``, see :meth:`read_view`); each holds
+        memory in proportion to the nodes it has reached. A cursor
+        whose traversal was evicted (or that comes from another executor) is
+        replayed from the start, which requires the graph to be unchanged.
+
+        Args:
+            node: start node
+            depth: maximum hop distance
+            limit: page size
+            offset: neighbors to skip before the first page (ignored with a cursor)
+            cursor: token from a previous page
+
+        Returns:
+            NeighborPage; ``cursor`` is None once no neighbors are left
+
+        Raises:
+            KeyError: if ``node`` is not in the graph
+            ValueError: on a malformed cursor, one issued for a different
+                traversal, or a stale one that can no longer be replayed
+        """
+        if limit < 1:
+            raise ValueError(f"Page limit must be positive, got {limit}")
+        hop_filters = _hop_filters(depth, predicates, hop_predicates)
+        digest = _query_digest(node, depth, hop_filters, direction)
+        state = entry = None
+        if cursor is not None:
+            state = _decode_cursor(cursor)
+            if state["q"] != digest:
+                raise ValueError("Cursor was issued for a different traversal")
+            offset = state["at"]
+            with self._cursor_lock:
+                entry = self._cursors.pop(state["id"], None)
+        if entry is not None:
+            view, stream = entry
+        else:
+            view = self.read_view()
+            if state is not None and state["v"] != view.version:
+                raise ValueError("Cursor is stale: the graph changed since it was issued")
+            stream = itertools.islice(self._stream(view.store, node, depth, hop_filters, direction), offset, None)
+        items = list(itertools.islice(stream, limit))
+        if len(items) < limit:
+            return NeighborPage(items)
+        token = secrets.token_hex(8)
+        with self._cursor_lock:
+            self._cursors[token] = (view, stream)
+            while len(self._cursors) > _MAX_CURSORS:
+                self._cursors.popitem(last=False)
+        return NeighborPage(items, _encode_cursor({"q": digest, "v": view.version, "at": offset + limit, "id": token}))
+
+    def entity_set(self, nodes: Iterable[str]):
+        """Build an entity set from node names, dropping unknown nodes.
+
+        On the compact backend this is an :class:`EntitySet` over interned IDs
+        (sorted array or bitmap, whichever is smaller); on networkx it is a
+        frozenset. Both support ``&``, ``|``, ``-`` and ``len``.
+        """
+        if isinstance(nodes, EntitySet):
+            return nodes
+        return self.read_view().store.entity_set(nodes)
+
+    def get_entities_by_type(self, type_: str, candidates: Optional[Iterable[str]] = None):
+        """Return entities of class ``type_``, optionally among ``candidates``.
+
+        Answered from the type index as one set intersection.
+
+        Args:
+            type_: class node
+            candidates: optional entity set or node names to restrict to
+
+        Returns:
+            Entity set (see :meth:`entity_set`)
+        """
+        if candidates is not None:
+            candidates = self.entity_set(candidates)
+        return self.read_view().store.entities_of_type(type_, candidates)
+
+    def get_types(self, entity: str) -> List[str]:
+        """Return the classes of ``entity`` from the type index."""
+        return self.read_view().store.types_of(entity)
+
+    def get_relations(self, entity: str, direction: str = "out") -> Dict[str, int]:
+        """Return the relations around ``entity`` with their edge counts.
+
+        Served from a per-entity relation index kept up to date as triples
+        are loaded, so the cost does not grow with the entity's degree.
+
+        Args:
+            entity: entity to inspect
+            direction: "out", "in" or "both"
+
+        Returns:
+            Dict predicate -> number of edges, sorted by predicate
+        """
+        return self.read_view().store.relations_of(entity, direction)
+
+    def filter_by_value(
+        self,
+        predicate: str,
+        low: Any = None,
+        high: Any = None,
+        inclusive: bool = True,
+        candidates: Optional[Iterable[str]] = None,
+    ):
+        """Return entities whose numeric/date ``predicate`` value lies between bounds.
+
+        Answers questions like "born after 1990" with two binary searches over
+        the predicate's value-sorted column. Date columns accept ISO strings,
+        ``datetime.date`` or a bare year as bounds.
+
+        Args:
+            predicate: literal-valued predicate
+            low: lower bound, or None for unbounded
+            high: upper bound, or None for unbounded
+            inclusive: whether the bounds themselves match
+            candidates: optional entity set or node names to restrict to
+
+        Returns:
+            Entity set (see :meth:`entity_set`)
+        """
+        if candidates is not None:
+            candidates = self.entity_set(candidates)
+        return self.read_view().store.filter_by_value(predicate, low, high, inclusive, candidates)
+
+    def top_k(self, predicate: str, k: int = 1, candidates: Optional[Iterable[str]] = None, largest: bool = True):
+        """Return the ``k`` entities with the largest (or smallest) ``predicate`` values.
+
+        Args:
+            predicate: literal-valued predicate
+            k: number of results
+            candidates: optional entity set or node names to rank
+            largest: rank by descending (True) or ascending value
+
+        Returns:
+            List of (entity, value) pairs, best first; dates are ISO strings
+        """
+        if candidates is not None:
+            candidates = self.entity_set(candidates)
+        return self.read_view().store.top_k(predicate, k, candidates, largest)
+
+    def argmax(self, predicate: str, candidates: Optional[Iterable[str]] = None) -> Optional[str]:
+        """Return the entity with the largest ``predicate`` value, or None."""
+        best = self.top_k(predicate, 1, candidates, largest=True)
+        return best[0][0] if best else None
+
+    def argmin(self, predicate: str, candidates: Optional[Iterable[str]] = None) -> Optional[str]:
+        """Return the entity with the smallest ``predicate`` value, or None."""
+        best = self.top_k(predicate, 1, candidates, largest=False)
+        return best[0][0] if best else None
+
+    def entity_names(self, entities) -> List[str]:
+        """Return the node names of an entity set, sorted by ID on the compact backend."""
+        if isinstance(entities, EntitySet):
+            return self.read_view().store.entities.terms(entities.ids.tolist())
+        return list(entities)
+
+    def build_label_index(
+        self,
+        label_predicates: Iterable[str] = DEFAULT_LABEL_PREDICATES,
+        include_names: bool = True,
+        ngram: int = 3,
+        max_postings: int = 100_000,
+    ) -> LabelIndex:
+        """Build the entity-linking index over the current graph.
+
+        Labels are the objects of ``label_predicates`` and, with
+        ``include_names``, the local names of all subject nodes
+        (``.../Barack_Obama`` -> "barack obama"). :meth:`link_entities` keeps
+        the index up to date with the same options as the graph changes.
+
+        Args:
+            label_predicates: predicates whose objects are entity labels
+            include_names: also index node names
+            ngram: character n-gram length
+            max_postings: skip longer posting lists when a query has rarer terms
+
+        Returns:
+            The new LabelIndex (also kept as ``self.label_index``)
+        """
+        options = dict(label_predicates=tuple(label_predicates), include_names=include_names,
+                       ngram=ngram, max_postings=max_postings)
+        with self._label_lock:
+            self._track_labels(options)
+            with self.pinned() as view:
+                self.label_index = self._new_label_index(view)
+                self._label_index_version = view.version
+        return self.label_index
+
+    def link_entities(self, mentions: Sequence[str], k: int = 5) -> List[List[tuple]]:
+        """Link surface strings to entities with the label index.
+
+        The index is built on first use with the options of the last
+        :meth:`build_label_index` call. After writes only the entities they
+        touched are relabeled (see :meth:`LabelIndex.updated`).
+
+        Args:
+            mentions: surface strings, e.g. candidate spans of one question
+            k: candidates per mention
+
+        Returns:
+            One list of (entity, score) pairs per mention, best first
+        """
+        if self.label_index is None:
+            self.build_label_index(**self._label_index_options)
+        with self.pinned() as view:
+            return self._label_index_at(view).link(mentions, k)
+
+    def _track_labels(self, options: Dict[str, Any]):
+        """Start marking the entities writes relabel (label lock held)."""
+        with self._write_lock:
+            if self._label_index_options != options:
+                self._label_forgotten = self.version
+            self._label_index_options = options
+            if self._label_changes is None:
+                self._label_changes = {}
+                self._label_forgotten = self.version
+
+    def _entity_labels(self, store: Any, entities: Iterable[Hashable]) -> Iterator[tuple]:
+        """Yield the (entity, label) pairs of ``entities`` in ``store``."""
+        options = self._label_index_options
+        for entity in entities:
+            relations = store.relations_of(entity)
+            if options["include_names"] and relations:
+                yield entity, local_name(entity)
+            for predicate in options["label_predicates"]:
+                if predicate in relations:
+                    for _, _, o in store.match(subject=entity, predicate=predicate):
+                        yield entity, o
+
+    def _new_label_index(self, view: ReadView) -> LabelIndex:
+        """Build a label index over every entity of ``view``."""
+        options, store = self._label_index_options, view.store
+
+        def pairs():
+            if options["include_names"]:
+                for node in store.subjects():
+                    yield node, local_name(node)
+            for predicate in options["label_predicates"]:
+                for s, _, o in store.match(predicate=predicate):
+                    yield s, o
+
+        return LabelIndex(pairs(), options["ngram"], options["max_postings"])
+
+    def _label_index_at(self, view: ReadView) -> LabelIndex:
+        """Return the label index of ``view``, bringing the shared one up to it.
+
+        Entities marked since the index was built are relabeled from
+        ``view``; the marks are then cleared up to its version.
+        """
+        with self._label_lock:
+            index, version = self.label_index, self._label_index_version
+            if index is not None and version == view.version:
+                return index
+            if index is not None and version > view.version:
+                # a reader pinned before the last update gets an index of its own
+                return self._new_label_index(view)
+            changes = self._label_changes.copy()
+            if index is None or self._label_forgotten > version:
+                index = self._new_label_index(view)
+            else:
+                changed = [entity for entity, changed_at in changes.items() if changed_at > version]
+                index = index.updated(self._entity_labels(view.store, changed), changed)
+            with self._write_lock:
+                live = self._label_changes
+                for entity, changed_at in changes.items():
+                    if changed_at <= view.version and live.get(entity) == changed_at:
+                        del live[entity]
+                self._label_forgotten = max(self._label_forgotten, view.version)
+            self.label_index, self._label_index_version = index, view.version
+            return index
+
+    def close(self):
+        """Release resources held by the store (database connections)."""
+        if hasattr(self.store, "close"):
+            self.store.close()
+
+    def cache_stats(self) -> Optional[CacheStats]:
+        """Return hit/miss/eviction counters of the query cache, or None if disabled."""
+        return self.cache.stats if self.cache is not None else None
+
+    def invalidate_cache(self):
+        """Bump the graph version so every cached result (and the label index) is recomputed."""
+        with self._writing():
+            self._label_forgotten = self.version + 1
+
+    @property
+    def capabilities(self) -> frozenset:
+        """Optional operations the store implements natively (see :mod:`kg_agent.protocol`)."""
+        return getattr(self.store, "capabilities", frozenset())
+
+    def supports(self, capability: str) -> bool:
+        """Return True if the store advertises ``capability``."""
+        return capability in self.capabilities
+
+    def query_neighbors_batch(
+        self,
+        nodes: Iterable[str],
+        depth: int = 1,
+        predicates: Optional[Iterable[str]] = None,
+        hop_predicates: Optional[Sequence[Optional[Iterable[str]]]] = None,
+        direction: str = "out",
+    ) -> Dict[str, Dict[str, int]]:
+        """Expand several start nodes in a single multi-source BFS.
+
+        Takes the same filters as :meth:`query_neighbors`. Every node reached
+        from any source is reported with the sources that reached it and the
+        hop distance from each; a source only appears as a reached node if a
+        cycle leads back to it.
+
+        Args:
+            nodes: start nodes (names, or an EntitySet on the compact backend)
+            depth: maximum hop distance
+
+        Returns:
+            Mapping of reached node -> {source node: distance}
+        """
+        hop_filters = _hop_filters(depth, predicates, hop_predicates)
+        store = self.read_view().store
+        if hasattr(store, "neighbors_batch"):
+            return store.neighbors_batch(nodes, depth, hop_filters, direction)
+        # one traversal per source and depth; distance is the first depth reaching a node
+        reached: Dict[str, Dict[str, int]] = {}
+        for source in dict.fromkeys(nodes):
+            for hops in range(1, depth + 1):
+                for node in store.neighbors(source, hops, hop_filters[:hops] if hop_filters else None, direction):
+                    reached.setdefault(node, {}).setdefault(source, hops)
+        return reached
+
+    def find_relation_paths(
+        self,
+        source: str,
+        target: str,
+        max_length: int = 3,
+        predicates: Optional[Iterable[str]] = None,
+        max_paths: Optional[int] = None,
+        decode: bool = False,
+    ):
+        """Enumerate the relation paths connecting two entities.
+
+        Returns every simple directed path of 1..max_length hops. Stores with
+        the ``RELATION_PATHS`` capability (compact) run a vectorized
+        bidirectional search; others fall back to a depth-first search over
+        ``match`` and always return decoded paths.
+
+        Args:
+            source: topic entity
+            target: candidate answer entity
+            max_length: maximum number of hops
+            predicates: optional allowed predicates
+            max_paths: optional cap on the number of paths (shortest first)
+            decode: return string paths instead of the ID encoding
+
+        Returns:
+            RelationPaths (ID arrays), or with ``decode`` a list of
+            ``[entity, predicate, entity, ...]`` lists
+
+        Raises:
+            KeyError: if source or target is not in the graph
+        """
+        store = self.read_view().store
+        if not self.supports(RELATION_PATHS):
+            for node in (source, target):
+                if not len(store.entity_set([node])):
+                    raise KeyError(f"Node {node} not in graph")
+            allowed = _as_predicate_set(predicates) if predicates is not None else None
+            return simple_relation_paths(store.match, source, target, max_length, allowed, max_paths)
+        ids = []
+        for node in (source, target):
+            node_id = store.entities.lookup(node)
+            if node_id is None:
+                raise KeyError(f"Node {node} not in graph")
+            ids.append(node_id)
+        paths = find_relation_paths(store, ids[0], ids[1], max_length, store.predicate_ids(predicates), max_paths)
+        return paths.decode(store) if decode else paths
+
+    def sparql(self, query: str, bindings: Optional[Dict[str, Any]] = None):
+        """Run a SPARQL query on the rdflib backend.
+
+        The query text is compiled once and cached, so pass the varying terms
+        as ``bindings`` (variable name without ``?`` -> IRI string, literal
+        or rdflib term) rather than formatting them into the text.
+
+        Args:
+            query: SPARQL SELECT or ASK query
+            bindings: optional initial variable bindings
+
+        Returns:
+            Lazy iterator of row tuples (strings, None for unbound) for SELECT;
+            a bool for ASK
+
+        Raises:
+            NotImplementedError: if the store has no ``SPARQL`` capability
+        """
+        if not self.supports(SPARQL):
+            raise NotImplementedError("SPARQL queries require the rdflib backend")
+        return self.read_view().store.execute(query, bindings)
+
+    def match_triples(self, subject: Optional[str] = None, predicate: Optional[str] = None, obj: Optional[str] = None):
+        """Return all triples matching a (subject, predicate, object) pattern.
+
+        Any position left as None is a wildcard, e.g. ``match_triples(predicate="born_in")``
+        answers (?, born_in, ?). Bound positions are resolved through the
+        store's indexes rather than by scanning every edge.
+
+        Args:
+            subject: subject to match, or None
+            predicate: predicate to match, or None
+            obj: object to match, or None
 
         Returns:
-            List of neighbor node identifiers
+            List of (subject, predicate, object) tuples
         """
-        # TODO: implement more robust multi-hop queries and predicate filtering
-        neighbors = set()
-        frontier = {node}
-        for _ in range(depth):
-            next_frontier = set()
-            for n in frontier:
-                next_frontier.update(self.graph.successors(n))
-            neighbors.update(next_frontier)
-            frontier = next_frontier
-        return list(neighbors)
+        return self.read_view().store.match(subject, predicate, obj)
 
 
 class KGToolbox:
@@ -124,13 +1408,13 @@ class KGAgent:
     to run next and how to update memory until a final answer is produced.
     """
 
-    def __init__(self, llm: Any, toolbox: KGToolbox, executor: KGExecutor, memory: Optional[KnowledgeMemory] = None):
+    def __init__(self, llm: Any, toolbox: KGToolbox, executor: Executor, memory: Optional[KnowledgeMemory] = None):
         """Initialize the KGAgent.
 
         Args:
             llm: language model or wrapper (expected to be PyTorch/HF-compatible)
             toolbox: collection of tools
-            executor: KG executor instance
+            executor: KGExecutor or any object implementing :class:`kg_agent.protocol.Executor`
             memory: optional knowledge memory
         """
         self.llm = llm
@@ -198,6 +1482,12 @@ class KGAgent:
         Returns:
             Final answer or aggregated result
         """
+        # one consistent graph version for the whole run, even while loads continue
+        pin = self.executor.pinned() if hasattr(self.executor, "pinned") else contextlib.nullcontext()
+        with pin:
+            return self._run(question, max_iterations)
+
+    def _run(self, question: str, max_iterations: int):
         plan = self.plan(question)
         result = None
         for i in range(max_iterations):
@@ -214,18 +1504,19 @@ class KGAgent:
 
 
 # Simple example tool
-def neighbor_tool(executor: KGExecutor, node: str, depth: int = 1):
+def neighbor_tool(executor: Executor, node: str, depth: int = 1, max_fanout: Optional[int] = None):
     """Tool that returns neighbors of a node in the KG executor.
 
     Args:
         executor: KGExecutor instance
         node: start node id
         depth: hop depth
+        max_fanout: optional per-hop edge limit for hub nodes
 
     Returns:
-        List of neighbor node ids
+        List of neighbor node ids (``.truncated`` tells whether the cap cut it)
     """
-    return executor.query_neighbors(node, depth)
+    return executor.query_neighbors(node, depth, max_fanout=max_fanout)
 
 
 # TODO: Add helpers for prompting LLM, program-based reasoning synthesis, and fine-tuning utilities
@@ -0,0 +1,305 @@
+"""Durable graph: base snapshot + write-ahead log + delta runs.
+
+A :class:`DurableStore` lives in one directory:
+
+- ``CURRENT``: JSON naming the live base snapshot and the first WAL segment
+  that is not folded into it
+- ``base-<n>/``: compact snapshots (see :mod:`kg_agent.snapshot`), opened with
+  memory mapping
+- ``wal-<n>.log``: WAL segments, one JSON record per line
+  (``{"op": "add" | "del", "triples": [[s, p, o], ...]}``)
+
+Every insert or delete is appended to the current segment (and fsync'd)
+before it is applied to a :class:`kg_agent.store.CompactGraphStore` opened
+over the base: small batches become delta runs and tombstones layered over
+the mapped arrays, which frozen read views share instead of copying. Once
+``checkpoint_threshold`` triples were logged since the base, a background
+thread writes a frozen view as a new base snapshot while writes continue into
+a fresh segment; ``CURRENT`` is switched atomically afterwards, the writes
+made meanwhile are replayed over the new base and older files are deleted.
+Opening the directory again maps the base and replays only the segments
+written since, stopping at a torn final record.
+"""
+
+import json
+import os
+import shutil
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .protocol import PERSISTENT
+from .snapshot import open_snapshot, save_snapshot
+from .store import DEFAULT_TYPE_PREDICATES, CompactGraphStore
+
+CURRENT = "CURRENT"
+
+Triple = Tuple[str, str, str]
+
+
+def _segment_name(seq: int) -> str:
+    return f"wal-{seq:06d}.log"
+
+
+class WriteAheadLog:
+    """Append-only log of triple inserts and deletes, split into numbered segments.
+
+    Args:
+        directory: directory holding the segments
+        seq: number of the segment to append to
+        sync: fsync after every record (durable against power loss, slower)
+    """
+
+    def __init__(self, directory: str, seq: int, sync: bool = True):
+        self.directory = directory
+        self.sync = sync
+        self.seq = seq
+        self._file = open(os.path.join(directory, _segment_name(seq)), "ab")
+
+    def append(self, op: str, triples: List[Triple]):
+        """Write one record; returns once it is on disk (with ``sync``)."""
+        record = json.dumps({"op": op, "triples": triples}, ensure_ascii=False)
+        self._file.write(record.encode("utf-8") + b"\n")
+        self._file.flush()
+        if self.sync:
+            os.fsync(self._file.fileno())
+
+    def rotate(self) -> int:
+        """Continue in a new segment; returns its number."""
+        self._file.close()
+        self.seq += 1
+        self._file = open(os.path.join(self.directory, _segment_name(self.seq)), "ab")
+        return self.seq
+
+    def close(self):
+        self._file.close()
+
+    @staticmethod
+    def segments(directory: str, first: int) -> List[int]:
+        """Return the numbers of the segments >= ``first`` present in ``directory``, ascending."""
+        found = []
+        for name in os.listdir(directory):
+            if name.startswith("wal-") and name.endswith(".log"):
+                seq = int(name[4:-4])
+                if seq >= first:
+                    found.append(seq)
+        return sorted(found)
+
+    @staticmethod
+    def replay(path: str) -> Iterator[Tuple[str, List[Triple]]]:
+        """Yield (op, triples) records of one segment.
+
+        A final record cut short by a crash is dropped and truncated away, so
+        appending can resume after it.
+        """
+        good = 0
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete record")
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                good += len(line)
+                yield record["op"], [tuple(t) for t in record["triples"]]
+        if good != os.path.getsize(path):
+            with open(path, "r+b") as f:
+                f.truncate(good)
+
+
+class DurableStore:
+    """Store persisted as a base snapshot plus a write-ahead log (see module docstring).
+
+    Reads on the store itself go to the live compact store and see every
+    acknowledged write; concurrent readers should use :meth:`freeze`, as
+    ``KGExecutor`` does.
+
+    Args:
+        directory: store directory (created if missing); reopening it
+            recovers the state from the last base and the WAL tail
+        type_predicates: predicates treated as class membership
+        checkpoint_threshold: number of triples logged since the base that
+            starts a background checkpoint; 0 disables automatic checkpoints
+        sync: fsync every WAL record
+    """
+
+    capabilities = CompactGraphStore.capabilities | {PERSISTENT}
+
+    # writes that would bypass the WAL are not passed through to the compact store
+    _UNLOGGED = frozenset({"add_encoded", "add_ids", "remove_ids"})
+
+    def __init__(
+        self,
+        directory: str,
+        type_predicates: Iterable[str] = DEFAULT_TYPE_PREDICATES,
+        checkpoint_threshold: int = 100_000,
+        sync: bool = True,
+    ):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.type_predicates = frozenset(type_predicates)
+        self.checkpoint_threshold = checkpoint_threshold
+        current = self._read_current()
+        for name in os.listdir(directory):
+            # bases of checkpoints interrupted before switching CURRENT
+            if name.startswith("base-") and name != current["base"]:
+                shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+        for seq in WriteAheadLog.segments(directory, 0):
+            # segments of a checkpoint interrupted after switching CURRENT
+            if seq < current["wal"]:
+                os.remove(os.path.join(directory, _segment_name(seq)))
+        self.store = self._open_base(current["base"])
+        # triples logged since the base on disk (or the one being written)
+        self._changes = 0
+        segments = WriteAheadLog.segments(directory, current["wal"])
+        for seq in segments:
+            for op, triples in WriteAheadLog.replay(os.path.join(directory, _segment_name(seq))):
+                self._apply(self.store, op, triples)
+                self._changes += len(triples)
+        self.wal = WriteAheadLog(directory, segments[-1] if segments else current["wal"], sync)
+        self._lock = threading.RLock()
+        # records logged while a checkpoint runs, replayed over its base
+        self._since: Optional[List[Tuple[str, List[Triple]]]] = None
+        self._checkpoint_thread: Optional[threading.Thread] = None
+        self._checkpoint_error: Optional[BaseException] = None
+
+    def __getattr__(self, name: str):
+        store = self.__dict__.get("store")
+        if store is None or name in self._UNLOGGED:
+            raise AttributeError(name)
+        return getattr(store, name)
+
+    @property
+    def merge_listener(self) -> Optional[Callable[[], None]]:
+        """Called when a background merge or checkpoint has new arrays ready (see ``CompactGraphStore``)."""
+        return self.store.merge_listener
+
+    @merge_listener.setter
+    def merge_listener(self, listener: Optional[Callable[[], None]]):
+        self.store.merge_listener = listener
+
+    def _open_base(self, name: Optional[str]) -> CompactGraphStore:
+        if name is None:
+            return CompactGraphStore(self.type_predicates)
+        store = open_snapshot(os.path.join(self.directory, name))
+        store.type_predicates = self.type_predicates
+        return store
+
+    @staticmethod
+    def _apply(store: CompactGraphStore, op: str, triples: List[Triple]):
+        """Apply one WAL record."""
+        if op == "add":
+            store.add_triples(triples)
+        else:
+            store.remove_triples(triples)
+
+    def _read_current(self) -> Dict[str, Any]:
+        path = os.path.join(self.directory, CURRENT)
+        if not os.path.exists(path):
+            return {"base": None, "wal": 0}
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_current(self, base: str, wal: int):
+        """Point CURRENT at a new base atomically (write + fsync + rename)."""
+        path = os.path.join(self.directory, CURRENT)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"base": base, "wal": wal}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _log(self, op: str, triples: Iterable[tuple]):
+        rows = [(str(s), str(p), str(o)) for s, p, o in triples]
+        with self._lock:
+            self.wal.append(op, rows)
+            self._apply(self.store, op, rows)
+            if self._since is not None:
+                self._since.append((op, rows))
+            self._changes += len(rows)
+            if self.checkpoint_threshold and self._changes >= self.checkpoint_threshold:
+                self.checkpoint(wait=False)
+
+    def add_triples(self, triples: Iterable[tuple]):
+        """Log and apply (subject, predicate, object) insertions."""
+        self._log("add", triples)
+
+    def remove_triples(self, triples: Iterable[tuple]):
+        """Log and apply deletions; triples not in the graph are ignored."""
+        self._log("del", triples)
+
+    def freeze(self) -> CompactGraphStore:
+        """Return a read view of the current state.
+
+        This is the compact store's own frozen view: it shares the base
+        arrays, tombstones and delta runs, so no part of the delta is copied.
+        """
+        with self._lock:
+            return self.store.freeze()
+
+    def checkpoint(self, wait: bool = True):
+        """Write the current state as a new base snapshot in a background thread.
+
+        Writes continue meanwhile: they go to a new WAL segment and are
+        replayed over the new base once it is in place. Does nothing if a
+        checkpoint is running or nothing was logged since the base.
+
+        Args:
+            wait: block until the checkpoint has finished
+        """
+        with self._lock:
+            running = self._checkpoint_thread is not None and self._checkpoint_thread.is_alive()
+            if not running and self._changes:
+                view = self.store.freeze()
+                seq = self.wal.rotate()
+                self._since = []
+                changes, self._changes = self._changes, 0
+                self._checkpoint_thread = threading.Thread(
+                    target=self._run_checkpoint, args=(view, seq, changes), name="kg-checkpoint", daemon=True
+                )
+                self._checkpoint_thread.start()
+            thread = self._checkpoint_thread
+        if wait and thread is not None:
+            thread.join()
+            if self._checkpoint_error is not None:
+                error, self._checkpoint_error = self._checkpoint_error, None
+                raise error
+
+    def _run_checkpoint(self, view: CompactGraphStore, seq: int, changes: int):
+        name = f"base-{seq:06d}"
+        try:
+            save_snapshot(view, os.path.join(self.directory, name))
+            base = self._open_base(name)
+            previous = self._read_current()["base"]
+            self._write_current(name, seq)
+        except BaseException as exc:
+            # keep the old base: the live store and the WAL still hold every change
+            with self._lock:
+                self._since = None
+                self._changes += changes
+            self._checkpoint_error = exc
+            return
+        with self._lock:
+            for op, triples in self._since:
+                self._apply(base, op, triples)
+            base.merge_listener = listener = self.store.merge_listener
+            self.store, self._since = base, None
+        if listener is not None:
+            listener()
+        for old in WriteAheadLog.segments(self.directory, 0):
+            if old < seq:
+                os.remove(os.path.join(self.directory, _segment_name(old)))
+        if previous is not None:
+            shutil.rmtree(os.path.join(self.directory, previous), ignore_errors=True)
+
+    def compact(self):
+        """Write a new base now (a checkpoint that waits)."""
+        self.checkpoint(wait=True)
+
+    def close(self):
+        """Wait for a running checkpoint and close the WAL."""
+        thread = self._checkpoint_thread
+        if thread is not None:
+            thread.join()
+        self.wal.close()
@@ -0,0 +1,339 @@
+"""Entity linking: map surface strings in a question to graph entities.
+
+A :class:`LabelIndex` is built over (entity, label) pairs, typically node
+names plus the objects of label predicates such as ``rdfs:label``. Labels are
+normalized (accents stripped, lower-cased, non-alphanumerics collapsed) and
+indexed three ways, all as CSR posting arrays of label IDs:
+
+- tokens: the token vocabulary is kept sorted and token IDs follow that
+  order, so every token sharing a prefix maps to one contiguous posting range
+  found with two binary searches (a flat stand-in for a prefix trie)
+- character n-grams of the padded label, for typo-tolerant matching
+- per-label token and n-gram counts used to normalize scores
+
+A lookup gathers the postings of the query's tokens and n-grams, scores
+every candidate label by IDF-weighted token coverage plus n-gram Dice
+similarity, and keeps the best label per entity. Postings longer than
+``max_postings`` (very common tokens and n-grams) are skipped when the query
+has rarer ones, which bounds the work per lookup on large label sets.
+
+Updates do not rebuild the index: :meth:`LabelIndex.updated` indexes the new
+labels of the changed entities in a small delta index layered over the
+shared base and hides their old labels, like the delta runs of the compact
+store. Runs are merged as they pile up and folded into a new base once they
+outgrow half of it.
+"""
+
+import copy
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+from typing import Collection, Dict, Hashable, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from .store import ID_DTYPE, _csr_offsets
+
+DEFAULT_LABEL_PREDICATES = (
+    "rdfs:label",
+    "http://www.w3.org/2000/01/rdf-schema#label",
+    "schema:name",
+    "http://schema.org/name",
+)
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+# Upper bound of every string that starts with a given prefix
+_PREFIX_END = "\U0010ffff"
+
+
+def normalize(text: Hashable) -> str:
+    """Lower-case, strip accents and collapse non-alphanumerics into single spaces."""
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return " ".join(t for t in _NON_ALNUM.split(text) if t)
+
+
+def local_name(term: Hashable) -> str:
+    """Return the readable part of an IRI or prefixed name (``.../Barack_Obama`` -> ``Barack_Obama``)."""
+    text = str(term).rstrip("/")
+    for sep in ("#", "/"):
+        if sep in text:
+            text = text.rsplit(sep, 1)[1]
+    if ":" in text:
+        text = text.split(":", 1)[1]
+    return text
+
+
+def char_ngrams(label: str, n: int = 3) -> List[str]:
+    """Return the distinct character n-grams of a normalized label padded with spaces."""
+    padded = f" {label} "
+    return list(dict.fromkeys(padded[i:i + n] for i in range(max(len(padded) - n + 1, 1))))
+
+
+def _postings(keys: array, labels: array, num_keys: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Group label IDs by key into CSR (offsets, postings)."""
+    keys = np.frombuffer(keys, dtype=np.intc).astype(ID_DTYPE)
+    labels = np.frombuffer(labels, dtype=np.intc).astype(ID_DTYPE)
+    order = np.lexsort((labels, keys))
+    return _csr_offsets(keys[order], num_keys), labels[order]
+
+
+class LabelIndex:
+    """Inverted index over normalized entity labels.
+
+    Attributes:
+        entities: distinct entity keys; ``label_entities`` indexes into it
+        labels: normalized label strings
+        label_entities: int32 entity index of every label
+        tokens: sorted token vocabulary (token ID = position)
+
+    ``entities``, ``labels`` and the posting arrays describe the base; labels
+    added by :meth:`updated` live in delta runs searched alongside it.
+    """
+
+    def __init__(self, pairs: Iterable[Tuple[Hashable, str]], ngram: int = 3, max_postings: int = 100_000):
+        """Build the index.
+
+        Args:
+            pairs: (entity, label) pairs; an entity may have several labels
+            ngram: character n-gram length
+            max_postings: posting lists longer than this are skipped when a
+                query has more selective tokens or n-grams
+        """
+        self.ngram = ngram
+        self.max_postings = max_postings
+        self.entities: List[Hashable] = []
+        self.labels: List[str] = []
+        entity_ids: Dict[Hashable, int] = {}
+        seen = set()
+        label_entities = array("i")
+        token_texts: List[str] = []
+        token_labels = array("i")
+        gram_ids: Dict[str, int] = {}
+        gram_keys, gram_labels = array("i"), array("i")
+        token_counts, gram_counts = array("i"), array("i")
+
+        for entity, label in pairs:
+            norm = normalize(label)
+            if not norm or (entity, norm) in seen:
+                continue
+            seen.add((entity, norm))
+            entity_id = entity_ids.get(entity)
+            if entity_id is None:
+                entity_id = entity_ids[entity] = len(self.entities)
+                self.entities.append(entity)
+            label_id = len(self.labels)
+            self.labels.append(norm)
+            label_entities.append(entity_id)
+            tokens = list(dict.fromkeys(norm.split()))
+            token_texts.extend(tokens)
+            token_labels.extend([label_id] * len(tokens))
+            token_counts.append(len(tokens))
+            grams = char_ngrams(norm, ngram)
+            for gram in grams:
+                gram_id = gram_ids.get(gram)
+                if gram_id is None:
+                    gram_id = gram_ids[gram] = len(gram_ids)
+                gram_keys.append(gram_id)
+            gram_labels.extend([label_id] * len(grams))
+            gram_counts.append(len(grams))
+
+        self.tokens: List[str] = sorted(set(token_texts))
+        token_ids = {t: i for i, t in enumerate(self.tokens)}
+        token_keys = array("i", (token_ids[t] for t in token_texts))
+        del token_texts
+        self._token_offsets, self._token_postings = _postings(token_keys, token_labels, len(self.tokens))
+        self._gram_ids = gram_ids
+        self._gram_offsets, self._gram_postings = _postings(gram_keys, gram_labels, len(gram_ids))
+        self.label_entities = np.frombuffer(label_entities, dtype=np.intc).astype(ID_DTYPE)
+        self._token_counts = np.frombuffer(token_counts, dtype=np.intc).astype(np.float64)
+        self._gram_counts = np.frombuffer(gram_counts, dtype=np.intc).astype(np.float64)
+        self._entity_ids = entity_ids
+        self._labels_per_entity = np.bincount(self.label_entities, minlength=len(self.entities))
+        # delta runs, oldest first; a run holds every label of the entities it replaces
+        self._runs: Tuple[LabelIndex, ...] = ()
+        self._replaced: frozenset = frozenset()
+        self._size = len(self.labels)
+
+    def __len__(self) -> int:
+        """Number of searchable labels, delta runs included."""
+        return self._size
+
+    def _weight(self) -> int:
+        return len(self.labels) + len(self._replaced)
+
+    def _num_labels(self, entity: Hashable) -> int:
+        entity_id = self._entity_ids.get(entity)
+        return 0 if entity_id is None else int(self._labels_per_entity[entity_id])
+
+    def pairs(self) -> Iterator[Tuple[Hashable, str]]:
+        """Yield the (entity, normalized label) pairs the index searches."""
+        levels = (self,) + self._runs
+        for i, level in enumerate(levels):
+            hidden = frozenset().union(*(run._replaced for run in levels[i + 1:]))
+            entities = level.entities
+            for label, entity_id in zip(level.labels, level.label_entities.tolist()):
+                if entities[entity_id] not in hidden:
+                    yield entities[entity_id], label
+
+    def updated(self, pairs: Iterable[Tuple[Hashable, str]], entities: Collection[Hashable]) -> "LabelIndex":
+        """Return an index in which ``entities`` have exactly the labels in ``pairs``.
+
+        This index is left unchanged and shares its arrays with the result, so
+        searches running on it are unaffected. Each run is merged into the one
+        before it while that one is no larger, which keeps the number of runs
+        logarithmic and rewrites every label a logarithmic number of times.
+        Until a merge drops them, replaced labels still count towards the
+        IDF weights, so scores may differ slightly from a fresh build.
+
+        Args:
+            pairs: (entity, label) pairs of the changed entities
+            entities: the changed entities, including those left without labels
+        """
+        run = LabelIndex(pairs, self.ngram, self.max_postings)
+        run._replaced = frozenset(entities)
+        size = self._size + run._size
+        for entity in run._replaced:
+            for level in reversed((self,) + self._runs):
+                if entity in level._replaced or level is self:
+                    size -= level._num_labels(entity)
+                    break
+        runs = self._runs + (run,)
+        while len(runs) > 1 and runs[-2]._weight() <= runs[-1]._weight():
+            older, newer = runs[-2:]
+            merged = LabelIndex(LabelIndex._stack(older, newer).pairs(), self.ngram, self.max_postings)
+            merged._replaced = older._replaced | newer._replaced
+            runs = runs[:-2] + (merged,)
+        index = copy.copy(self)
+        index._runs, index._size = runs, size
+        if 2 * sum(r._weight() for r in runs) > len(self.labels):
+            return LabelIndex(index.pairs(), self.ngram, self.max_postings)
+        return index
+
+    @staticmethod
+    def _stack(older: "LabelIndex", newer: "LabelIndex") -> "LabelIndex":
+        """View two runs as a base with one run over it (for :meth:`pairs`)."""
+        stacked = copy.copy(older)
+        stacked._runs = (newer,)
+        return stacked
+
+    def _token_range(self, token: str, min_prefix: int) -> Tuple[int, int]:
+        """Token-ID range of an exact token, else of all tokens it prefixes."""
+        lo = bisect_left(self.tokens, token)
+        if lo < len(self.tokens) and self.tokens[lo] == token:
+            return lo, lo + 1
+        if len(token) < min_prefix:
+            return lo, lo
+        return lo, bisect_left(self.tokens, token + _PREFIX_END, lo)
+
+    def _selective(self, ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Drop posting ranges above ``max_postings`` unless nothing else is left."""
+        ranges = [r for r in ranges if r[1] > r[0]]
+        kept = [r for r in ranges if r[1] - r[0] <= self.max_postings]
+        if not kept and ranges:
+            kept = [min(ranges, key=lambda r: r[1] - r[0])]
+        return kept
+
+    def search(self, mention: str, k: int = 5, min_prefix: int = 3) -> List[Tuple[Hashable, float]]:
+        """Return up to ``k`` (entity, score) pairs for one mention, best first.
+
+        Scores lie in [0, 1]; an exact normalized label match scores 1.
+
+        Args:
+            mention: surface string
+            k: number of entities to return
+            min_prefix: shortest unknown query token expanded as a prefix
+        """
+        query = normalize(mention)
+        if not query or not len(self):
+            return []
+        levels = (self,) + self._runs
+        tokens = list(dict.fromkeys(query.split()))
+        grams = char_ngrams(query, self.ngram)
+
+        # IDF weights count the postings of every level
+        spans = [[level._token_span(token, min_prefix) for token in tokens] for level in levels]
+        weights = [
+            np.log1p(len(self) / max(sum(hi - lo for lo, hi in column), 1))
+            for column in zip(*spans)
+        ]
+
+        # newest level first: a run hides the older labels of the entities it replaces
+        found: List[Tuple[Hashable, float]] = []
+        newer: List[frozenset] = []
+        for level, token_ranges in reversed(list(zip(levels, spans))):
+            if level.labels:
+                found += level._score(query, token_ranges, weights, grams, newer, k)
+            newer.append(level._replaced)
+        found.sort(key=lambda pair: -pair[1])
+        return [(entity, round(score, 4)) for entity, score in found[:k]]
+
+    def _token_span(self, token: str, min_prefix: int) -> Tuple[int, int]:
+        """Posting range of one query token."""
+        lo, hi = self._token_range(token, min_prefix)
+        return int(self._token_offsets[lo]), int(self._token_offsets[hi])
+
+    def _score(self, query: str, token_ranges: List[Tuple[int, int]], weights: List[float], grams: List[str],
+               newer: List[frozenset], k: int) -> List[Tuple[Hashable, float]]:
+        """Score the labels of this level; return its best ``k`` entities not replaced by a ``newer`` run."""
+        # token coverage, IDF-weighted; unknown tokens match as prefixes
+        total_weight = sum(weights)
+        weight_of = dict(zip(token_ranges, weights))
+        hits, hit_weights = [], []
+        for lo, hi in self._selective(token_ranges):
+            labels = np.unique(self._token_postings[lo:hi])
+            hits.append(labels)
+            hit_weights.append(np.full(len(labels), weight_of[(lo, hi)]))
+
+        # n-gram overlap
+        gram_ranges = []
+        for gram in grams:
+            gram_id = self._gram_ids.get(gram)
+            if gram_id is not None:
+                gram_ranges.append((int(self._gram_offsets[gram_id]), int(self._gram_offsets[gram_id + 1])))
+        gram_hits = [self._gram_postings[lo:hi] for lo, hi in self._selective(gram_ranges)]
+
+        if not hits and not gram_hits:
+            return []
+        token_labels = np.concatenate(hits) if hits else np.zeros(0, dtype=ID_DTYPE)
+        gram_labels = np.concatenate(gram_hits) if gram_hits else np.zeros(0, dtype=ID_DTYPE)
+        candidates, inverse = np.unique(np.concatenate([token_labels, gram_labels]), return_inverse=True)
+        coverage = np.bincount(
+            inverse[:len(token_labels)],
+            weights=np.concatenate(hit_weights) if hit_weights else None,
+            minlength=len(candidates),
+        ) / total_weight
+        shared = np.bincount(inverse[len(token_labels):], minlength=len(candidates))
+        dice = 2.0 * shared / (len(grams) + self._gram_counts[candidates])
+        scores = 0.5 * np.minimum(coverage, 1.0) + 0.5 * dice
+        # full coverage may be an exact match; confirm on the strings
+        for row in np.flatnonzero(coverage >= 1.0 - 1e-9).tolist():
+            if self.labels[candidates[row]] == query:
+                scores[row] = 1.0
+
+        # best label per entity, then top k entities
+        entities = self.label_entities[candidates]
+        order = np.lexsort((-scores, entities))
+        entities, scores = entities[order], scores[order]
+        first = np.r_[True, entities[1:] != entities[:-1]]
+        entities, scores = entities[first], scores[first]
+        if newer:
+            # walk down the ranking until k entities remain visible
+            order, kept = np.lexsort((entities, -scores)).tolist(), []
+            for row in order:
+                entity = self.entities[entities[row]]
+                if not any(entity in replaced for replaced in newer):
+                    kept.append((entity, float(scores[row])))
+                    if len(kept) == k:
+                        break
+            return kept
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            entities, scores = entities[top], scores[top]
+        order = np.lexsort((entities, -scores))
+        return [(self.entities[e], float(s)) for e, s in zip(entities[order].tolist(), scores[order].tolist())]
+
+    def link(self, mentions: Sequence[str], k: int = 5, min_prefix: int = 3) -> List[List[Tuple[Hashable, float]]]:
+        """Run :meth:`search` for a batch of mentions (e.g. all spans of one question)."""
+        return [self.search(mention, k, min_prefix) for mention in mentions]
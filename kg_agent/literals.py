@@ -0,0 +1,141 @@
+"""Typed literal columns for numeric and date comparisons.
+
+A :class:`NumericColumn` holds every (entity, value) pair of one predicate
+whose object parses as a number or an ISO date, sorted by value. Range
+filters are then two binary searches and top-k / argmax / argmin over a
+candidate set are a vectorized mask plus a slice from the right end.
+
+Dates are stored as days since 1970-01-01 so both kinds share the float64
+value column; :func:`to_value` and :func:`format_value` convert query bounds
+and results.
+"""
+
+import datetime
+import re
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+NUMBER = "number"
+DATE = "date"
+
+_DATE = re.compile(r"^(\d{4})(?:-(\d{2})(?:-(\d{2}))?)?(?:[T ].*)?$")
+_EPOCH = datetime.date(1970, 1, 1)
+
+
+def parse_date(text: str) -> Optional[float]:
+    """Parse ``YYYY``, ``YYYY-MM`` or ``YYYY-MM-DD[Thh:mm...]`` to days since the epoch."""
+    match = _DATE.match(text.strip())
+    if match is None:
+        return None
+    year, month, day = match.groups()
+    try:
+        date = datetime.date(int(year), int(month or 1), int(day or 1))
+    except ValueError:
+        return None
+    return float((date - _EPOCH).days)
+
+
+def _parse_number(text: str) -> float:
+    try:
+        return float(text)
+    except ValueError:
+        return np.nan
+
+
+def parse_values(objects: Sequence[str]) -> Tuple[np.ndarray, str]:
+    """Parse literal strings into a float64 value array.
+
+    The column is a date column if any value looks like ``YYYY-MM``; in that
+    case bare years are read as January 1st of that year. Unparseable values
+    become NaN.
+
+    Returns:
+        (values, kind) with kind ``NUMBER`` or ``DATE``
+    """
+    texts = [str(o) for o in objects]
+    if any(_DATE.match(t) and "-" in t[1:] for t in texts):
+        values = [parse_date(t) for t in texts]
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64), DATE
+    try:
+        return np.array(texts, dtype=np.float64), NUMBER
+    except ValueError:
+        return np.array([_parse_number(t) for t in texts], dtype=np.float64), NUMBER
+
+
+def to_value(bound: Any, kind: str) -> Optional[float]:
+    """Convert a query bound (number, date, or string) into the column's value space."""
+    if bound is None:
+        return None
+    if kind == DATE:
+        if isinstance(bound, datetime.datetime):
+            bound = bound.date()
+        if isinstance(bound, datetime.date):
+            return float((bound - _EPOCH).days)
+        if isinstance(bound, (int, np.integer)):
+            # a bare integer bound on a date column is a year
+            return float((datetime.date(int(bound), 1, 1) - _EPOCH).days)
+        value = parse_date(str(bound))
+        if value is None:
+            raise ValueError(f"Cannot compare date column with {bound!r}")
+        return value
+    return float(bound)
+
+
+def format_value(value: float, kind: str) -> Any:
+    """Convert a stored value back to a user-facing number or ISO date string."""
+    if kind == DATE:
+        return (_EPOCH + datetime.timedelta(days=int(value))).isoformat()
+    return int(value) if float(value).is_integer() else float(value)
+
+
+class NumericColumn:
+    """(entity, value) pairs of one predicate sorted by value.
+
+    Attributes:
+        entities: entity keys aligned with ``values`` (IDs or node objects)
+        values: float64 values, ascending
+        kind: ``NUMBER`` or ``DATE``
+    """
+
+    def __init__(self, entities: np.ndarray, objects: Sequence[str]):
+        values, self.kind = parse_values(objects)
+        valid = ~np.isnan(values)
+        order = np.argsort(values[valid], kind="stable")
+        self.entities = entities[valid][order]
+        self.values = values[valid][order]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def range_slice(self, low: Any = None, high: Any = None, inclusive: bool = True) -> slice:
+        """Return the slice of rows whose value lies between ``low`` and ``high``."""
+        low, high = to_value(low, self.kind), to_value(high, self.kind)
+        start = 0 if low is None else np.searchsorted(self.values, low, side="left" if inclusive else "right")
+        stop = len(self.values) if high is None else np.searchsorted(self.values, high, side="right" if inclusive else "left")
+        return slice(int(start), int(max(start, stop)))
+
+    def top_k(self, k: int, mask: Optional[np.ndarray] = None, largest: bool = True) -> List[Tuple[Any, Any]]:
+        """Return up to ``k`` (entity, value) pairs with the largest (or smallest) values.
+
+        Each entity is reported once, with its best value.
+
+        Args:
+            k: number of results
+            mask: optional boolean row mask restricting the candidates
+            largest: rank by descending (True) or ascending value
+        """
+        rows = np.flatnonzero(mask) if mask is not None else np.arange(len(self.values))
+        if largest:
+            rows = rows[::-1]
+        results, seen = [], set()
+        for row in rows.tolist():
+            entity = self.entities[row]
+            key = entity.item() if isinstance(entity, np.generic) else entity
+            if key in seen:
+                continue
+            seen.add(key)
+            results.append((key, format_value(self.values[row], self.kind)))
+            if len(results) == k:
+                break
+        return results
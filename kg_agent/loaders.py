@@ -0,0 +1,395 @@
+"""Streaming loaders for KG dumps (N-Triples, gzip'd N-Triples, TSV).
+
+Files are read line by line through a generator pipeline::
+
+    lines -> parsed triples -> chunks -> store.add_triples(chunk)
+
+so no list of all input triples is ever materialized; the store interns IDs
+as each chunk arrives.
+
+For multi-GB files ``parallel_stream_file`` splits the input on line
+boundaries and parses the pieces in a ``multiprocessing`` pool. Each worker
+interns terms locally and ships back an :class:`EncodedChunk` (local term
+lists + int32 ID columns), which the coordinator remaps into the store's
+global dictionaries.
+
+Term conventions for N-Triples input:
+- IRIs are returned without the surrounding angle brackets
+- blank nodes keep their ``_:label`` form
+- literals are returned as their unescaped lexical form (language tags and
+  datatypes are dropped)
+"""
+
+import gzip
+import io
+import multiprocessing
+import os
+import re
+import time
+from array import array
+from collections import deque
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+FORMATS = ("nt", "nt.gz", "tsv", "tsv.gz")
+
+# Upper bound on the bytes of plain input parsed by one pool task
+RANGE_BYTES = 16 * 2**20
+
+_IRI = r"<[^>]*>"
+_BNODE = r"_:\S+"
+_LITERAL = r'"(?:[^"\\]|\\.)*"(?:@[A-Za-z0-9-]+|\^\^<[^>]*>)?'
+_NT_LINE = re.compile(
+    rf"\s*({_IRI}|{_BNODE})\s+({_IRI})\s+({_IRI}|{_BNODE}|{_LITERAL})\s*\.\s*(?:#.*)?$"
+)
+_ESCAPE = re.compile(r"\\(u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|.)")
+_SIMPLE_ESCAPES = {"t": "\t", "b": "\b", "n": "\n", "r": "\r", "f": "\f", '"': '"', "'": "'", "\\": "\\"}
+
+
+@dataclass
+class LoadStats:
+    """Progress/throughput counters reported by the loaders.
+
+    Attributes:
+        triples: number of triples loaded so far
+        skipped: number of malformed lines skipped
+        seconds: elapsed wall-clock time
+    """
+
+    triples: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+
+    @property
+    def triples_per_second(self) -> float:
+        return self.triples / self.seconds if self.seconds > 0 else 0.0
+
+
+def _unescape(match) -> str:
+    esc = match.group(1)
+    if esc[0] in "uU" and len(esc) > 1:
+        return chr(int(esc[1:], 16))
+    return _SIMPLE_ESCAPES.get(esc, esc)
+
+
+def _nt_term(token: str) -> str:
+    if token[0] == "<":
+        return token[1:-1]
+    if token[0] == '"':
+        lexical = token[1:token.rindex('"')]
+        return _ESCAPE.sub(_unescape, lexical) if "\\" in lexical else lexical
+    return token
+
+
+def parse_ntriples_line(line: str) -> Optional[Tuple[str, str, str]]:
+    """Parse one N-Triples line.
+
+    Args:
+        line: a single line of an N-Triples document
+
+    Returns:
+        (subject, predicate, object) or None for blank/comment lines
+
+    Raises:
+        ValueError: if the line is not a valid triple
+    """
+    stripped = line.strip()
+    if not stripped or stripped[0] == "#":
+        return None
+    match = _NT_LINE.match(stripped)
+    if match is None:
+        raise ValueError(f"Malformed N-Triples line: {stripped[:200]}")
+    s, p, o = match.groups()
+    return _nt_term(s), _nt_term(p), _nt_term(o)
+
+
+def parse_tsv_line(line: str) -> Optional[Tuple[str, str, str]]:
+    """Parse one tab-separated ``subject<TAB>predicate<TAB>object`` line.
+
+    Returns:
+        (subject, predicate, object) or None for blank/comment lines
+
+    Raises:
+        ValueError: if the line does not have exactly three columns
+    """
+    stripped = line.rstrip("\r\n")
+    if not stripped or stripped[0] == "#":
+        return None
+    parts = stripped.split("\t")
+    if len(parts) != 3:
+        raise ValueError(f"Expected 3 tab-separated columns, got {len(parts)}: {stripped[:200]}")
+    return parts[0], parts[1], parts[2]
+
+
+PARSERS = {"nt": parse_ntriples_line, "tsv": parse_tsv_line}
+
+
+def detect_format(path: str) -> str:
+    """Infer the dump format from a file name.
+
+    Raises:
+        ValueError: if the extension is not recognized
+    """
+    name = str(path).lower()
+    for fmt in sorted(FORMATS, key=len, reverse=True):
+        if name.endswith("." + fmt):
+            return fmt
+    if name.endswith(".ntriples") or name.endswith(".n3"):
+        return "nt"
+    raise ValueError(f"Cannot infer format of {path}; pass format= one of {FORMATS}")
+
+
+def open_text(path: str, fmt: str) -> io.TextIOBase:
+    """Open a dump for streaming text reads, decompressing gzip on the fly."""
+    if fmt.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def iter_triples(lines: Iterable[str], fmt: str, stats: Optional[LoadStats] = None, strict: bool = False) -> Iterator[tuple]:
+    """Parse lines lazily into triples.
+
+    Args:
+        lines: iterable of text lines
+        fmt: one of ``FORMATS``
+        stats: optional counters; malformed lines increment ``stats.skipped``
+        strict: raise on malformed lines instead of skipping them
+    """
+    parse = PARSERS[fmt.split(".")[0]]
+    for line in lines:
+        try:
+            triple = parse(line)
+        except ValueError:
+            if strict:
+                raise
+            if stats is not None:
+                stats.skipped += 1
+            continue
+        if triple is not None:
+            yield triple
+
+
+def chunked(items: Iterable, size: int) -> Iterator[list]:
+    """Group an iterable into lists of at most ``size`` items."""
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def stream_file(
+    path: str,
+    add_triples: Callable[[Iterable[tuple]], None],
+    format: Optional[str] = None,
+    chunk_size: int = 100_000,
+    progress: Optional[Callable[[LoadStats], None]] = None,
+    strict: bool = False,
+) -> LoadStats:
+    """Stream a dump file into ``add_triples`` chunk by chunk.
+
+    Args:
+        path: dump file path
+        add_triples: sink receiving each chunk of triples
+        format: one of ``FORMATS``; inferred from the file name when None
+        chunk_size: number of triples per chunk
+        progress: optional callback invoked with the running stats after each chunk
+        strict: raise on malformed lines instead of skipping them
+
+    Returns:
+        Final LoadStats
+    """
+    fmt = format or detect_format(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt}; expected one of {FORMATS}")
+    stats = LoadStats()
+    start = time.perf_counter()
+    with open_text(path, fmt) as f:
+        for chunk in chunked(iter_triples(f, fmt, stats, strict), chunk_size):
+            add_triples(chunk)
+            stats.triples += len(chunk)
+            stats.seconds = time.perf_counter() - start
+            if progress is not None:
+                progress(stats)
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+@dataclass
+class EncodedChunk:
+    """Triples parsed by a worker, interned against chunk-local dictionaries.
+
+    Attributes:
+        entities: local entity ID -> term
+        predicates: local predicate ID -> term
+        s, p, o: local ID columns (``array('i')``)
+        skipped: number of malformed lines skipped
+    """
+
+    entities: List[str] = field(default_factory=list)
+    predicates: List[str] = field(default_factory=list)
+    s: array = field(default_factory=lambda: array("i"))
+    p: array = field(default_factory=lambda: array("i"))
+    o: array = field(default_factory=lambda: array("i"))
+    skipped: int = 0
+
+    def __len__(self) -> int:
+        return len(self.s)
+
+    def triples(self) -> Iterator[Tuple[str, str, str]]:
+        """Decode the chunk back into string triples."""
+        ents, preds = self.entities, self.predicates
+        for s, p, o in zip(self.s, self.p, self.o):
+            yield ents[s], preds[p], ents[o]
+
+
+def encode_triples(triples: Iterable[tuple], chunk: Optional[EncodedChunk] = None) -> EncodedChunk:
+    """Intern triples into an EncodedChunk with local dictionaries."""
+    if chunk is None:
+        chunk = EncodedChunk()
+    entity_ids: Dict[str, int] = {}
+    predicate_ids: Dict[str, int] = {}
+    entities, predicates = chunk.entities, chunk.predicates
+    cs, cp, co = chunk.s, chunk.p, chunk.o
+    for s, p, o in triples:
+        sid = entity_ids.get(s)
+        if sid is None:
+            sid = entity_ids[s] = len(entities)
+            entities.append(s)
+        pid = predicate_ids.get(p)
+        if pid is None:
+            pid = predicate_ids[p] = len(predicates)
+            predicates.append(p)
+        oid = entity_ids.get(o)
+        if oid is None:
+            oid = entity_ids[o] = len(entities)
+            entities.append(o)
+        cs.append(sid)
+        cp.append(pid)
+        co.append(oid)
+    return chunk
+
+
+def split_file(path: str, parts: int) -> List[Tuple[int, int]]:
+    """Split a file into ``parts`` byte ranges that start and end on line boundaries."""
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        for i in range(1, parts):
+            f.seek(max(size * i // parts, bounds[-1]))
+            if f.tell() > 0:
+                # finish the line we landed in so the next range starts cleanly
+                f.seek(f.tell() - 1)
+                f.readline()
+            bounds.append(min(f.tell(), size))
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def _parse_range(args) -> EncodedChunk:
+    """Pool worker: parse the lines of ``path`` within a byte range."""
+    path, fmt, start, end, strict = args
+    chunk = EncodedChunk()
+
+    def lines():
+        with open(path, "rb") as f:
+            f.seek(start)
+            pos = start
+            while pos < end:
+                line = f.readline()
+                if not line:
+                    break
+                pos += len(line)
+                yield line.decode("utf-8")
+
+    return encode_triples(iter_triples(lines(), fmt, chunk, strict), chunk)
+
+
+def _parse_lines(args) -> EncodedChunk:
+    """Pool worker: parse a batch of already-read lines."""
+    lines, fmt, strict = args
+    chunk = EncodedChunk()
+    return encode_triples(iter_triples(lines, fmt, chunk, strict), chunk)
+
+
+def bounded_imap(pool, func: Callable, tasks: Iterable, window: int) -> Iterator:
+    """Like ``pool.imap`` but with at most ``window`` tasks submitted and not yet consumed.
+
+    ``imap`` drains its task iterator as fast as the workers go and queues
+    every finished result until the caller takes it, so a slow consumer (or
+    a fast reader of a compressed file) grows memory without bound. Here the
+    next task is only pulled once the oldest result has been handed out.
+    Results come back in task order.
+    """
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.apply_async(func, (task,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def parallel_stream_file(
+    path: str,
+    add_encoded: Callable[[EncodedChunk], None],
+    format: Optional[str] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = 100_000,
+    progress: Optional[Callable[[LoadStats], None]] = None,
+    strict: bool = False,
+) -> LoadStats:
+    """Parse a dump in a process pool and feed encoded chunks to ``add_encoded``.
+
+    Plain files are split on line boundaries into byte ranges (at least
+    ``4 * workers``, at most ``RANGE_BYTES`` each) that workers read and
+    parse independently. Gzip'd files cannot be seeked into, so the
+    coordinator decompresses them and hands out batches of ``chunk_size``
+    lines instead; parsing and interning still run in parallel. Chunks are
+    merged in file order, so ID assignment is deterministic. At most
+    ``2 * workers`` tasks are in flight (see :func:`bounded_imap`), so memory
+    is bounded by a few chunks however far the parsers run ahead of the
+    store.
+
+    Args:
+        path: dump file path
+        add_encoded: sink receiving each EncodedChunk
+        format: one of ``FORMATS``; inferred from the file name when None
+        workers: pool size (defaults to ``os.cpu_count()``)
+        chunk_size: lines per batch for compressed input
+        progress: optional callback invoked with the running stats after each chunk
+        strict: raise on malformed lines instead of skipping them
+
+    Returns:
+        Final LoadStats
+    """
+    fmt = format or detect_format(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt}; expected one of {FORMATS}")
+    workers = workers or os.cpu_count() or 1
+    stats = LoadStats()
+    start = time.perf_counter()
+
+    def merge(results: Iterable[EncodedChunk]):
+        for chunk in results:
+            add_encoded(chunk)
+            stats.triples += len(chunk)
+            stats.skipped += chunk.skipped
+            stats.seconds = time.perf_counter() - start
+            if progress is not None:
+                progress(stats)
+
+    window = 2 * workers
+    with multiprocessing.Pool(workers) as pool:
+        if fmt.endswith(".gz"):
+            with open_text(path, fmt) as f:
+                batches = ((batch, fmt, strict) for batch in chunked(f, chunk_size))
+                merge(bounded_imap(pool, _parse_lines, batches, window))
+        else:
+            ranges = split_file(path, max(workers * 4, -(-os.path.getsize(path) // RANGE_BYTES)))
+            tasks = ((path, fmt, a, b, strict) for a, b in ranges)
+            merge(bounded_imap(pool, _parse_range, tasks, window))
+    stats.seconds = time.perf_counter() - start
+    return stats
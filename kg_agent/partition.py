@@ -0,0 +1,333 @@
+"""Hash-partitioned traversal across local worker processes.
+
+:class:`PartitionedStore` is a :class:`kg_agent.store.CompactGraphStore`
+whose hop expansion runs in ``workers`` shard processes. Entity IDs are
+hash-partitioned; shard ``k`` expands the outgoing edges of the subjects and
+the incoming edges of the objects that hash to ``k``. Every traversal is
+level-synchronous: the coordinator splits the frontier of a hop by owner,
+sends each shard its part over a pipe, lets all shards expand concurrently
+and merges the returned (source, neighbor) pairs before deduplicating
+against its visited set. Single-source and batched BFS (and so
+``query_neighbors`` / ``query_neighbors_batch``) go through this path
+unchanged.
+
+The adjacency is held once. The coordinator's SPO and OSP arrays live in
+one memory-mapped file (in ``/dev/shm`` where available) that every shard
+maps read-only, so a shard holds no copy of its edges. The coordinator keeps
+the dictionaries and the other permutation indexes for lookups that are not
+traversals (types, relations, patterns, paths). Nothing edge-sized crosses
+the pipes: when the index arrays are rebuilt or merged the shards map the
+new file, a removal sends each shard only the positions it owns that became
+tombstones, and edges still in delta runs (see
+:class:`kg_agent.store.CompactGraphStore`) are expanded by the coordinator
+next to the shard replies. Each of these starts a new shard generation.
+Read views from :meth:`PartitionedStore.freeze` traverse through the shards
+while they still hold the view's generation and fall back to the view's own
+arrays after a later change. Each pipe has its own lock, so requests from
+several readers run concurrently on different shards.
+"""
+
+import multiprocessing
+import os
+import tempfile
+import threading
+import weakref
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .store import (
+    DEFAULT_TYPE_PREDICATES, ID_DTYPE, OFFSET_DTYPE, CompactGraphStore, _concat_pairs, _edge_positions, _member,
+)
+
+# Fibonacci hashing constant (2**64 / golden ratio)
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+# Index arrays the shards map: (offsets, predicates, neighbors) per direction
+_SHARED = {"out": ("offsets", "edge_predicates", "targets"), "in": ("osp_offsets", "osp_predicates", "osp_subjects")}
+
+# Array starts are aligned so every view is suitably aligned for its dtype
+_ALIGN = 64
+
+
+def shard_of(ids: np.ndarray, shards: int) -> np.ndarray:
+    """Return the owning shard of each entity ID.
+
+    IDs are scrambled with a multiplicative hash first, so consecutively
+    interned entities (often neighbors) spread over all shards.
+    """
+    scrambled = (np.asarray(ids).astype(np.uint64) * _HASH_MULTIPLIER) >> np.uint64(32)
+    return (scrambled % np.uint64(shards)).astype(np.intp)
+
+
+def _map_arrays(arrays: Dict[str, np.ndarray]) -> Tuple[str, Dict[str, Tuple[int, str, int]], Dict[str, np.ndarray]]:
+    """Copy ``arrays`` into a new shared file and map it.
+
+    Returns:
+        (path, layout: name -> (byte offset, dtype string, length), read-only views)
+    """
+    layout: Dict[str, Tuple[int, str, int]] = {}
+    size = 0
+    for name, arr in arrays.items():
+        size = -(-size // _ALIGN) * _ALIGN
+        layout[name] = (size, arr.dtype.str, len(arr))
+        size += arr.nbytes
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    fd, path = tempfile.mkstemp(prefix="kg-shards-", suffix=".bin", dir=directory)
+    os.close(fd)
+    # numpy.memmap cannot map an empty file
+    mapped = np.memmap(path, dtype=np.uint8, mode="r+", shape=max(size, 1))
+    for name, arr in arrays.items():
+        offset, dtype, length = layout[name]
+        np.ndarray(length, dtype=dtype, buffer=mapped, offset=offset)[:] = arr
+    mapped.flags.writeable = False
+    return path, layout, _views(mapped, layout)
+
+
+def _views(mapped: np.ndarray, layout: Dict[str, Tuple[int, str, int]]) -> Dict[str, np.ndarray]:
+    return {name: np.ndarray(length, dtype=dtype, buffer=mapped, offset=offset)
+            for name, (offset, dtype, length) in layout.items()}
+
+
+class _Adjacency:
+    """One direction of a shard: views of the shared CSR arrays plus the owned tombstones."""
+
+    def __init__(self, offsets: np.ndarray, predicates: np.ndarray, values: np.ndarray, dead: np.ndarray):
+        self.offsets, self.predicates, self.values = offsets, predicates, values
+        self.dead = dead
+
+    def gather(self, frontier: np.ndarray, allowed: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        offsets = self.offsets
+        frontier = frontier[frontier < len(offsets) - 1]
+        counts = offsets[frontier + 1] - offsets[frontier]
+        positions = _edge_positions(offsets, frontier)
+        sources = np.repeat(frontier, counts)
+        keep = np.isin(self.predicates[positions], allowed) if allowed is not None else None
+        if len(self.dead):
+            alive = ~_member(self.dead, positions)
+            keep = alive if keep is None else keep & alive
+        if keep is not None:
+            sources, positions = sources[keep], positions[keep]
+        return sources, self.values[positions]
+
+    def remove(self, positions: np.ndarray):
+        self.dead = np.union1d(self.dead, positions)
+
+
+def _serve(conn):
+    """Shard process loop: map the shared adjacency and expand the frontiers it owns."""
+    empty = np.zeros(0, dtype=ID_DTYPE)
+    no_dead = np.zeros(0, dtype=OFFSET_DTYPE)
+    adjacency = {direction: _Adjacency(np.zeros(1, dtype=OFFSET_DTYPE), empty, empty, no_dead) for direction in _SHARED}
+    while True:
+        message = conn.recv()
+        op = message[0]
+        if op == "attach":
+            _, path, layout, dead = message
+            views = _views(np.memmap(path, dtype=np.uint8, mode="r"), layout)
+            adjacency = {
+                direction: _Adjacency(*(views[name] for name in names), dead[direction])
+                for direction, names in _SHARED.items()
+            }
+            conn.send("attached")
+        elif op == "remove":
+            _, dead = message
+            for direction, positions in dead.items():
+                adjacency[direction].remove(positions)
+            conn.send("removed")
+        elif op == "expand":
+            _, frontier, allowed, direction = message
+            parts = [adjacency[d].gather(frontier, allowed) for d in ("out", "in") if direction in (d, "both")]
+            conn.send((np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])))
+        elif op == "close":
+            conn.close()
+            return
+
+
+def _shutdown(connections: List, processes: List):
+    for conn in connections:
+        try:
+            conn.send(("close",))
+            conn.close()
+        except (OSError, BrokenPipeError):
+            pass
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+
+
+class PartitionedStore(CompactGraphStore):
+    """Compact store whose traversals are distributed over shard processes.
+
+    Args:
+        type_predicates: predicates treated as class membership
+        workers: number of shard processes (defaults to the CPU count)
+        context: multiprocessing start method ("fork", "spawn", ...); the
+            platform default when None
+    """
+
+    def __init__(self, type_predicates: Iterable[str] = DEFAULT_TYPE_PREDICATES, workers: Optional[int] = None,
+                 context: Optional[str] = None):
+        super().__init__(type_predicates)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        ctx = multiprocessing.get_context(context)
+        self._connections, self._processes = [], []
+        for _ in range(self.workers):
+            parent, child = ctx.Pipe()
+            process = ctx.Process(target=_serve, args=(child,), daemon=True)
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+        self._finalizer = weakref.finalize(self, _shutdown, self._connections, self._processes)
+        self._shards_stale = False
+        self._generation = 0
+        # one request in flight per pipe; taken in shard order, all of them to change the shards
+        self._pipe_locks = [threading.Lock() for _ in range(self.workers)]
+        # serializes writes (flushes, shard updates) against each other
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_arrays(cls, entities, predicates, arrays):
+        """Build a store around existing dictionaries and index arrays, then attach the shards."""
+        store = super().from_arrays(entities, predicates, arrays)
+        store._shards_stale = True
+        return store
+
+    def _base_changed(self):
+        self._shards_stale = True
+
+    def _flush(self):
+        with self._lock:
+            super()._flush()
+            if self._shards_stale:
+                self._attach_shards()
+
+    def compact(self):
+        with self._lock:
+            super().compact()
+
+    def _owned_dead(self, index: str, positions: np.ndarray) -> List[np.ndarray]:
+        """Split tombstoned positions of ``index`` ("spo" or "osp") by the shard owning their key."""
+        offsets = self.offsets if index == "spo" else self.osp_offsets
+        owners = shard_of(np.searchsorted(offsets, positions, side="right") - 1, self.workers)
+        return [positions[owners == k] for k in range(self.workers)]
+
+    def _send_all(self, messages: List[tuple]):
+        """Send each shard its message and wait for every reply, with all pipes locked.
+
+        No expansion is in flight meanwhile, so the generation bumped here
+        and the shards' state change together.
+        """
+        for lock in self._pipe_locks:
+            lock.acquire()
+        try:
+            self._generation += 1
+            for conn, message in zip(self._connections, messages):
+                conn.send(message)
+            for conn in self._connections:
+                conn.recv()
+        finally:
+            for lock in self._pipe_locks:
+                lock.release()
+
+    def remove_ids(self, s: np.ndarray, p: np.ndarray, o: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Tombstone triples in the coordinator's indexes and send the owning shards their new tombstones."""
+        with self._lock:
+            s, p, o = super().remove_ids(s, p, o)
+            if len(s):
+                # triples that only lived in delta runs have no position in the shared arrays
+                spo, osp = self._locate("spo", s, p, o), self._locate("osp", s, p, o)
+                out_dead, in_dead = self._owned_dead("spo", spo[spo >= 0]), self._owned_dead("osp", osp[osp >= 0])
+                self._send_all([("remove", {"out": out_dead[k], "in": in_dead[k]}) for k in range(self.workers)])
+            return s, p, o
+
+    def _attach_shards(self):
+        """Move the SPO and OSP arrays into a shared file and have every shard map it."""
+        self._shards_stale = False
+        path, layout, views = _map_arrays({name: getattr(self, name) for names in _SHARED.values() for name in names})
+        try:
+            # the coordinator reads the shared copy too, so the private arrays can go
+            for name, view in views.items():
+                setattr(self, name, view)
+            no_dead = [np.zeros(0, dtype=OFFSET_DTYPE)] * self.workers
+            out_dead = self._owned_dead("spo", self._dead["spo"]) if self._num_dead else no_dead
+            in_dead = self._owned_dead("osp", self._dead["osp"]) if self._num_dead else no_dead
+            self._send_all([("attach", path, layout, {"out": out_dead[k], "in": in_dead[k]}) for k in range(self.workers)])
+        finally:
+            # every process keeps its mapping after the name is gone
+            os.remove(path)
+
+    def expand(self, frontier: np.ndarray, predicate_ids: Optional[np.ndarray] = None, direction: str = "out") -> Tuple[np.ndarray, np.ndarray]:
+        """Return (source, neighbor) ID pairs for every edge leaving ``frontier``.
+
+        The frontier is split by owning shard; all shards expand their part
+        concurrently and the coordinator concatenates the replies with the
+        edges of the delta runs.
+        """
+        with self._lock:
+            self._flush()
+            generation = self._generation
+        pairs = self.expand_generation(generation, frontier, predicate_ids, direction)
+        if pairs is None:
+            # a write changed the shards meanwhile; this store's arrays are current
+            return super().expand(frontier, predicate_ids, direction)
+        return _concat_pairs([pairs] + self._gather_delta(frontier, predicate_ids, direction))
+
+    def expand_generation(self, generation: int, frontier: np.ndarray, predicate_ids: Optional[np.ndarray] = None,
+                          direction: str = "out") -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Expand ``frontier`` on the shards while they hold ``generation``; None otherwise.
+
+        Only the pipes of the shards owning part of the frontier are locked,
+        in shard order, so requests from other threads proceed on the rest.
+        """
+        frontier = np.asarray(frontier, dtype=ID_DTYPE)
+        owners = shard_of(frontier, self.workers)
+        parts = [(k, frontier[owners == k]) for k in range(self.workers)]
+        parts = [(k, part) for k, part in parts if len(part)]
+        locks = [self._pipe_locks[k] for k, _ in parts]
+        for lock in locks:
+            lock.acquire()
+        try:
+            if generation != self._generation or self._shards_stale or not self._finalizer.alive:
+                return None
+            for k, part in parts:
+                self._connections[k].send(("expand", part, predicate_ids, direction))
+            replies = [self._connections[k].recv() for k, _ in parts]
+        finally:
+            for lock in locks:
+                lock.release()
+        if not replies:
+            empty = np.zeros(0, dtype=ID_DTYPE)
+            return empty, empty.copy()
+        return np.concatenate([r[0] for r in replies]), np.concatenate([r[1] for r in replies])
+
+    def freeze(self) -> "ShardedView":
+        """Return a read-only view of the current version whose hops still run on the shards."""
+        with self._lock:
+            view = self._frozen_view(ShardedView)
+            view.source, view.generation = self, self._generation
+        return view
+
+    def close(self):
+        """Stop the shard processes."""
+        self._finalizer()
+
+
+class ShardedView(CompactGraphStore):
+    """Frozen version of a :class:`PartitionedStore` (see :meth:`PartitionedStore.freeze`).
+
+    Hops are expanded by the source's shards while they still hold this
+    version and locally from the view's arrays once they have moved on.
+    """
+
+    source: Optional[PartitionedStore] = None
+    generation = -1
+
+    def expand(self, frontier: np.ndarray, predicate_ids: Optional[np.ndarray] = None, direction: str = "out") -> Tuple[np.ndarray, np.ndarray]:
+        if self.source is not None:
+            pairs = self.source.expand_generation(self.generation, frontier, predicate_ids, direction)
+            if pairs is not None:
+                return _concat_pairs([pairs] + self._gather_delta(frontier, predicate_ids, direction))
+        return super().expand(frontier, predicate_ids, direction)
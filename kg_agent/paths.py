@@ -0,0 +1,218 @@
+"""Relation-path search between two entities of a compact store.
+
+Paths are enumerated with a bidirectional (meet-in-the-middle) search: half
+paths are grown forward from the source along outgoing edges and backward from
+the target along incoming edges, then joined on their shared middle entity.
+With branching factor ``b`` this explores about ``O(b^(k/2))`` partial paths
+on each side instead of ``O(b^k)``.
+
+All partial paths of one length are kept as 2-D ID arrays (one row per path),
+so every extension and the final join are vectorized.
+
+Stores without ID arrays use :func:`simple_relation_paths`, a depth-first
+enumeration over their ``match`` lookups.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from .store import ID_DTYPE, CompactGraphStore, _range_positions
+
+# Rows of entity IDs and predicate IDs for partial paths of one length
+_HalfPaths = Tuple[np.ndarray, np.ndarray]
+
+
+@dataclass
+class RelationPaths:
+    """Compact encoding of relation paths.
+
+    Row ``i`` is a path of ``lengths[i]`` hops:
+    ``entities[i, 0] -p[i, 0]-> entities[i, 1] -p[i, 1]-> ...``. Rows are
+    padded with -1 up to the longest path.
+
+    Attributes:
+        entities: int32 array of shape (n_paths, max_length + 1)
+        predicates: int32 array of shape (n_paths, max_length)
+        lengths: int32 array of shape (n_paths,)
+    """
+
+    entities: np.ndarray
+    predicates: np.ndarray
+    lengths: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def decode(self, store: CompactGraphStore) -> List[List[str]]:
+        """Return each path as ``[entity, predicate, entity, ..., entity]`` strings."""
+        term, predicate = store.entities.term, store.predicates.term
+        paths = []
+        for ents, preds, length in zip(self.entities.tolist(), self.predicates.tolist(), self.lengths.tolist()):
+            path = [term(ents[0])]
+            for hop in range(length):
+                path.append(predicate(preds[hop]))
+                path.append(term(ents[hop + 1]))
+            paths.append(path)
+        return paths
+
+
+def _extend(half: _HalfPaths, store: CompactGraphStore, allowed: Optional[np.ndarray], forward: bool) -> _HalfPaths:
+    """Grow every half path by one live edge, dropping extensions that revisit an entity.
+
+    Forward half paths grow at their last column along outgoing edges,
+    backward ones at their first along incoming edges.
+    """
+    ents, preds = half
+    ends = ents[:, -1] if forward else ents[:, 0]
+    rows, new_ents, new_preds = store.edges_of(ends, forward)
+    keep = (ents[rows] != new_ents[:, None]).all(axis=1)
+    if allowed is not None:
+        keep &= np.isin(new_preds, allowed)
+    rows, new_ents, new_preds = rows[keep], new_ents[keep], new_preds[keep]
+    if forward:
+        return np.column_stack([ents[rows], new_ents]), np.column_stack([preds[rows], new_preds])
+    return np.column_stack([new_ents, ents[rows]]), np.column_stack([new_preds, preds[rows]])
+
+
+def _join(forward: _HalfPaths, backward: _HalfPaths) -> _HalfPaths:
+    """Join forward half paths ending at ``m`` with backward ones starting at ``m``."""
+    f_ents, f_preds = forward
+    b_ents, b_preds = backward
+    order = np.argsort(b_ents[:, 0], kind="stable")
+    b_ents, b_preds = b_ents[order], b_preds[order]
+    meet = f_ents[:, -1]
+    first = np.searchsorted(b_ents[:, 0], meet, side="left")
+    counts = np.searchsorted(b_ents[:, 0], meet, side="right") - first
+    f_rows = np.repeat(np.arange(len(meet)), counts)
+    b_rows = _range_positions(first, counts)
+    left, right = f_ents[f_rows], b_ents[b_rows][:, 1:]
+    # keep simple paths: the two halves may only share the meeting entity
+    simple = ~(left[:, :, None] == right[:, None, :]).any(axis=(1, 2))
+    ents = np.column_stack([left[simple], right[simple]])
+    preds = np.column_stack([f_preds[f_rows][simple], b_preds[b_rows][simple]])
+    return ents, preds
+
+
+def _term_ranks(ids: np.ndarray, terms: Callable[[List[int]], List[str]]) -> np.ndarray:
+    """Replace IDs by the rank of their decoded term, so sorting ranks sorts by term."""
+    unique, inverse = np.unique(ids, return_inverse=True)
+    names = terms(unique.tolist())
+    rank = np.empty(len(unique), dtype=np.int64)
+    rank[sorted(range(len(names)), key=names.__getitem__)] = np.arange(len(unique))
+    return rank[inverse].reshape(ids.shape)
+
+
+def find_relation_paths(
+    store: CompactGraphStore,
+    source: int,
+    target: int,
+    max_length: int = 3,
+    predicate_ids: Optional[np.ndarray] = None,
+    max_paths: Optional[int] = None,
+) -> RelationPaths:
+    """Enumerate simple directed paths of 1..max_length hops from ``source`` to ``target``.
+
+    Args:
+        store: compact store to search
+        source: source entity ID
+        target: target entity ID
+        max_length: maximum number of hops
+        predicate_ids: optional allowed predicate IDs
+        max_paths: optional cap on the number of returned paths (shortest first)
+
+    Returns:
+        RelationPaths sorted by length, then by their decoded terms in path
+        order (as :func:`simple_relation_paths`), so ``max_paths`` keeps the
+        same paths on every store
+    """
+    width = max_length
+    start = np.array([[source]], dtype=ID_DTYPE), np.zeros((1, 0), dtype=ID_DTYPE)
+    end = np.array([[target]], dtype=ID_DTYPE), np.zeros((1, 0), dtype=ID_DTYPE)
+    forward: List[_HalfPaths] = [start]
+    backward: List[_HalfPaths] = [end]
+    for _ in range((max_length + 1) // 2):
+        forward.append(_extend(forward[-1], store, predicate_ids, True))
+    for _ in range(max_length // 2):
+        backward.append(_extend(backward[-1], store, predicate_ids, False))
+
+    all_ents, all_preds, all_lengths = [], [], []
+    for length in range(1, max_length + 1):
+        # split every path at its middle entity so each one is produced exactly once
+        f_len, b_len = (length + 1) // 2, length // 2
+        ents, preds = _join(forward[f_len], backward[b_len])
+        if not len(ents):
+            continue
+        # interleave entity and predicate term ranks: e0, p0, e1, ..., e_length
+        key = np.empty((len(ents), 2 * length + 1), dtype=np.int64)
+        key[:, 0::2] = _term_ranks(ents, store.entities.terms)
+        key[:, 1::2] = _term_ranks(preds, store.predicates.terms)
+        order = np.lexsort(key.T[::-1])
+        ents, preds = ents[order], preds[order]
+        pad = width - length
+        all_ents.append(np.pad(ents, ((0, 0), (0, pad)), constant_values=-1))
+        all_preds.append(np.pad(preds, ((0, 0), (0, pad)), constant_values=-1))
+        all_lengths.append(np.full(len(ents), length, dtype=ID_DTYPE))
+        if max_paths is not None and sum(len(x) for x in all_lengths) >= max_paths:
+            break
+
+    if not all_lengths:
+        return RelationPaths(
+            np.zeros((0, width + 1), dtype=ID_DTYPE),
+            np.zeros((0, width), dtype=ID_DTYPE),
+            np.zeros(0, dtype=ID_DTYPE),
+        )
+    paths = RelationPaths(
+        np.concatenate(all_ents).astype(ID_DTYPE),
+        np.concatenate(all_preds).astype(ID_DTYPE),
+        np.concatenate(all_lengths),
+    )
+    if max_paths is not None and len(paths) > max_paths:
+        paths = RelationPaths(paths.entities[:max_paths], paths.predicates[:max_paths], paths.lengths[:max_paths])
+    return paths
+
+
+def simple_relation_paths(
+    match: Callable[..., List[tuple]],
+    source: Hashable,
+    target: Hashable,
+    max_length: int = 3,
+    predicates: Optional[frozenset] = None,
+    max_paths: Optional[int] = None,
+) -> List[List[Any]]:
+    """Enumerate simple directed paths from ``source`` to ``target`` depth-first.
+
+    Generic fallback for stores without native path search: one
+    ``match(subject)`` call per expanded entity, memoized for the search.
+
+    Args:
+        match: pattern lookup ``match(subject, predicate, obj)`` of a store
+        source: source entity
+        target: target entity
+        max_length: maximum number of hops
+        predicates: optional allowed predicates
+        max_paths: optional cap on the number of returned paths (shortest first)
+
+    Returns:
+        ``[entity, predicate, entity, ...]`` lists sorted by length, then by
+        their terms
+    """
+    out_edges: Dict[Hashable, List[Tuple[Any, Any]]] = {}
+    paths: List[List[Any]] = []
+
+    def walk(path: List[Any], visited: set):
+        node = path[-1]
+        if node not in out_edges:
+            out_edges[node] = [(p, o) for _, p, o in match(node, None, None) if predicates is None or p in predicates]
+        for p, o in out_edges[node]:
+            if o in visited:
+                continue
+            if o == target:
+                paths.append(path + [p, o])
+            elif len(path) // 2 + 1 < max_length:
+                walk(path + [p, o], visited | {o})
+
+    walk([source], {source})
+    paths.sort(key=lambda path: (len(path), [str(term) for term in path]))
+    return paths if max_paths is None else paths[:max_paths]
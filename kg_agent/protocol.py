@@ -0,0 +1,154 @@
+"""Backend protocol and capability flags.
+
+:class:`GraphStore` is the surface :class:`kg_agent.core.KGExecutor`
+delegates to; any object implementing it can be passed as ``backend=`` or
+registered by name with :func:`kg_agent.core.register_backend`. Stores
+advertise optional fast paths in ``capabilities``; the executor and the
+tools check them at runtime and fall back to generic implementations built
+on the required methods when a capability is missing.
+
+:class:`Executor` is the narrower surface agents and tools rely on, so they
+work with ``KGExecutor`` or any drop-in replacement.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Protocol, Sequence, Tuple, runtime_checkable
+
+# Multi-source traversal in one pass (``neighbors_batch``) cheaper than a loop
+BATCH_NEIGHBORS = "batch_neighbors"
+# Native relation-path search between two entities
+RELATION_PATHS = "relation_paths"
+# Data survives the process (database file, remote endpoint)
+PERSISTENT = "persistent"
+# Entity sets are compact ID sets (``EntitySet``) rather than frozensets
+ID_SETS = "id_sets"
+# Relation lookups come from a precomputed per-entity index
+RELATION_INDEX = "relation_index"
+# Ad-hoc SPARQL queries (``KGExecutor.sparql``)
+SPARQL = "sparql"
+# ``freeze`` returns an immutable read view in O(1) (no copy of the graph)
+SNAPSHOTS = "snapshots"
+# ``neighbors`` takes a per-hop fan-out cap (``fanout=``) and flags cut results
+FANOUT_CAPS = "fanout_caps"
+# Reads are safe while a write is in progress (the store synchronizes itself)
+CONCURRENT_READS = "concurrent_reads"
+
+CAPABILITIES = (
+    BATCH_NEIGHBORS, RELATION_PATHS, PERSISTENT, ID_SETS, RELATION_INDEX, SPARQL, SNAPSHOTS, FANOUT_CAPS,
+    CONCURRENT_READS,
+)
+
+# Per-hop predicate filters: one entry per hop, None allows every predicate
+HopFilters = Optional[List[Optional[frozenset]]]
+
+# How a capped node picks the edges it follows: highest-degree neighbors first,
+# or a seeded pseudo-random sample
+FANOUT_SAMPLES = ("degree", "random")
+
+
+@dataclass(frozen=True)
+class FanoutCap:
+    """Per-hop fan-out limit for neighbor traversals.
+
+    A frontier node with more than ``limit`` matching edges on a hop only
+    follows ``limit`` of them: the ones leading to the neighbors of highest
+    total degree (``sample="degree"``) or a sample drawn with ``seed``
+    (``sample="random"``). Both choices are deterministic, so capped results
+    are cacheable and reproducible.
+    """
+
+    limit: int
+    sample: str = "degree"
+    seed: int = 0
+
+    def __post_init__(self):
+        if self.limit < 1:
+            raise ValueError(f"Fan-out limit must be positive, got {self.limit}")
+        if self.sample not in FANOUT_SAMPLES:
+            raise ValueError(f"sample must be one of {FANOUT_SAMPLES}, got {self.sample!r}")
+
+
+class NeighborList(list):
+    """Neighbor list that records whether a fan-out cap cut it short.
+
+    Attributes:
+        truncated: True if some node on the way had more edges than the cap
+            allowed, i.e. the list is a partial neighborhood
+    """
+
+    def __init__(self, items: Iterable[Any] = (), truncated: bool = False):
+        super().__init__(items)
+        self.truncated = truncated
+
+
+@runtime_checkable
+class GraphStore(Protocol):
+    """Storage backend behind ``KGExecutor``.
+
+    Required methods are listed here. ``neighbors_batch``, ``iter_neighbors``
+    (a lazy traversal in hop order), relation-path
+    search (``RELATION_PATHS``), a ``fanout`` argument to ``neighbors``
+    (``FANOUT_CAPS``), ``filter_by_value`` / ``top_k``, ``freeze``
+    (a read view unaffected by later writes), ``remove_triples``, ``compact``
+    (reclaim the space of removed triples) and ``close`` are optional and
+    detected at runtime.
+    """
+
+    type_predicates: frozenset
+    capabilities: frozenset
+
+    def add_triples(self, triples: Iterable[tuple]) -> None: ...
+
+    def neighbors(self, node: Hashable, depth: int = 1, hop_filters: HopFilters = None, direction: str = "out") -> List[Any]: ...
+
+    def neighbor_set(self, node: Hashable, depth: int = 1, hop_filters: HopFilters = None, direction: str = "out") -> Any: ...
+
+    def entity_set(self, nodes: Iterable[Hashable]) -> Any: ...
+
+    def relations_of(self, entity: Hashable, direction: str = "out") -> Dict[Any, int]: ...
+
+    def entities_of_type(self, type_: Hashable, candidates: Any = None) -> Any: ...
+
+    def types_of(self, entity: Hashable) -> List[Any]: ...
+
+    def subjects(self) -> List[Any]: ...
+
+    def match(self, subject=None, predicate=None, obj=None) -> List[tuple]: ...
+
+
+@runtime_checkable
+class Executor(Protocol):
+    """Operations agents and tools may call on an executor."""
+
+    @property
+    def capabilities(self) -> frozenset: ...
+
+    def supports(self, capability: str) -> bool: ...
+
+    def query_neighbors(self, node: str, depth: int = 1, predicates: Optional[Iterable[str]] = None,
+                        hop_predicates: Optional[Sequence[Optional[Iterable[str]]]] = None,
+                        direction: str = "out", as_set: bool = False, max_fanout: Optional[int] = None,
+                        sample: str = "degree", seed: int = 0) -> Any: ...
+
+    def iter_neighbors(self, node: str, depth: int = 1, predicates: Optional[Iterable[str]] = None,
+                       hop_predicates: Optional[Sequence[Optional[Iterable[str]]]] = None,
+                       direction: str = "out", limit: Optional[int] = None, offset: int = 0) -> Iterator[Any]: ...
+
+    def neighbor_page(self, node: str, depth: int = 1, predicates: Optional[Iterable[str]] = None,
+                      hop_predicates: Optional[Sequence[Optional[Iterable[str]]]] = None, direction: str = "out",
+                      limit: int = 50, offset: int = 0, cursor: Optional[str] = None) -> Any: ...
+
+    def query_neighbors_batch(self, nodes: Iterable[str], depth: int = 1, predicates: Optional[Iterable[str]] = None,
+                              hop_predicates: Optional[Sequence[Optional[Iterable[str]]]] = None,
+                              direction: str = "out") -> Dict[str, Dict[str, int]]: ...
+
+    def get_relations(self, entity: str, direction: str = "out") -> Dict[str, int]: ...
+
+    def entity_set(self, nodes: Iterable[str]) -> Any: ...
+
+    def find_relation_paths(self, source: str, target: str, max_length: int = 3,
+                            predicates: Optional[Iterable[str]] = None, max_paths: Optional[int] = None,
+                            decode: bool = False) -> Any: ...
+
+    def match_triples(self, subject: Optional[str] = None, predicate: Optional[str] = None,
+                      obj: Optional[str] = None) -> List[Tuple[Any, Any, Any]]: ...
@@ -0,0 +1,197 @@
+"""rdflib-backed store answering every lookup with SPARQL.
+
+:class:`RDFLibStore` wraps an ``rdflib.Graph``: either an in-process graph
+or one whose store is a ``SPARQLStore`` pointed at an endpoint. All lookups
+are a fixed set of SPARQL templates with the varying terms supplied as
+``initBindings`` (never formatted into the query text), so each template is
+compiled once with ``prepareQuery`` and reused; ad-hoc queries go through the
+same cache keyed on their text. Results are streamed row by row.
+
+Remote ``SPARQLStore`` graphs cannot evaluate compiled queries, so they are
+sent the template text instead and the bindings become a ``VALUES`` block.
+
+Terms follow the loaders' conventions: IRIs are plain strings without angle
+brackets, blank nodes keep their ``_:label`` form and literals are returned
+as their lexical form.
+"""
+
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+import rdflib
+from rdflib.plugins.sparql import prepareQuery
+from rdflib.plugins.sparql.sparql import Query
+from rdflib.plugins.stores.sparqlstore import SPARQLStore
+
+from .literals import NumericColumn
+from .protocol import FANOUT_CAPS, SPARQL
+from .store import DEFAULT_TYPE_PREDICATES, _StepTraversal, check_direction
+
+NAMESPACES = {"rdf": rdflib.RDF, "rdfs": rdflib.RDFS, "xsd": rdflib.XSD, "owl": rdflib.OWL}
+
+# Strings with a URI scheme (or a prefix) are IRIs, everything else a literal
+_IRI = re.compile(r"^[A-Za-z][A-Za-z0-9+.-]*:\S*$")
+
+_QUERIES = {
+    "out": "SELECT ?p ?o WHERE { ?s ?p ?o }",
+    "in": "SELECT ?s ?p WHERE { ?s ?p ?o }",
+    "match": "SELECT ?s ?p ?o WHERE { ?s ?p ?o }",
+    "subjects": "SELECT DISTINCT ?s WHERE { ?s ?p ?o }",
+    "exists": "ASK { { ?n ?p ?o } UNION { ?s ?p ?n } }",
+    "relations": "SELECT ?p (COUNT(*) AS ?n) WHERE { ?s ?p ?o } GROUP BY ?p",
+    "degree": "SELECT (COUNT(*) AS ?n) WHERE { ?s ?p ?o }",
+}
+
+
+# rdflib's SPARQL parser keeps state in its grammar objects, so parses are serialized
+_PARSE_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=1024)
+def prepare(query: str) -> Query:
+    """Compile a SPARQL query once; later calls with the same text reuse the plan."""
+    with _PARSE_LOCK:
+        return prepareQuery(query, initNs=NAMESPACES)
+
+
+def to_term(value: Any) -> rdflib.term.Identifier:
+    """Convert a store-level value (string, number, rdflib term) to an rdflib term."""
+    if isinstance(value, rdflib.term.Identifier):
+        return value
+    if isinstance(value, str):
+        if value.startswith("_:"):
+            return rdflib.BNode(value[2:])
+        if _IRI.match(value):
+            return rdflib.URIRef(value)
+    return rdflib.Literal(value)
+
+
+def from_term(term: Optional[rdflib.term.Identifier]) -> Optional[str]:
+    """Convert an rdflib term back to the loaders' string form."""
+    if term is None:
+        return None
+    if isinstance(term, rdflib.BNode):
+        return f"_:{term}"
+    return str(term)
+
+
+class RDFLibStore(_StepTraversal):
+    """Store over an ``rdflib.Graph`` queried through prepared SPARQL templates.
+
+    Args:
+        graph: rdflib graph (in-process or SPARQLStore-backed); a new in-memory
+            graph when None
+        type_predicates: predicates treated as class membership
+    """
+
+    capabilities = frozenset({SPARQL, FANOUT_CAPS})
+
+    def __init__(self, graph: Optional[rdflib.Graph] = None, type_predicates: Iterable[str] = DEFAULT_TYPE_PREDICATES):
+        self.graph = graph if graph is not None else rdflib.Graph()
+        self.type_predicates = frozenset(type_predicates)
+        self.remote = isinstance(self.graph.store, SPARQLStore)
+        self._numeric_columns: Dict[Any, NumericColumn] = {}
+
+    def query(self, query: str, bindings: Optional[Mapping[str, Any]] = None):
+        """Run a SPARQL query with ``bindings`` (variable name -> value) substituted.
+
+        Returns:
+            rdflib Result; iterating it streams rows
+        """
+        init = {name: to_term(value) for name, value in (bindings or {}).items()}
+        if self.remote:
+            return self.graph.query(query, initNs=NAMESPACES, initBindings=init)
+        return self.graph.query(prepare(query), initBindings=init)
+
+    def select(self, query: str, bindings: Optional[Mapping[str, Any]] = None) -> Iterator[Tuple[Optional[str], ...]]:
+        """Lazily yield SELECT rows as tuples of strings (None for unbound)."""
+        for row in self.query(query, bindings):
+            yield tuple(from_term(term) for term in row)
+
+    def execute(self, query: str, bindings: Optional[Mapping[str, Any]] = None):
+        """Run a SELECT or ASK query: a lazy row iterator for SELECT, a bool for ASK."""
+        result = self.query(query, bindings)
+        if result.type == "ASK":
+            return bool(result.askAnswer)
+        return (tuple(from_term(term) for term in row) for row in result)
+
+    def _run(self, name: str, **bindings) -> Iterator[Tuple[Optional[str], ...]]:
+        return self.select(_QUERIES[name], bindings)
+
+    def add_triples(self, triples: Iterable[tuple]):
+        """Add (subject, predicate, object) triples to the graph."""
+        self._numeric_columns.clear()
+        graph = self.graph
+        graph.addN((to_term(s), to_term(p), to_term(o), graph) for s, p, o in triples)
+
+    def remove_triples(self, triples: Iterable[tuple]):
+        """Remove (subject, predicate, object) triples from the graph."""
+        self._numeric_columns.clear()
+        for s, p, o in triples:
+            self.graph.remove((to_term(s), to_term(p), to_term(o)))
+
+    def _has_node(self, n: Hashable) -> bool:
+        return bool(self.query(_QUERIES["exists"], {"n": n}).askAnswer)
+
+    def _degree(self, n: Hashable, direction: str) -> Optional[int]:
+        # counted by the SPARQL engine (or the endpoint) rather than row by row here
+        degree = 0
+        if direction != "in":
+            degree += int(next(self._run("degree", s=n))[0])
+        if direction != "out":
+            degree += int(next(self._run("degree", o=n))[0])
+        return degree
+
+    def _step(self, n: Hashable, allowed: Optional[frozenset], direction: str) -> Iterator[Any]:
+        """Yield the neighbors of ``n`` one hop away along allowed edges."""
+        if direction != "in":
+            yield from (o for p, o in self._run("out", s=n) if allowed is None or p in allowed)
+        if direction != "out":
+            yield from (s for s, p in self._run("in", o=n) if allowed is None or p in allowed)
+
+    def subjects(self) -> List[str]:
+        """Return the nodes that have at least one outgoing edge."""
+        return [s for (s,) in self._run("subjects")]
+
+    def entity_set(self, nodes: Iterable[Hashable]) -> frozenset:
+        """Return the nodes present in the graph as a frozenset."""
+        return frozenset(n for n in nodes if self._has_node(n))
+
+    def entities_of_type(self, type_: Hashable, candidates: Optional[frozenset] = None) -> frozenset:
+        """Return entities typed ``type_`` (optionally restricted to ``candidates``)."""
+        members = frozenset(s for p in self.type_predicates for s, _, _ in self._run("match", p=p, o=type_))
+        return members if candidates is None else members & candidates
+
+    def types_of(self, entity: Hashable) -> List[Any]:
+        """Return the types of ``entity``."""
+        return list(dict.fromkeys(o for p in self.type_predicates for _, _, o in self._run("match", s=entity, p=p)))
+
+    def relations_of(self, entity: Hashable, direction: str = "out") -> Dict[str, int]:
+        """Return {predicate: edge count} around ``entity``, counted by the SPARQL engine."""
+        check_direction(direction)
+        counts: Dict[str, int] = {}
+        if direction != "in":
+            for p, n in self._run("relations", s=entity):
+                counts[p] = counts.get(p, 0) + int(n)
+        if direction != "out":
+            for p, n in self._run("relations", o=entity):
+                counts[p] = counts.get(p, 0) + int(n)
+        return dict(sorted(counts.items()))
+
+    def numeric_column(self, predicate: Hashable) -> NumericColumn:
+        """Return the value-sorted literal column of ``predicate`` (built on first use)."""
+        column = self._numeric_columns.get(predicate)
+        if column is None:
+            pairs = [(s, o) for s, _, o in self._run("match", p=predicate)]
+            entities = np.empty(len(pairs), dtype=object)
+            entities[:] = [s for s, _ in pairs]
+            column = self._numeric_columns[predicate] = NumericColumn(entities, [o for _, o in pairs])
+        return column
+
+    def match(self, subject=None, predicate=None, obj=None) -> List[Tuple[str, str, str]]:
+        """Return triples matching a pattern; None acts as a wildcard."""
+        bindings = {name: value for name, value in (("s", subject), ("p", predicate), ("o", obj)) if value is not None}
+        return list(self._run("match", **bindings))
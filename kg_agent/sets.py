@@ -0,0 +1,177 @@
+"""Compact sets of interned entity IDs.
+
+An :class:`EntitySet` stores its members either as a sorted ``int32`` array
+(sparse sets) or as a packed bitmap over the ID universe (dense sets),
+whichever is smaller, and implements intersect / union / difference / count
+with vectorized NumPy operations for every combination of the two layouts.
+"""
+
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+from .store import ID_DTYPE
+
+# A bitmap costs universe / 8 bytes, a sorted array 4 bytes per member
+_DENSE_RATIO = 32
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+
+def _sorted_member_mask(needles: np.ndarray, haystack: np.ndarray) -> np.ndarray:
+    """Boolean mask of ``needles`` found in the sorted array ``haystack``."""
+    if not len(haystack) or not len(needles):
+        return np.zeros(len(needles), dtype=bool)
+    idx = np.searchsorted(haystack, needles)
+    idx[idx == len(haystack)] = len(haystack) - 1
+    return haystack[idx] == needles
+
+
+def _bitmap_member_mask(ids: np.ndarray, bitmap: np.ndarray) -> np.ndarray:
+    """Boolean mask of ``ids`` whose bit is set in a little-endian packed bitmap."""
+    inside = ids < len(bitmap) * 8
+    mask = np.zeros(len(ids), dtype=bool)
+    ids = ids[inside]
+    mask[inside] = (bitmap[ids >> 3] >> (ids & 7).astype(np.uint8)) & 1 == 1
+    return mask
+
+
+class EntitySet:
+    """Immutable set of entity IDs from one store's ID space.
+
+    Build instances with :meth:`from_ids` (or ``KGExecutor.entity_set``); the
+    layout is chosen from the density relative to ``universe`` (the number of
+    interned entities). Supports ``&``, ``|``, ``-``, ``len``, ``in`` and
+    iteration over sorted IDs.
+    """
+
+    __slots__ = ("universe", "_ids", "_bitmap")
+
+    def __init__(self, universe: int, ids: Optional[np.ndarray] = None, bitmap: Optional[np.ndarray] = None):
+        self.universe = universe
+        self._ids = ids
+        self._bitmap = bitmap
+
+    @classmethod
+    def from_ids(cls, ids: Iterable[int], universe: int, assume_unique_sorted: bool = False) -> "EntitySet":
+        """Build a set from entity IDs.
+
+        Args:
+            ids: entity IDs (array or iterable)
+            universe: number of entities in the ID space
+            assume_unique_sorted: skip sorting/deduplication when ``ids`` already is
+        """
+        arr = np.asarray(ids if isinstance(ids, np.ndarray) else list(ids), dtype=ID_DTYPE)
+        if not assume_unique_sorted:
+            arr = np.unique(arr)
+        return cls._normalized(universe, arr)
+
+    @classmethod
+    def empty(cls, universe: int = 0) -> "EntitySet":
+        return cls(universe, ids=np.zeros(0, dtype=ID_DTYPE))
+
+    @classmethod
+    def _normalized(cls, universe: int, ids: np.ndarray) -> "EntitySet":
+        if len(ids) * _DENSE_RATIO >= universe and universe > 0:
+            mask = np.zeros(universe, dtype=bool)
+            mask[ids] = True
+            return cls(universe, bitmap=np.packbits(mask, bitorder="little"))
+        return cls(universe, ids=ids)
+
+    @classmethod
+    def _from_bitmap(cls, universe: int, bitmap: np.ndarray) -> "EntitySet":
+        result = cls(universe, bitmap=bitmap)
+        if result.count() * _DENSE_RATIO < universe:
+            return cls(universe, ids=result.ids)
+        return result
+
+    @property
+    def is_dense(self) -> bool:
+        """True when stored as a bitmap."""
+        return self._bitmap is not None
+
+    @property
+    def ids(self) -> np.ndarray:
+        """Members as a sorted int32 array."""
+        if self._ids is None:
+            bits = np.unpackbits(self._bitmap, bitorder="little")
+            self._ids = np.flatnonzero(bits).astype(ID_DTYPE)
+        return self._ids
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self._ids, self._bitmap) if a is not None)
+
+    def count(self) -> int:
+        """Number of members."""
+        if self._ids is not None:
+            return len(self._ids)
+        return int(_POPCOUNT[self._bitmap].sum())
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.ids.tolist())
+
+    def __contains__(self, entity_id: int) -> bool:
+        return bool(self.contains_ids(np.array([entity_id], dtype=ID_DTYPE))[0])
+
+    def contains_ids(self, ids: np.ndarray) -> np.ndarray:
+        """Vectorized membership test: boolean mask of ``ids`` that are in the set."""
+        if self._bitmap is not None:
+            return _bitmap_member_mask(ids, self._bitmap)
+        return _sorted_member_mask(ids, self._ids)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, EntitySet):
+            return NotImplemented
+        return np.array_equal(self.ids, other.ids)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        layout = "bitmap" if self.is_dense else "array"
+        return f"EntitySet({self.count()} of {self.universe}, {layout})"
+
+    def _bitmap_of(self, universe: int) -> np.ndarray:
+        """Packed bitmap of this set padded to ``universe`` bits."""
+        nbytes = (universe + 7) // 8
+        if self._bitmap is not None:
+            return np.pad(self._bitmap, (0, nbytes - len(self._bitmap)))
+        mask = np.zeros(nbytes * 8, dtype=bool)
+        mask[self._ids] = True
+        return np.packbits(mask, bitorder="little")
+
+    def intersect(self, other: "EntitySet") -> "EntitySet":
+        universe = max(self.universe, other.universe)
+        a, b = self, other
+        if a.is_dense and b.is_dense:
+            n = min(len(a._bitmap), len(b._bitmap))
+            return EntitySet._from_bitmap(universe, a._bitmap[:n] & b._bitmap[:n])
+        if a.is_dense:
+            a, b = b, a
+        # a is sparse: keep those of its members found in b
+        if b.is_dense:
+            return EntitySet(universe, ids=a._ids[_bitmap_member_mask(a._ids, b._bitmap)])
+        small, large = sorted((a._ids, b._ids), key=len)
+        return EntitySet(universe, ids=small[_sorted_member_mask(small, large)])
+
+    def union(self, other: "EntitySet") -> "EntitySet":
+        universe = max(self.universe, other.universe)
+        if self.is_dense or other.is_dense:
+            return EntitySet._from_bitmap(universe, self._bitmap_of(universe) | other._bitmap_of(universe))
+        return EntitySet._normalized(universe, np.union1d(self._ids, other._ids).astype(ID_DTYPE))
+
+    def difference(self, other: "EntitySet") -> "EntitySet":
+        universe = max(self.universe, other.universe)
+        if self.is_dense:
+            return EntitySet._from_bitmap(universe, self._bitmap_of(universe) & ~other._bitmap_of(universe))
+        if other.is_dense:
+            keep = ~_bitmap_member_mask(self._ids, other._bitmap)
+        else:
+            keep = ~_sorted_member_mask(self._ids, other._ids)
+        return EntitySet(universe, ids=self._ids[keep])
+
+    __and__ = intersect
+    __or__ = union
+    __sub__ = difference
@@ -0,0 +1,152 @@
+"""Compact graphs in ``multiprocessing.shared_memory`` for multi-process workers.
+
+One process publishes a compact store with :func:`share_store`: every index
+array, the derived type and relation indexes and both term dictionaries
+(in the :func:`kg_agent.store.encode_terms` layout) are copied once into a
+single shared-memory segment. Workers call :func:`attach_store` with the
+small picklable :class:`SharedGraphSpec` and get a
+:class:`kg_agent.store.CompactGraphStore` whose arrays are read-only NumPy
+views of the segment, so N workers cost about one graph's worth of RAM.
+
+Workers may still load triples: the store merges them into private arrays
+and the dictionaries intern new terms into their in-memory overflow, so the
+shared segment is never written after publishing.
+"""
+
+from dataclasses import dataclass, field
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from .store import CompactGraphStore, MappedTermDictionary, encode_terms
+
+# Array starts are aligned so every view is suitably aligned for its dtype
+_ALIGN = 64
+
+
+@dataclass(frozen=True)
+class SharedGraphSpec:
+    """Picklable description of a published graph, passed to workers.
+
+    Attributes:
+        segment: shared-memory segment name
+        layout: array name -> (byte offset, dtype string, length)
+        type_predicates: type predicates the type index was built with
+    """
+
+    segment: str
+    layout: Dict[str, Tuple[int, str, int]]
+    type_predicates: Tuple[str, ...] = field(default_factory=tuple)
+
+
+class SharedGraph:
+    """Owner handle of a published segment; unlink it when workers are done.
+
+    Usable as a context manager that closes and unlinks on exit.
+    """
+
+    def __init__(self, segment: shared_memory.SharedMemory, spec: SharedGraphSpec):
+        self.segment = segment
+        self.spec = spec
+
+    @property
+    def nbytes(self) -> int:
+        return self.segment.size
+
+    def close(self):
+        """Release this process's mapping (workers keep theirs)."""
+        self.segment.close()
+
+    def unlink(self):
+        """Destroy the segment once every process has detached."""
+        self.segment.unlink()
+
+    def __enter__(self) -> "SharedGraph":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        self.unlink()
+
+
+def _store_arrays(store: CompactGraphStore) -> Dict[str, np.ndarray]:
+    # the derived indexes must describe the same (tombstone-free) arrays
+    store = store.compacted()
+    arrays = dict(store.index_arrays())
+    for i, arr in enumerate(store.type_index()):
+        arrays[f"type_index.{i}"] = arr
+    for i, arr in enumerate(store.relation_index()):
+        arrays[f"relation_index.{i}"] = arr
+    for name in ("entities", "predicates"):
+        blob, offsets, sorted_ids = encode_terms(getattr(store, name))
+        arrays[f"{name}.blob"] = np.frombuffer(blob, dtype=np.uint8)
+        arrays[f"{name}.offsets"] = offsets
+        arrays[f"{name}.sorted"] = sorted_ids
+    return arrays
+
+
+def share_store(store: CompactGraphStore, name: Optional[str] = None) -> SharedGraph:
+    """Copy a compact store into one new shared-memory segment.
+
+    Args:
+        store: store to publish (flushed first)
+        name: optional segment name; a random one when None
+
+    Returns:
+        SharedGraph owning the segment; pass ``.spec`` to workers
+    """
+    arrays = _store_arrays(store)
+    layout: Dict[str, Tuple[int, str, int]] = {}
+    size = 0
+    for key, arr in arrays.items():
+        size = -(-size // _ALIGN) * _ALIGN
+        layout[key] = (size, arr.dtype.str, len(arr))
+        size += arr.nbytes
+    segment = shared_memory.SharedMemory(name=name, create=True, size=max(size, 1))
+    for key, arr in arrays.items():
+        offset, dtype, length = layout[key]
+        np.ndarray(length, dtype=dtype, buffer=segment.buf, offset=offset)[:] = arr
+    spec = SharedGraphSpec(segment.name, layout, tuple(sorted(store.type_predicates)))
+    return SharedGraph(segment, spec)
+
+
+def _attach_segment(name: str) -> shared_memory.SharedMemory:
+    """Map an existing segment without registering it with the resource tracker.
+
+    Only the publisher owns the segment; a tracker registration would make
+    an unrelated worker's tracker unlink it when that worker exits.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no ``track`` flag
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+def attach_store(spec: SharedGraphSpec) -> CompactGraphStore:
+    """Open a published graph zero-copy as a read-only compact store.
+
+    The segment stays mapped while the returned store is alive.
+    """
+    segment = _attach_segment(spec.segment)
+    views = {}
+    for key, (offset, dtype, length) in spec.layout.items():
+        view = np.ndarray(length, dtype=dtype, buffer=segment.buf, offset=offset)
+        view.flags.writeable = False
+        views[key] = view
+
+    def dictionary(name: str) -> MappedTermDictionary:
+        return MappedTermDictionary(views[f"{name}.blob"], views[f"{name}.offsets"], views[f"{name}.sorted"])
+
+    store = CompactGraphStore.from_arrays(dictionary("entities"), dictionary("predicates"), views)
+    store.type_predicates = frozenset(spec.type_predicates)
+    store._type_index = tuple(views[f"type_index.{i}"] for i in range(4))
+    store._relation_index = tuple(views[f"relation_index.{i}"] for i in range(6))
+    store._shared_segment = segment
+    return store
@@ -0,0 +1,114 @@
+"""On-disk graph snapshots opened with memory mapping.
+
+A snapshot directory holds a compact store in a versioned binary layout:
+
+- ``manifest.json``: format name, layout version and counts
+- ``<array>.npy``: one file per index array (see ``CompactGraphStore.ARRAYS``)
+- ``entities.blob`` / ``entities.offsets.npy`` / ``entities.sorted.npy`` and
+  the same for ``predicates``: the interned dictionaries (see
+  :class:`kg_agent.store.MappedTermDictionary`)
+
+Opening maps every file read-only (``numpy.load(mmap_mode="r")`` /
+``numpy.memmap``), so startup does not depend on graph size and processes
+opening the same snapshot share pages through the OS page cache.
+"""
+
+import json
+import os
+from typing import Dict
+
+import numpy as np
+
+from .store import CompactGraphStore, MappedTermDictionary, TermDictionary, encode_terms
+
+SNAPSHOT_FORMAT = "kg-agent-snapshot"
+SNAPSHOT_VERSION = 2
+MANIFEST = "manifest.json"
+
+
+def _save_dictionary(directory: str, name: str, dictionary: TermDictionary):
+    blob, offsets, sorted_ids = encode_terms(dictionary)
+    with open(os.path.join(directory, f"{name}.blob"), "wb") as f:
+        f.write(blob)
+    np.save(os.path.join(directory, f"{name}.offsets.npy"), offsets)
+    np.save(os.path.join(directory, f"{name}.sorted.npy"), sorted_ids)
+
+
+def _open_dictionary(directory: str, name: str) -> MappedTermDictionary:
+    blob_path = os.path.join(directory, f"{name}.blob")
+    # numpy.memmap cannot map an empty file
+    if os.path.getsize(blob_path):
+        blob = np.memmap(blob_path, dtype=np.uint8, mode="r")
+    else:
+        blob = np.zeros(0, dtype=np.uint8)
+    offsets = np.load(os.path.join(directory, f"{name}.offsets.npy"), mmap_mode="r")
+    sorted_ids = np.load(os.path.join(directory, f"{name}.sorted.npy"), mmap_mode="r")
+    return MappedTermDictionary(blob, offsets, sorted_ids)
+
+
+def save_snapshot(store: CompactGraphStore, directory: str):
+    """Write ``store`` to ``directory`` in the snapshot layout.
+
+    The manifest is written last, so a directory without one is an incomplete
+    snapshot.
+
+    Args:
+        store: compact store to persist
+        directory: target directory (created if missing)
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, MANIFEST)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    arrays = store.index_arrays()
+    for name, arr in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(arr))
+    _save_dictionary(directory, "entities", store.entities)
+    _save_dictionary(directory, "predicates", store.predicates)
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "num_entities": len(store.entities),
+        "num_predicates": len(store.predicates),
+        "num_edges": int(len(arrays["targets"])),
+        "arrays": {name: {"dtype": str(arr.dtype), "length": int(len(arr))} for name, arr in arrays.items()},
+    }
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def read_manifest(directory: str) -> Dict:
+    """Read and validate a snapshot manifest.
+
+    Raises:
+        FileNotFoundError: if the directory has no manifest
+        ValueError: if the format or layout version is not supported
+    """
+    with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"{directory} is not a KG-Agent snapshot")
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {manifest.get('version')} (expected {SNAPSHOT_VERSION})")
+    return manifest
+
+
+def open_snapshot(directory: str) -> CompactGraphStore:
+    """Open a snapshot as a compact store backed by memory-mapped arrays.
+
+    Nothing is copied: the store reads straight from the mapped files. New
+    triples loaded afterwards are merged into in-memory arrays as usual.
+
+    Args:
+        directory: snapshot directory written by :func:`save_snapshot`
+    """
+    read_manifest(directory)
+    arrays = {
+        name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+        for name in CompactGraphStore.ARRAYS
+    }
+    return CompactGraphStore.from_arrays(
+        _open_dictionary(directory, "entities"),
+        _open_dictionary(directory, "predicates"),
+        arrays,
+    )
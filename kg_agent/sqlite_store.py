@@ -0,0 +1,412 @@
+"""Disk-resident triple store on stdlib ``sqlite3``.
+
+:class:`SQLiteStore` keeps dictionary-encoded triples in one SQLite file so
+graphs larger than RAM can be queried with constant memory:
+
+- ``entities`` / ``predicates`` map terms to integer IDs
+- ``triples(s, p, o)`` is a ``WITHOUT ROWID`` table whose primary key is the
+  SPO index; secondary indexes on (p, o, s) and (o, s, p) cover the POS and
+  OSP access paths, so every pattern is answered from an index alone
+- ``degrees(id, out_degree, in_degree)`` is kept current by triggers on
+  ``triples``, so fan-out caps read a node's degree with one key lookup
+- the database runs in WAL mode: one writer (serialized by a lock) and a pool
+  of read-only connections that agents on other threads borrow concurrently
+- loads go through a staging table filled with ``executemany`` and merged
+  into the dictionaries and triples with set-based SQL, one transaction per
+  chunk
+- multi-hop traversals are single recursive CTEs evaluated inside SQLite
+
+Results use node names and frozensets, like :class:`kg_agent.store.NetworkXStore`.
+"""
+
+import copy
+import json
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from itertools import islice
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .literals import NumericColumn
+from .protocol import BATCH_NEIGHBORS, CONCURRENT_READS, FANOUT_CAPS, PERSISTENT, FanoutCap, HopFilters
+from .store import DEFAULT_TYPE_PREDICATES, _StepTraversal, check_direction
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (id INTEGER PRIMARY KEY, term TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS predicates (id INTEGER PRIMARY KEY, term TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS triples (
+    s INTEGER NOT NULL, p INTEGER NOT NULL, o INTEGER NOT NULL,
+    PRIMARY KEY (s, p, o)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS triples_pos ON triples (p, o, s);
+CREATE INDEX IF NOT EXISTS triples_osp ON triples (o, s, p);
+CREATE TABLE IF NOT EXISTS degrees (
+    id INTEGER PRIMARY KEY, out_degree INTEGER NOT NULL DEFAULT 0, in_degree INTEGER NOT NULL DEFAULT 0
+);
+CREATE TRIGGER IF NOT EXISTS triples_added AFTER INSERT ON triples BEGIN
+    INSERT INTO degrees (id, out_degree) VALUES (NEW.s, 1)
+        ON CONFLICT (id) DO UPDATE SET out_degree = out_degree + 1;
+    INSERT INTO degrees (id, in_degree) VALUES (NEW.o, 1)
+        ON CONFLICT (id) DO UPDATE SET in_degree = in_degree + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS triples_removed AFTER DELETE ON triples BEGIN
+    UPDATE degrees SET out_degree = out_degree - 1 WHERE id = OLD.s;
+    UPDATE degrees SET in_degree = in_degree - 1 WHERE id = OLD.o;
+END;
+"""
+
+# Fills the degree table of a database created before it existed
+_COUNT_DEGREES = """
+INSERT INTO degrees (id, out_degree, in_degree)
+    SELECT id, SUM(out_degree), SUM(in_degree) FROM (
+        SELECT s AS id, COUNT(*) AS out_degree, 0 AS in_degree FROM triples GROUP BY s
+        UNION ALL SELECT o, 0, COUNT(*) FROM triples GROUP BY o
+    ) GROUP BY id
+"""
+
+_MERGE_STAGING = (
+    "INSERT OR IGNORE INTO entities (term) SELECT s FROM staging UNION SELECT o FROM staging",
+    "INSERT OR IGNORE INTO predicates (term) SELECT DISTINCT p FROM staging",
+    """INSERT OR IGNORE INTO triples (s, p, o)
+       SELECT es.id, ps.id, eo.id FROM staging
+       JOIN entities es ON es.term = staging.s
+       JOIN predicates ps ON ps.term = staging.p
+       JOIN entities eo ON eo.term = staging.o""",
+    "DELETE FROM staging",
+)
+
+_DELETE = """DELETE FROM triples
+    WHERE s = (SELECT id FROM entities WHERE term = ?)
+    AND p = (SELECT id FROM predicates WHERE term = ?)
+    AND o = (SELECT id FROM entities WHERE term = ?)"""
+
+# One recursive step per direction: (join condition, next node column)
+_STEPS = {"out": ("t.s = walk.n", "t.o"), "in": ("t.o = walk.n", "t.s")}
+
+# Keeps an edge if no filter is set for this hop or its predicate is listed.
+# :filters is a JSON array with one entry (array of predicate IDs or null) per hop.
+_HOP_FILTER = """
+    AND (:filters IS NULL
+         OR json_type(:filters, '$[' || walk.d || ']') = 'null'
+         OR t.p IN (SELECT value FROM json_each(:filters, '$[' || walk.d || ']')))"""
+
+
+def _walk_sql(direction: str, seed: str, columns: str, final: str) -> str:
+    """Build a depth-bounded recursive CTE over ``triples``.
+
+    Args:
+        direction: "out", "in" or "both"
+        seed: SELECT producing the start rows (``columns`` without ``n, d``, then n, 0)
+        columns: carried columns before ``n, d`` (e.g. ``"src, "``) or ""
+        final: statement run against ``walk``
+    """
+    steps = [_STEPS[direction]] if direction != "both" else [_STEPS["out"], _STEPS["in"]]
+    carried = "".join(f"walk.{c.strip()}, " for c in columns.split(",") if c.strip())
+    recursive = " UNION ".join(
+        f"SELECT {carried}{target}, walk.d + 1 FROM walk JOIN triples t ON {join} "
+        f"WHERE walk.d < :depth{_HOP_FILTER}"
+        for join, target in steps
+    )
+    return f"WITH RECURSIVE walk({columns}n, d) AS ({seed} UNION {recursive}) {final}"
+
+
+class SQLiteStore(_StepTraversal):
+    """Triple store persisted in a SQLite database file.
+
+    Args:
+        path: database file; a temporary file (removed by :meth:`close`) when None
+        type_predicates: predicates treated as class membership
+        readers: maximum number of pooled read connections
+        chunk_size: triples per load transaction
+    """
+
+    capabilities = frozenset({BATCH_NEIGHBORS, PERSISTENT, FANOUT_CAPS, CONCURRENT_READS})
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        type_predicates: Iterable[str] = DEFAULT_TYPE_PREDICATES,
+        readers: int = 4,
+        chunk_size: int = 100_000,
+    ):
+        self._temporary = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(suffix=".sqlite")
+            os.close(fd)
+        self.path = path
+        self.type_predicates = frozenset(type_predicates)
+        self.chunk_size = chunk_size
+        self._numeric_columns: Dict[Any, NumericColumn] = {}
+        self._write_lock = threading.Lock()
+        self._writer = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.execute("PRAGMA synchronous=NORMAL")
+        counted = self._writer.execute("SELECT 1 FROM sqlite_master WHERE name = 'degrees'").fetchone()
+        self._writer.executescript("BEGIN;" + _SCHEMA + ("" if counted else _COUNT_DEGREES + ";") + "COMMIT;")
+        self._writer.execute("CREATE TEMP TABLE IF NOT EXISTS staging (s TEXT, p TEXT, o TEXT)")
+        self._readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._reader_slots = threading.BoundedSemaphore(readers)
+        self._all_readers: List[sqlite3.Connection] = []
+        # connection of a snapshot (see :meth:`snapshot`); None reads through the pool
+        self._pinned: Optional[sqlite3.Connection] = None
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a read-only pooled connection (blocks while all are in use)."""
+        if self._pinned is not None:
+            yield self._pinned
+            return
+        self._reader_slots.acquire()
+        try:
+            try:
+                conn = self._readers.get_nowait()
+            except queue.Empty:
+                conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+                self._all_readers.append(conn)
+            try:
+                yield conn
+            finally:
+                self._readers.put(conn)
+        finally:
+            self._reader_slots.release()
+
+    @contextmanager
+    def snapshot(self) -> Iterator["SQLiteStore"]:
+        """Keep the current state for a block of reads while writes continue.
+
+        Yields a copy of this store whose reads all run in one read
+        transaction on one pooled connection; in WAL mode the transaction
+        keeps seeing the database as of its first read and does not block
+        the writer. The copy reads through the pool again after the block.
+        """
+        with self.reader() as conn:
+            conn.execute("BEGIN")
+            try:
+                # the transaction takes its snapshot at the first read
+                conn.execute("SELECT 1 FROM triples LIMIT 1").fetchall()
+                view = copy.copy(self)
+                view._pinned = conn
+                view._numeric_columns = {}
+                try:
+                    yield view
+                finally:
+                    view._pinned = None
+            finally:
+                conn.execute("COMMIT")
+
+    def _query(self, sql: str, params=()) -> List[tuple]:
+        with self.reader() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def close(self):
+        """Close every connection (and delete the database if it was temporary)."""
+        for conn in self._all_readers:
+            conn.close()
+        self._all_readers.clear()
+        self._writer.close()
+        if self._temporary:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(self.path + suffix):
+                    os.remove(self.path + suffix)
+
+    def add_triples(self, triples: Iterable[tuple]):
+        """Insert (subject, predicate, object) triples in bulk, one transaction per chunk."""
+        it = ((str(s), str(p), str(o)) for s, p, o in triples)
+        with self._write_lock:
+            self._numeric_columns.clear()
+            while True:
+                chunk = list(islice(it, self.chunk_size))
+                if not chunk:
+                    return
+                conn = self._writer
+                conn.execute("BEGIN")
+                try:
+                    conn.executemany("INSERT INTO staging (s, p, o) VALUES (?, ?, ?)", chunk)
+                    for statement in _MERGE_STAGING:
+                        conn.execute(statement)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+
+    def remove_triples(self, triples: Iterable[tuple]):
+        """Delete (subject, predicate, object) triples, one transaction per chunk.
+
+        Dictionary rows are kept; :meth:`compact` returns freed pages to the OS.
+        """
+        it = ((str(s), str(p), str(o)) for s, p, o in triples)
+        with self._write_lock:
+            self._numeric_columns.clear()
+            while True:
+                chunk = list(islice(it, self.chunk_size))
+                if not chunk:
+                    return
+                conn = self._writer
+                conn.execute("BEGIN")
+                try:
+                    conn.executemany(_DELETE, chunk)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+
+    def compact(self):
+        """Rebuild the database file without the pages freed by deletions."""
+        with self._write_lock:
+            self._writer.execute("VACUUM")
+
+    def _predicate_ids(self, predicates: Iterable[Hashable]) -> List[int]:
+        names = json.dumps([str(p) for p in predicates])
+        return [i for (i,) in self._query("SELECT id FROM predicates WHERE term IN (SELECT value FROM json_each(?))", (names,))]
+
+    def _filters_param(self, hop_filters: HopFilters) -> Optional[str]:
+        if not hop_filters:
+            return None
+        return json.dumps([None if f is None else self._predicate_ids(f) for f in hop_filters])
+
+    def _has_node(self, n: Hashable) -> bool:
+        rows = self._query(
+            """SELECT 1 FROM entities e WHERE e.term = ?
+               AND (EXISTS (SELECT 1 FROM triples WHERE s = e.id) OR EXISTS (SELECT 1 FROM triples WHERE o = e.id))""",
+            (str(n),),
+        )
+        return bool(rows)
+
+    def _step(self, n: Hashable, allowed: Optional[frozenset], direction: str) -> Iterator[Any]:
+        """Yield the neighbors of ``n`` one hop away along allowed edges."""
+        return iter(self.neighbors(n, 1, [allowed], direction))
+
+    def _degree(self, n: Hashable, direction: str) -> Optional[int]:
+        rows = self._query(
+            "SELECT out_degree, in_degree FROM degrees WHERE id = (SELECT id FROM entities WHERE term = ?)", (str(n),)
+        )
+        if not rows:
+            return 0
+        out_degree, in_degree = rows[0]
+        return out_degree * (direction != "in") + in_degree * (direction != "out")
+
+    def neighbors(self, node: Hashable, depth: int = 1, hop_filters: HopFilters = None, direction: str = "out",
+                  fanout: Optional[FanoutCap] = None) -> List[str]:
+        """Return nodes reachable from ``node`` in 1..depth hops with one recursive CTE.
+
+        With a ``fanout`` cap the walk steps hop by hop instead, so every
+        capped node can pick the edges it follows.
+
+        Raises:
+            KeyError: if ``node`` is not in the graph
+        """
+        check_direction(direction)
+        if not self._has_node(node):
+            raise KeyError(f"Node {node} not in graph")
+        if fanout is not None:
+            return super().neighbors(str(node), depth, hop_filters, direction, fanout)
+        sql = _walk_sql(
+            direction,
+            "SELECT id, 0 FROM entities WHERE term = :node",
+            "",
+            "SELECT e.term FROM entities e WHERE e.id IN (SELECT n FROM walk WHERE d > 0)",
+        )
+        params = {"node": str(node), "depth": depth, "filters": self._filters_param(hop_filters)}
+        return [term for (term,) in self._query(sql, params)]
+
+    def neighbors_batch(
+        self, nodes: Iterable[Hashable], depth: int = 1, hop_filters: HopFilters = None, direction: str = "out"
+    ) -> Dict[Any, Dict[Any, int]]:
+        """Run one multi-source BFS from ``nodes`` as a single recursive CTE.
+
+        Returns:
+            reached node -> {source: hop distance}
+        """
+        check_direction(direction)
+        sources = [str(n) for n in dict.fromkeys(nodes)]
+        for node in sources:
+            if not self._has_node(node):
+                raise KeyError(f"Node {node} not in graph")
+        sql = _walk_sql(
+            direction,
+            "SELECT id, id, 0 FROM entities WHERE term IN (SELECT value FROM json_each(:sources))",
+            "src, ",
+            """SELECT en.term, es.term, MIN(walk.d) FROM walk
+               JOIN entities en ON en.id = walk.n JOIN entities es ON es.id = walk.src
+               WHERE walk.d > 0 GROUP BY walk.n, walk.src""",
+        )
+        params = {"sources": json.dumps(sources), "depth": depth, "filters": self._filters_param(hop_filters)}
+        reached: Dict[Any, Dict[Any, int]] = {}
+        for node, source, distance in self._query(sql, params):
+            reached.setdefault(node, {})[source] = distance
+        return reached
+
+    def subjects(self) -> List[str]:
+        """Return the nodes that have at least one outgoing edge."""
+        return [t for (t,) in self._query("SELECT e.term FROM entities e WHERE e.id IN (SELECT DISTINCT s FROM triples)")]
+
+    def entity_set(self, nodes: Iterable[Hashable]) -> frozenset:
+        """Return the nodes present in the graph as a frozenset."""
+        return frozenset(n for n in nodes if self._has_node(n))
+
+    def entities_of_type(self, type_: Hashable, candidates: Optional[frozenset] = None) -> frozenset:
+        """Return entities typed ``type_`` (optionally restricted to ``candidates``)."""
+        rows = self._query(
+            """SELECT DISTINCT es.term FROM triples t
+               JOIN entities es ON es.id = t.s
+               WHERE t.o = (SELECT id FROM entities WHERE term = ?)
+               AND t.p IN (SELECT id FROM predicates WHERE term IN (SELECT value FROM json_each(?)))""",
+            (str(type_), json.dumps(sorted(self.type_predicates))),
+        )
+        members = frozenset(t for (t,) in rows)
+        return members if candidates is None else members & candidates
+
+    def types_of(self, entity: Hashable) -> List[str]:
+        """Return the types of ``entity``."""
+        rows = self._query(
+            """SELECT DISTINCT eo.term FROM triples t
+               JOIN entities eo ON eo.id = t.o
+               WHERE t.s = (SELECT id FROM entities WHERE term = ?)
+               AND t.p IN (SELECT id FROM predicates WHERE term IN (SELECT value FROM json_each(?)))""",
+            (str(entity), json.dumps(sorted(self.type_predicates))),
+        )
+        return [t for (t,) in rows]
+
+    def relations_of(self, entity: Hashable, direction: str = "out") -> Dict[str, int]:
+        """Return {predicate: edge count} around ``entity``, counted from the SPO/OSP indexes."""
+        check_direction(direction)
+        counts: Dict[str, int] = {}
+        for column in [c for c, d in (("s", "out"), ("o", "in")) if direction in (d, "both")]:
+            rows = self._query(
+                f"""SELECT pr.term, COUNT(*) FROM triples t JOIN predicates pr ON pr.id = t.p
+                    WHERE t.{column} = (SELECT id FROM entities WHERE term = ?) GROUP BY t.p""",
+                (str(entity),),
+            )
+            for p, n in rows:
+                counts[p] = counts.get(p, 0) + n
+        return dict(sorted(counts.items()))
+
+    def numeric_column(self, predicate: Hashable) -> NumericColumn:
+        """Return the value-sorted literal column of ``predicate`` (built on first use)."""
+        column = self._numeric_columns.get(predicate)
+        if column is None:
+            pairs = self.match(predicate=predicate)
+            entities = np.empty(len(pairs), dtype=object)
+            entities[:] = [s for s, _, _ in pairs]
+            column = self._numeric_columns[predicate] = NumericColumn(entities, [o for _, _, o in pairs])
+        return column
+
+    def match(self, subject=None, predicate=None, obj=None) -> List[Tuple[str, str, str]]:
+        """Return triples matching a pattern; None acts as a wildcard."""
+        clauses, params = [], []
+        for column, table, value in (("s", "entities", subject), ("p", "predicates", predicate), ("o", "entities", obj)):
+            if value is not None:
+                clauses.append(f"t.{column} = (SELECT id FROM {table} WHERE term = ?)")
+                params.append(str(value))
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        return self._query(
+            f"""SELECT es.term, pr.term, eo.term FROM triples t
+                JOIN entities es ON es.id = t.s JOIN predicates pr ON pr.id = t.p JOIN entities eo ON eo.id = t.o
+                {where}""",
+            params,
+        )
@@ -0,0 +1,2143 @@
+"""Graph storage engines used by :class:`kg_agent.core.KGExecutor`.
+
+Two stores are provided:
+- NetworkXStore: the original networkx-backed store, convenient for small graphs
+- CompactGraphStore: interned integer IDs with CSR adjacency arrays, meant for
+  large (tens of millions of triples) graphs
+
+Both expose the same small surface (``add_triples`` / ``neighbors`` /
+``match``) so the executor can switch between them with a constructor option.
+"""
+
+import random
+import threading
+from array import array
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple
+
+import networkx as nx
+import numpy as np
+
+from .literals import NumericColumn
+from .protocol import (
+    BATCH_NEIGHBORS, FANOUT_CAPS, ID_SETS, RELATION_INDEX, RELATION_PATHS, SNAPSHOTS, FanoutCap, HopFilters, NeighborList,
+)
+
+# Interned entity/predicate IDs fit in 32 bits; offsets may exceed that.
+ID_DTYPE = np.int32
+OFFSET_DTYPE = np.int64
+
+# Edge directions accepted by traversals
+DIRECTIONS = ("out", "in", "both")
+
+# Predicates treated as class membership (rdf:type) by the type index
+DEFAULT_TYPE_PREDICATES = ("rdf:type", "http://www.w3.org/1999/02/22-rdf-syntax-ns#type")
+
+def check_direction(direction: str):
+    """Raise ValueError unless ``direction`` is one of ``DIRECTIONS``."""
+    if direction not in DIRECTIONS:
+        raise ValueError(f"Unknown direction {direction}; expected one of {DIRECTIONS}")
+
+
+def hop_scoped(hop_filters) -> bool:
+    """Return True if the per-hop filters differ, so traversals dedupe per hop.
+
+    A node reached on hop ``k`` is expanded on hop ``k + 1`` even if an
+    earlier hop already reached it: under another filter it may lead to nodes
+    the earlier visit could not. With the same filter on every hop a global
+    visited set gives the same result and is cheaper.
+
+    Args:
+        hop_filters: per-hop predicate sets or ID arrays (None entries allow all), or None
+    """
+    if not hop_filters:
+        return False
+    first = hop_filters[0]
+    for allowed in hop_filters[1:]:
+        if allowed is None or first is None:
+            if allowed is not first:
+                return True
+        elif not (np.array_equal(allowed, first) if isinstance(first, np.ndarray) else allowed == first):
+            return True
+    return False
+
+
+class TermDictionary:
+    """Bidirectional mapping between terms (strings) and dense integer IDs.
+
+    IDs are assigned in insertion order starting from 0, so they can be used
+    directly as indexes into adjacency arrays.
+    """
+
+    def __init__(self):
+        self._terms: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def __contains__(self, term: Hashable) -> bool:
+        return str(term) in self._ids
+
+    def intern(self, term: Hashable) -> int:
+        """Return the ID of ``term``, assigning a new one if needed.
+
+        Args:
+            term: term to intern (converted to ``str``)
+
+        Returns:
+            Integer ID of the term
+        """
+        key = str(term)
+        term_id = self._ids.get(key)
+        if term_id is None:
+            term_id = len(self._terms)
+            # append first so a concurrent lookup never sees an undecodable ID
+            self._terms.append(key)
+            self._ids[key] = term_id
+        return term_id
+
+    def lookup(self, term: Hashable) -> Optional[int]:
+        """Return the ID of ``term`` or None if it was never interned."""
+        return self._ids.get(str(term))
+
+    def term(self, term_id: int) -> str:
+        """Return the term for an integer ID."""
+        return self._terms[term_id]
+
+    def terms(self, term_ids: Iterable[int]) -> List[str]:
+        """Decode a sequence of IDs into terms."""
+        terms = self._terms
+        return [terms[i] for i in term_ids]
+
+
+class MappedTermDictionary(TermDictionary):
+    """Term dictionary backed by read-only buffers (e.g. a memory-mapped snapshot).
+
+    The base terms live in three buffers that are never copied:
+
+    - ``blob``: UTF-8 bytes of all terms concatenated in ID order
+    - ``offsets``: ``blob[offsets[i]:offsets[i + 1]]`` is term ``i``
+    - ``sorted_ids``: term IDs ordered by their UTF-8 bytes, for binary search
+
+    Terms interned after opening go to an in-memory overflow with IDs
+    continuing after the base, so the dictionary stays writable.
+    """
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray, sorted_ids: np.ndarray):
+        super().__init__()
+        self._blob = blob
+        self._offsets = offsets
+        self._sorted_ids = sorted_ids
+        self._base_size = len(offsets) - 1
+
+    def __len__(self) -> int:
+        return self._base_size + len(self._terms)
+
+    def __contains__(self, term: Hashable) -> bool:
+        return self.lookup(term) is not None
+
+    def _base_bytes(self, term_id: int) -> bytes:
+        return self._blob[self._offsets[term_id]:self._offsets[term_id + 1]].tobytes()
+
+    def _base_lookup(self, key: bytes) -> Optional[int]:
+        sorted_ids = self._sorted_ids
+        lo, hi = 0, len(sorted_ids)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._base_bytes(int(sorted_ids[mid])) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(sorted_ids) and self._base_bytes(int(sorted_ids[lo])) == key:
+            return int(sorted_ids[lo])
+        return None
+
+    def intern(self, term: Hashable) -> int:
+        term_id = self.lookup(term)
+        if term_id is None:
+            key = str(term)
+            term_id = len(self)
+            self._terms.append(key)
+            self._ids[key] = term_id
+        return term_id
+
+    def lookup(self, term: Hashable) -> Optional[int]:
+        key = str(term)
+        term_id = self._ids.get(key)
+        if term_id is None:
+            term_id = self._base_lookup(key.encode("utf-8"))
+        return term_id
+
+    def term(self, term_id: int) -> str:
+        if term_id < self._base_size:
+            return self._base_bytes(term_id).decode("utf-8")
+        return self._terms[term_id - self._base_size]
+
+    def terms(self, term_ids: Iterable[int]) -> List[str]:
+        return [self.term(i) for i in term_ids]
+
+
+def encode_terms(dictionary: TermDictionary) -> Tuple[bytes, np.ndarray, np.ndarray]:
+    """Serialize a dictionary into (blob, offsets, sorted_ids) buffers.
+
+    This is the layout read back by :class:`MappedTermDictionary`.
+    """
+    encoded = [t.encode("utf-8") for t in dictionary.terms(range(len(dictionary)))]
+    offsets = np.zeros(len(encoded) + 1, dtype=OFFSET_DTYPE)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    sorted_ids = np.array(sorted(range(len(encoded)), key=encoded.__getitem__), dtype=ID_DTYPE)
+    return b"".join(encoded), offsets, sorted_ids
+
+
+class _StepTraversal:
+    """Traversals for stores that enumerate neighbors one node at a time.
+
+    Subclasses provide ``_step(n, allowed, direction)``, ``_has_node(n)`` and
+    ``numeric_column(predicate)``; results are node objects and frozensets.
+    Stores that know node degrees cheaply override ``_degree`` so fan-out
+    caps skip the nodes that cannot exceed them without enumerating edges.
+    """
+
+    capabilities = frozenset()
+
+    def _step(self, n: Hashable, allowed: Optional[frozenset], direction: str) -> Iterator[Any]:
+        raise NotImplementedError
+
+    def _has_node(self, n: Hashable) -> bool:
+        raise NotImplementedError
+
+    def _degree(self, n: Hashable, direction: str) -> Optional[int]:
+        """Return the number of edges of ``n`` in ``direction``, or None if unknown."""
+        return None
+
+    def _capped_step(self, n: Hashable, allowed: Optional[frozenset], direction: str, fanout: FanoutCap,
+                     rng: random.Random) -> Tuple[Iterable[Any], bool]:
+        """Return the neighbors ``n`` may reach under ``fanout`` and whether any were cut."""
+        degree = self._degree(n, direction)
+        if degree is not None and degree <= fanout.limit:
+            return self._step(n, allowed, direction), False
+        # parallel edges lead to one neighbor and count once against the cap
+        reached = list(dict.fromkeys(self._step(n, allowed, direction)))
+        if len(reached) <= fanout.limit:
+            return reached, False
+        if fanout.sample == "random":
+            return rng.sample(reached, fanout.limit), True
+        degrees = {}
+        for m in reached:
+            if m not in degrees:
+                degree = self._degree(m, "both")
+                degrees[m] = degree if degree is not None else sum(1 for _ in self._step(m, None, "both"))
+        # stable sort: equal degrees keep the store's edge order
+        return sorted(reached, key=lambda m: -degrees[m])[:fanout.limit], True
+
+    def numeric_column(self, predicate: Hashable) -> NumericColumn:
+        raise NotImplementedError
+
+    def neighbors(self, node: Hashable, depth: int = 1, hop_filters: HopFilters = None, direction: str = "out",
+                  fanout: Optional[FanoutCap] = None) -> List[Any]:
+        """Return nodes reachable from ``node`` in 1..depth hops.
+
+        Args:
+            node: start node
+            depth: maximum hop distance
+            hop_filters: optional per-hop sets of allowed predicates
+            direction: "out", "in" or "both"
+            fanout: optional per-hop fan-out cap; the result is then a
+                :class:`kg_agent.protocol.NeighborList`
+        """
+        check_direction(direction)
+        scoped = hop_scoped(hop_filters)
+        visited = set()
+        frontier = [node]
+        truncated = False
+        rng = random.Random(fanout.seed) if fanout is not None else None
+        for hop in range(depth):
+            allowed = hop_filters[hop] if hop_filters else None
+            seen = set() if scoped else visited
+            next_frontier = []
+            for n in frontier:
+                if fanout is None:
+                    reached = self._step(n, allowed, direction)
+                else:
+                    reached, cut = self._capped_step(n, allowed, direction, fanout, rng)
+                    truncated = truncated or cut
+                for m in reached:
+                    if m not in seen:
+                        seen.add(m)
+                        next_frontier.append(m)
+            visited.update(next_frontier)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return list(visited) if fanout is None else NeighborList(visited, truncated)
+
+    def iter_neighbors(self, node: Hashable, depth: int = 1, hop_filters: HopFilters = None,
+                       direction: str = "out") -> Iterator[Any]:
+        """Lazily yield the nodes reachable from ``node`` in 1..depth hops, in hop order.
+
+        Nodes are yielded as soon as a step discovers them, so the first ones
+        cost one step whatever the size of the neighborhood.
+
+        Raises:
+            KeyError: if ``node`` is not in the graph
+        """
+        check_direction(direction)
+        if not self._has_node(node):
+            raise KeyError(f"Node {node} not in graph")
+        return self._walk(node, depth, hop_filters, direction)
+
+    def _walk(self, node: Hashable, depth: int, hop_filters: HopFilters, direction: str) -> Iterator[Any]:
+        scoped = hop_scoped(hop_filters)
+        visited = set()
+        frontier = [node]
+        for hop in range(depth):
+            allowed = hop_filters[hop] if hop_filters else None
+            seen = set() if scoped else visited
+            next_frontier = []
+            for n in frontier:
+                # materialized so no store iterator stays open while suspended
+                for m in list(self._step(n, allowed, direction)):
+                    if m in seen:
+                        continue
+                    if m not in visited:
+                        visited.add(m)
+                        yield m
+                    seen.add(m)
+                    next_frontier.append(m)
+            if not next_frontier:
+                return
+            frontier = next_frontier
+
+    def neighbor_set(self, node: Hashable, depth: int = 1, hop_filters: HopFilters = None, direction: str = "out") -> frozenset:
+        """Like :meth:`neighbors` but returns a frozenset."""
+        return frozenset(self.neighbors(node, depth, hop_filters, direction))
+
+    def neighbors_batch(
+        self, nodes: Iterable[Hashable], depth: int = 1, hop_filters: HopFilters = None, direction: str = "out"
+    ) -> Dict[Any, Dict[Any, int]]:
+        """Run one multi-source BFS from ``nodes``.
+
+        Returns:
+            reached node -> {source: hop distance}
+        """
+        check_direction(direction)
+        sources = list(dict.fromkeys(nodes))
+        for node in sources:
+            if not self._has_node(node):
+                raise KeyError(f"Node {node} not in graph")
+        scoped = hop_scoped(hop_filters)
+        reached: Dict[Any, Dict[Any, int]] = {}
+        # node -> sources that reached it on the last hop (for the first time unless scoped)
+        frontier: Dict[Any, Set[Any]] = {node: {node} for node in sources}
+        for hop in range(depth):
+            allowed = hop_filters[hop] if hop_filters else None
+            next_frontier: Dict[Any, Set[Any]] = {}
+            for n, via in frontier.items():
+                for m in self._step(n, allowed, direction):
+                    distances = reached.setdefault(m, {})
+                    new = [src for src in via if src not in distances]
+                    for src in new:
+                        distances[src] = hop + 1
+                    carried = via if scoped else new
+                    if carried:
+                        next_frontier.setdefault(m, set()).update(carried)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return {node: distances for node, distances in reached.items() if distances}
+
+    def filter_by_value(self, predicate: Hashable, low=None, high=None, inclusive: bool = True, candidates=None) -> frozenset:
+        """Return entities whose ``predicate`` value lies in [low, high]."""
+        column = self.numeric_column(predicate)
+        result = frozenset(column.entities[column.range_slice(low, high, inclusive)].tolist())
+        return result if candidates is None else result & candidates
+
+    def top_k(self, predicate: Hashable, k: int = 1, candidates=None, largest: bool = True) -> List[Tuple[Any, Any]]:
+        """Return the ``k`` entities with the largest (or smallest) ``predicate`` values."""
+        column = self.numeric_column(predicate)
+        mask = None
+        if candidates is not None:
+            mask = np.fromiter((e in candidates for e in column.entities), dtype=bool, count=len(column))
+        return column.top_k(k, mask, largest)
+
+
+class NetworkXStore(_StepTraversal):
+    """Store that keeps triples in a networkx multi-digraph.
+
+    Each edge is keyed by its predicate (also stored as the ``predicate``
+    attribute), so several relations between the same two nodes are all kept
+    while re-adding an existing triple is a no-op. A predicate index answers
+    (?, p, ?) patterns without scanning the graph.
+
+    A plain ``nx.DiGraph`` may still be passed in; it keeps one edge per node
+    pair, as networkx itself does.
+
+    Per-node relation counters (predicate -> number of edges, outgoing and
+    incoming) are maintained as triples are added, so listing the relations
+    around a hub node does not scan its edges. A type index (type -> members,
+    each with the number of type edges asserting it) is maintained the same
+    way, so a class with millions of instances is read without scanning its
+    incoming edges.
+    """
+
+    capabilities = frozenset({RELATION_INDEX, FANOUT_CAPS})
+
+    def __init__(self, graph: Optional[nx.DiGraph] = None, type_predicates: Iterable[str] = DEFAULT_TYPE_PREDICATES):
+        self.graph = graph if graph is not None else nx.MultiDiGraph()
+        self.type_predicates = frozenset(type_predicates)
+        self._numeric_columns: Dict[Any, NumericColumn] = {}
+        self._by_predicate: Dict[Any, Set[Tuple[Any, Any]]] = {}
+        self._out_relations: Dict[Any, Dict[Any, int]] = {}
+        self._in_relations: Dict[Any, Dict[Any, int]] = {}
+        self._type_members: Dict[Any, Dict[Any, int]] = {}
+        for s, o, p in self.graph.edges(data="predicate"):
+            self._by_predicate.setdefault(p, set()).add((s, o))
+            self._count_relation(s, p, o, 1)
+
+    def _count_relation(self, s: Hashable, p: Hashable, o: Hashable, delta: int):
+        for counters, node in ((self._out_relations, s), (self._in_relations, o)):
+            counts = counters.setdefault(node, {})
+            counts[p] = counts.get(p, 0) + delta
+            if not counts[p]:
+                del counts[p]
+        if p in self.type_predicates:
+            members = self._type_members.setdefault(o, {})
+            members[s] = members.get(s, 0) + delta
+            if not members[s]:
+                del members[s]
+
+    def add_triples(self, triples: Iterable[tuple]):
+        """Add (subject, predicate, object) triples to the graph."""
+        graph = self.graph
+        multi = graph.is_multigraph()
+        by_predicate = self._by_predicate
+        self._numeric_columns.clear()
+        for s, p, o in triples:
+            if multi:
+                if graph.has_edge(s, o, key=p):
+                    continue
+                graph.add_edge(s, o, key=p, predicate=p)
+            else:
+                previous = graph.get_edge_data(s, o)
+                if previous is not None:
+                    if previous["predicate"] == p:
+                        continue
+                    by_predicate[previous["predicate"]].discard((s, o))
+                    self._count_relation(s, previous["predicate"], o, -1)
+                graph.add_edge(s, o, predicate=p)
+            by_predicate.setdefault(p, set()).add((s, o))
+            self._count_relation(s, p, o, 1)
+
+    def remove_triples(self, triples: Iterable[tuple]) -> int:
+        """Remove (subject, predicate, object) triples; unknown ones are ignored.
+
+        Nodes left without edges stay in the graph, as with ``remove_edge``.
+
+        Returns:
+            number of triples removed
+        """
+        graph = self.graph
+        multi = graph.is_multigraph()
+        removed = 0
+        self._numeric_columns.clear()
+        for s, p, o in triples:
+            if multi:
+                if not graph.has_edge(s, o, key=p):
+                    continue
+                graph.remove_edge(s, o, key=p)
+            else:
+                data = graph.get_edge_data(s, o)
+                if data is None or data["predicate"] != p:
+                    continue
+                graph.remove_edge(s, o)
+            self._by_predicate[p].discard((s, o))
+            self._count_relation(s, p, o, -1)
+            removed += 1
+        return removed
+
+    def _has_node(self, n: Hashable) -> bool:
+        return n in self.graph
+
+    def _degree(self, n: Hashable, direction: str) -> Optional[int]:
+        # summed from the relation counters: one term per distinct predicate
+        degree = 0
+        if direction != "in":
+            degree += sum(self._out_relations.get(n, {}).values())
+        if direction != "out":
+            degree += sum(self._in_relations.get(n, {}).values())
+        return degree
+
+    def _step(self, n: Hashable, allowed: Optional[frozenset], direction: str) -> Iterator[Any]:
+        """Yield the neighbors of ``n`` one hop away along allowed edges."""
+        graph = self.graph
+        if allowed is None:
+            if direction != "in":
+                yield from graph.successors(n)
+            if direction != "out":
+                yield from graph.predecessors(n)
+            return
+        if direction != "in":
+            yield from (o for _, o, p in graph.out_edges(n, data="predicate") if p in allowed)
+        if direction != "out":
+            yield from (s for s, _, p in graph.in_edges(n, data="predicate") if p in allowed)
+
+    def subjects(self) -> List[Any]:
+        """Return the nodes that have at least one outgoing edge."""
+        return [n for n, degree in self.graph.out_degree() if degree]
+
+    def entity_set(self, nodes: Iterable[Hashable]) -> frozenset:
+        """Return the nodes present in the graph as a frozenset."""
+        return frozenset(n for n in nodes if n in self.graph)
+
+    def entities_of_type(self, type_: Hashable, candidates: Optional[frozenset] = None) -> frozenset:
+        """Return entities typed ``type_`` (optionally restricted to ``candidates``)."""
+        members = self._type_members.get(type_, {})
+        if candidates is not None and len(candidates) < len(members):
+            return frozenset(e for e in candidates if e in members)
+        members = frozenset(members)
+        return members if candidates is None else members & candidates
+
+    def types_of(self, entity: Hashable) -> List[Any]:
+        """Return the types of ``entity``."""
+        if entity not in self.graph:
+            return []
+        return list({o for _, o, p in self.graph.out_edges(entity, data="predicate") if p in self.type_predicates})
+
+    def relations_of(self, entity: Hashable, direction: str = "out") -> Dict[Any, int]:
+        """Return {predicate: edge count} around ``entity``.
+
+        Args:
+            entity: node to inspect
+            direction: "out", "in" or "both" (counts of both sides summed)
+        """
+        check_direction(direction)
+        if direction != "both":
+            counters = self._out_relations if direction == "out" else self._in_relations
+            return dict(sorted(counters.get(entity, {}).items(), key=lambda kv: str(kv[0])))
+        counts = dict(self._out_relations.get(entity, {}))
+        for p, c in self._in_relations.get(entity, {}).items():
+            counts[p] = counts.get(p, 0) + c
+        return dict(sorted(counts.items(), key=lambda kv: str(kv[0])))
+
+    def numeric_column(self, predicate: Hashable) -> NumericColumn:
+        """Return the value-sorted literal column of ``predicate`` (built on first use)."""
+        column = self._numeric_columns.get(predicate)
+        if column is None:
+            pairs = list(self._by_predicate.get(predicate, ()))
+            entities = np.empty(len(pairs), dtype=object)
+            entities[:] = [s for s, _ in pairs]
+            column = self._numeric_columns[predicate] = NumericColumn(entities, [o for _, o in pairs])
+        return column
+
+    def match(self, subject=None, predicate=None, obj=None) -> List[tuple]:
+        """Return triples matching a pattern; None acts as a wildcard."""
+        graph = self.graph
+        if subject is not None:
+            if subject not in graph:
+                return []
+            edges = graph.out_edges(subject, data="predicate")
+        elif obj is not None:
+            if obj not in graph:
+                return []
+            edges = graph.in_edges(obj, data="predicate")
+        elif predicate is not None:
+            return [(s, predicate, o) for s, o in self._by_predicate.get(predicate, ())]
+        else:
+            edges = graph.edges(data="predicate")
+        return [
+            (s, p, o)
+            for s, o, p in edges
+            if (predicate is None or p == predicate) and (obj is None or o == obj)
+        ]
+
+
+def _csr_offsets(keys: np.ndarray, n: int) -> np.ndarray:
+    """Build CSR offsets for sorted ``keys`` in ``range(n)``."""
+    offsets = np.zeros(n + 1, dtype=OFFSET_DTYPE)
+    np.cumsum(np.bincount(keys, minlength=n), out=offsets[1:])
+    return offsets
+
+
+def _slice(offsets: np.ndarray, key: int) -> Tuple[int, int]:
+    """Return the [lo, hi) range of ``key`` in a CSR layout (empty if out of range)."""
+    if key + 1 >= len(offsets):
+        return 0, 0
+    return int(offsets[key]), int(offsets[key + 1])
+
+
+def _bisect(column: np.ndarray, lo: np.ndarray, hi: np.ndarray, values: np.ndarray, side: str = "left") -> np.ndarray:
+    """Search every ``values[i]`` in the sorted slice ``column[lo[i]:hi[i]]`` at once.
+
+    Like ``lo + np.searchsorted(column[lo:hi], value, side)`` per element, but
+    one array operation per halving step instead of a Python-level loop.
+    """
+    lo, hi = np.array(lo, dtype=np.int64), np.array(hi, dtype=np.int64)
+    last = len(column) - 1
+    while True:
+        active = lo < hi
+        if not active.any():
+            return lo
+        mid = (lo + hi) >> 1
+        probe = column[np.clip(mid, 0, last)]
+        right = active & ((probe < values) if side == "left" else (probe <= values))
+        lo = np.where(right, mid + 1, lo)
+        hi = np.where(active & ~right, mid, hi)
+
+
+def _lower_bound(first: np.ndarray, second: np.ndarray, lo: np.ndarray, hi: np.ndarray,
+                 b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """Return where each (b, c) belongs in the slices ``[lo, hi)`` sorted by (first, second)."""
+    i = _bisect(first, lo, hi, b)
+    j = _bisect(first, i, hi, b, "right")
+    return _bisect(second, i, j, c)
+
+
+def _find(first: np.ndarray, second: np.ndarray, lo: np.ndarray, hi: np.ndarray,
+          b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """Return the position of each (b, c) in the slices ``[lo, hi)`` sorted by (first, second), or -1."""
+    b, c = np.asarray(b), np.asarray(c)
+    k = _lower_bound(first, second, lo, hi, b, c)
+    found = k < hi
+    at = k[found]
+    found[found] = (first[at] == b[found]) & (second[at] == c[found])
+    return np.where(found, k, -1)
+
+
+def _unique_triples(s: np.ndarray, p: np.ndarray, o: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return the distinct (s, p, o) ID triples sorted in SPO order."""
+    order = np.lexsort((o, p, s))
+    s, p, o = s[order], p[order], o[order]
+    if len(s) > 1:
+        keep = np.ones(len(s), dtype=bool)
+        keep[1:] = (s[1:] != s[:-1]) | (p[1:] != p[:-1]) | (o[1:] != o[:-1])
+        s, p, o = s[keep], p[keep], o[keep]
+    return s, p, o
+
+
+def _range_positions(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Concatenate the index ranges ``starts[i]:starts[i] + counts[i]``.
+
+    Equivalent to ``np.concatenate([np.arange(a, a + c) for a, c in zip(starts, counts)])``
+    without a Python-level loop.
+    """
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros(0, dtype=OFFSET_DTYPE)
+    # shift each block so that adding a running index yields start..start+count
+    block_shift = starts - (np.cumsum(counts) - counts)
+    return np.repeat(block_shift, counts) + np.arange(total, dtype=OFFSET_DTYPE)
+
+
+def _edge_positions(offsets: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Return the positions of all CSR entries of ``keys``, concatenated in key order.
+
+    Keys beyond the offsets array have no entries.
+    """
+    keys = keys[keys < len(offsets) - 1]
+    starts = offsets[keys]
+    return _range_positions(starts, offsets[keys + 1] - starts)
+
+
+# Edges of several nodes as ranges of one index column:
+# (column, sorted dead positions or None, sources, starts, counts), where
+# ``sources[i]`` reaches ``column[starts[i]:starts[i] + counts[i]]``
+EdgeRanges = Tuple[np.ndarray, Optional[np.ndarray], np.ndarray, np.ndarray, np.ndarray]
+
+
+def _take_ranges(ranges: EdgeRanges) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the live (source, neighbor) pairs of ``ranges``."""
+    column, dead, sources, starts, counts = ranges
+    positions = _range_positions(starts, counts)
+    sources, neighbors = np.repeat(sources, counts), column[positions]
+    if dead is not None:
+        alive = ~_member(dead, positions)
+        sources, neighbors = sources[alive], neighbors[alive]
+    return sources, neighbors
+
+
+def _concat_pairs(pairs: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatenate (source, neighbor) array pairs."""
+    if not pairs:
+        empty = np.zeros(0, dtype=ID_DTYPE)
+        return empty, empty.copy()
+    if len(pairs) == 1:
+        return pairs[0]
+    return np.concatenate([p[0] for p in pairs]), np.concatenate([p[1] for p in pairs])
+
+
+def _range_blocks(groups: Iterable[EdgeRanges], block: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Yield the live (source, neighbor) pairs of ``groups`` about ``block`` positions at a time.
+
+    Ranges are cut at block boundaries, so a node with millions of edges is
+    read one block after the other rather than in one piece.
+    """
+    for column, dead, sources, starts, counts in groups:
+        ends = np.cumsum(counts)
+        begins = ends - counts
+        total = int(ends[-1]) if len(ends) else 0
+        for a in range(0, total, block):
+            b = min(a + block, total)
+            i = int(np.searchsorted(ends, a, side="right"))
+            j = int(np.searchsorted(begins, b, side="left"))
+            lo, hi = np.maximum(begins[i:j], a), np.minimum(ends[i:j], b)
+            yield _take_ranges((column, dead, sources[i:j], starts[i:j] + (lo - begins[i:j]), hi - lo))
+
+
+def _member(sorted_values: np.ndarray, values) -> np.ndarray:
+    """Return a mask of the ``values`` present in the sorted array ``sorted_values``."""
+    values = np.asarray(values)
+    if not len(sorted_values):
+        return np.zeros(values.shape, dtype=bool)
+    i = np.minimum(np.searchsorted(sorted_values, values), len(sorted_values) - 1)
+    return sorted_values[i] == values
+
+
+def _dedupe(ids: np.ndarray, slot: np.ndarray) -> np.ndarray:
+    """Drop duplicate IDs in O(len(ids)) using a node-indexed scratch array.
+
+    Cheaper than ``np.unique`` (no sort/hash) on large frontiers; the order of
+    the surviving IDs is unspecified.
+    """
+    index = np.arange(len(ids), dtype=slot.dtype)
+    slot[ids] = index
+    return ids[slot[ids] == index]
+
+
+class _SortedRuns:
+    """Set of IDs held as a few sorted arrays, each at least twice the next.
+
+    Memory follows the number of IDs added rather than the ID range, so a
+    suspended traversal stays small; adding merges runs like a binary
+    counter, which keeps both membership tests and merges logarithmic.
+    """
+
+    def __init__(self):
+        self.runs: List[np.ndarray] = []
+
+    def contains(self, ids: np.ndarray) -> np.ndarray:
+        """Return a mask of the ``ids`` in the set."""
+        found = np.zeros(len(ids), dtype=bool)
+        for run in self.runs:
+            found |= _member(run, ids)
+        return found
+
+    def add(self, ids: np.ndarray):
+        """Add sorted unique ``ids`` not yet in the set."""
+        run = ids
+        while self.runs and len(self.runs[-1]) <= 2 * len(run):
+            # disjoint sorted runs: a stable sort of the concatenation merges them
+            run = np.sort(np.concatenate([self.runs.pop(), run]), kind="stable")
+        self.runs.append(run)
+
+
+def _mix(a: np.ndarray, b: np.ndarray, seed: int) -> np.ndarray:
+    """Hash ID pairs with ``seed`` to uniform uint64 keys (splitmix64 finalizer).
+
+    Keys depend only on the pair, not on the order edges were gathered in, so
+    sampling picks the same edges whichever index or shard produced them.
+    """
+    with np.errstate(over="ignore"):
+        x = (a.astype(np.uint64) << np.uint64(32)) | b.astype(np.uint64)
+        x ^= np.uint64(seed & 0xFFFFFFFFFFFFFFFF) * np.uint64(0x9E3779B97F4A7C15)
+        x ^= x >> np.uint64(30)
+        x *= np.uint64(0xBF58476D1CE4E5B9)
+        x ^= x >> np.uint64(27)
+        x *= np.uint64(0x94D049BB133111EB)
+        x ^= x >> np.uint64(31)
+    return x
+
+
+def _run_counts(keys: np.ndarray, values: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Collapse (key, value) pairs sorted by key then value into CSR runs.
+
+    Returns:
+        (offsets over ``n`` keys, distinct values per key, int64 run lengths)
+    """
+    if not len(keys):
+        return np.zeros(n + 1, dtype=OFFSET_DTYPE), values[:0], np.zeros(0, dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, (keys[1:] != keys[:-1]) | (values[1:] != values[:-1])])
+    counts = np.diff(np.r_[starts, len(keys)]).astype(np.int64)
+    return _csr_offsets(keys[starts], n), values[starts], counts
+
+
+def _bit_positions(bits: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (row, bit) index pairs of all set bits in a uint64 array."""
+    unpacked = np.unpackbits(bits.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    rows, cols = np.nonzero(unpacked)
+    return rows, cols
+
+
+# Permutation orders: positions in (s, p, o) of the key, first and second column
+_ORDERS = {"spo": (0, 1, 2), "pos": (1, 2, 0), "osp": (2, 0, 1), "pso": (1, 0, 2)}
+
+# CompactGraphStore arrays of each order: (offsets, first column, second column)
+_ORDER_ARRAYS = {
+    "spo": ("offsets", "edge_predicates", "targets"),
+    "pos": ("pos_offsets", "pos_objects", "pos_subjects"),
+    "osp": ("osp_offsets", "osp_subjects", "osp_predicates"),
+    "pso": ("pso_offsets", "pso_subjects", "pso_objects"),
+}
+
+
+def _partition_ranges(bounds: Iterable[Tuple[int, int]], keys: np.ndarray, column: np.ndarray,
+                      dead: Optional[np.ndarray], frontier: np.ndarray) -> List[EdgeRanges]:
+    """Return the edges of ``frontier`` in predicate partitions ``keys[lo:hi]`` (sorted by frontier key)."""
+    sources, starts, counts = [], [], []
+    for lo, hi in bounds:
+        if lo == hi:
+            continue
+        partition = keys[lo:hi]
+        first = np.searchsorted(partition, frontier, side="left")
+        count = np.searchsorted(partition, frontier, side="right") - first
+        hit = count > 0
+        sources.append(frontier[hit])
+        starts.append(first[hit] + lo)
+        counts.append(count[hit])
+    if not sources:
+        return []
+    return [(column, dead, np.concatenate(sources), np.concatenate(starts), np.concatenate(counts))]
+
+
+class _DeltaRun:
+    """Immutable batch of triples layered over the CSR indexes of a compact store.
+
+    The triples are held sorted in the four permutation orders as plain
+    (key, first, second) columns; the range of a key is found by binary
+    search instead of offsets, so a run costs memory in proportion to its
+    triples only. Removals tombstone positions in new arrays (see
+    :meth:`without`), so frozen views share runs the way they share the
+    base arrays.
+    """
+
+    def __init__(self, s: np.ndarray, p: np.ndarray, o: np.ndarray):
+        terms = (s, p, o)
+        self.columns: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        for name, (a, b, c) in _ORDERS.items():
+            order = np.lexsort((terms[c], terms[b], terms[a]))
+            self.columns[name] = (terms[a][order], terms[b][order], terms[c][order])
+        # order name -> sorted dead positions, as on the store
+        self.dead: Optional[Dict[str, np.ndarray]] = None
+        self.num_dead = 0
+
+    def __len__(self) -> int:
+        return len(self.columns["spo"][0])
+
+    @property
+    def num_live(self) -> int:
+        return len(self) - self.num_dead
+
+    @classmethod
+    def merged(cls, runs: Iterable["_DeltaRun"]) -> "_DeltaRun":
+        """Return one run holding the live triples of ``runs`` (which never share one)."""
+        runs = list(runs)
+        if len(runs) == 1 and not runs[0].num_dead:
+            return runs[0]
+        empty = np.zeros(0, dtype=ID_DTYPE)
+        parts = [(empty, empty, empty)] + [run.match() for run in runs]
+        return cls(*(np.concatenate(column) for column in zip(*parts)))
+
+    def dead_edges(self, name: str) -> Optional[np.ndarray]:
+        return self.dead[name] if self.num_dead else None
+
+    def _keep(self, name: str, positions: np.ndarray) -> np.ndarray:
+        """Return the live-position mask of ``positions`` in order ``name``."""
+        if not self.num_dead:
+            return np.ones(len(positions), dtype=bool)
+        return ~_member(self.dead[name], positions)
+
+    def locate(self, name: str, s: np.ndarray, p: np.ndarray, o: np.ndarray) -> np.ndarray:
+        """Return the position of every (s, p, o) in order ``name``, dead or not, or -1."""
+        a, b, c = _ORDERS[name]
+        terms = (s, p, o)
+        key, first, second = self.columns[name]
+        lo = np.searchsorted(key, terms[a], side="left")
+        hi = np.searchsorted(key, terms[a], side="right")
+        return _find(first, second, lo, hi, terms[b], terms[c])
+
+    def contains(self, s: np.ndarray, p: np.ndarray, o: np.ndarray) -> np.ndarray:
+        """Return a mask of the triples live in this run."""
+        positions = self.locate("spo", s, p, o)
+        found = positions >= 0
+        found[found] = self._keep("spo", positions[found])
+        return found
+
+    def without(self, s: np.ndarray, p: np.ndarray, o: np.ndarray) -> Tuple["_DeltaRun", np.ndarray]:
+        """Return this run with the given triples tombstoned, and a mask of those that were live."""
+        hit = self.contains(s, p, o)
+        if not hit.any():
+            return self, hit
+        s, p, o = s[hit], p[hit], o[hit]
+        dead = self.dead or {name: np.zeros(0, dtype=OFFSET_DTYPE) for name in _ORDERS}
+        run = object.__new__(_DeltaRun)
+        run.columns = self.columns
+        run.dead = {name: np.union1d(dead[name], self.locate(name, s, p, o)) for name in _ORDERS}
+        run.num_dead = len(run.dead["spo"])
+        return run, hit
+
+    def match(self, s: Optional[int] = None, p: Optional[int] = None,
+              o: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return the live (subjects, predicates, objects) matching a pattern; None is a wildcard."""
+        if s is not None:
+            name = "osp" if p is None and o is not None else "spo"
+        else:
+            name = "pos" if p is not None else "osp" if o is not None else "spo"
+        terms = (s, p, o)
+        lo, hi = 0, len(self)
+        for column, term in zip(self.columns[name], _ORDERS[name]):
+            if terms[term] is None:
+                break
+            a, b = np.searchsorted(column[lo:hi], [terms[term], terms[term] + 1])
+            lo, hi = lo + int(a), lo + int(b)
+        keep = self._keep(name, np.arange(lo, hi))
+        result: List[Any] = [None, None, None]
+        for column, term in zip(self.columns[name], _ORDERS[name]):
+            result[term] = column[lo:hi][keep]
+        return result[0], result[1], result[2]
+
+    def degree(self, ids: np.ndarray, outgoing: bool) -> np.ndarray:
+        """Return the live one-direction edge count of every ID."""
+        name = "spo" if outgoing else "osp"
+        key = self.columns[name][0]
+        lo, hi = np.searchsorted(key, ids, side="left"), np.searchsorted(key, ids, side="right")
+        degree = hi - lo
+        if self.num_dead:
+            dead = self.dead[name]
+            degree -= np.searchsorted(dead, hi) - np.searchsorted(dead, lo)
+        return degree
+
+    def edge_ranges(self, frontier: np.ndarray, predicate_ids: Optional[np.ndarray], outgoing: bool) -> List[EdgeRanges]:
+        """Return the one-direction edges of ``frontier`` (see :meth:`CompactGraphStore._edge_ranges`)."""
+        if predicate_ids is None:
+            name = "spo" if outgoing else "osp"
+            key, first, second = self.columns[name]
+            starts = np.searchsorted(key, frontier, side="left")
+            counts = np.searchsorted(key, frontier, side="right") - starts
+            hit = counts > 0
+            # SPO ends at the object, OSP continues with the subject
+            column = second if outgoing else first
+            return [(column, self.dead_edges(name), frontier[hit], starts[hit], counts[hit])]
+        name = "pso" if outgoing else "pos"
+        key, first, second = self.columns[name]
+        bounds = zip(np.searchsorted(key, predicate_ids, side="left").tolist(),
+                     np.searchsorted(key, predicate_ids, side="right").tolist())
+        return _partition_ranges(bounds, first, second, self.dead_edges(name), frontier)
+
+    def edges_of(self, keys: np.ndarray, outgoing: bool) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return (rows into ``keys``, neighbors, predicates) of the live one-direction edges of ``keys``."""
+        name = "spo" if outgoing else "osp"
+        key, first, second = self.columns[name]
+        starts = np.searchsorted(key, keys, side="left")
+        counts = np.searchsorted(key, keys, side="right") - starts
+        positions = _range_positions(starts, counts)
+        rows = np.repeat(np.arange(len(keys)), counts)
+        neighbors, predicates = (second, first) if outgoing else (first, second)
+        keep = self._keep(name, positions)
+        return rows[keep], neighbors[positions][keep], predicates[positions][keep]
+
+    def nbytes(self) -> int:
+        dead = sum(arr.nbytes for arr in self.dead.values()) if self.dead else 0
+        return sum(arr.nbytes for columns in self.columns.values() for arr in columns) + dead
+
+
+def _update_counts(offsets: np.ndarray, values: np.ndarray, counts: np.ndarray, keys: np.ndarray,
+                   new_values: np.ndarray, change: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Apply signed count changes to CSR (key -> sorted values, counts) runs.
+
+    Changes to existing (key, value) pairs are added in place, new pairs are
+    inserted at their sorted places and pairs left at zero are dropped, so
+    the table is copied once instead of being sorted again.
+
+    Returns:
+        (offsets over ``n`` keys, values, int64 counts)
+    """
+    order = np.lexsort((new_values, keys))
+    keys, new_values, change = keys[order], new_values[order], change[order]
+    if len(keys):
+        starts = np.flatnonzero(np.r_[True, (keys[1:] != keys[:-1]) | (new_values[1:] != new_values[:-1])])
+        keys, new_values, change = keys[starts], new_values[starts], np.add.reduceat(change, starts)
+    known = len(offsets) - 1
+    inner = keys < known
+    # pairs of keys past the old offsets go to the end, already in order
+    lo = np.full(len(keys), len(values), dtype=np.int64)
+    hi = lo.copy()
+    lo[inner], hi[inner] = offsets[keys[inner]], offsets[keys[inner] + 1]
+    at = _bisect(values, lo, hi, new_values)
+    found = at < hi
+    found[found] = values[at[found]] == new_values[found]
+    counts = counts.astype(np.int64)
+    counts[at[found]] += change[found]
+    new = ~found
+    key_column = np.insert(np.repeat(np.arange(known, dtype=ID_DTYPE), np.diff(offsets)), at[new], keys[new])
+    values = np.insert(values, at[new], new_values[new])
+    counts = np.insert(counts, at[new], change[new])
+    keep = counts > 0
+    return _csr_offsets(key_column[keep], n), values[keep], counts[keep]
+
+
+def _merge_indexes(arrays: Dict[str, np.ndarray], dead: Optional[Dict[str, np.ndarray]], runs: Tuple["_DeltaRun", ...],
+                   relation_index: Optional[Tuple[np.ndarray, ...]], num_entities: int,
+                   num_predicates: int) -> Tuple[Dict[str, np.ndarray], Optional[Tuple[np.ndarray, ...]]]:
+    """Return index arrays holding the live edges of ``arrays`` plus the live triples of ``runs``.
+
+    Every permutation index is rewritten by dropping its dead positions and
+    inserting the run triples at their sorted places, which copies the
+    arrays once instead of sorting them again. A built relation index is
+    carried over the same way (see :func:`_update_counts`); None stays None.
+
+    Returns:
+        (arrays keyed by attribute name, relation index or None)
+    """
+    delta = _DeltaRun.merged(runs)
+    merged = {}
+    for name, attrs in _ORDER_ARRAYS.items():
+        offsets, first, second = (arrays[attr] for attr in attrs)
+        gone = dead[name] if dead else np.zeros(0, dtype=OFFSET_DTYPE)
+        key, new_first, new_second = delta.columns[name]
+        n = num_predicates if name in ("pos", "pso") else num_entities
+        known = len(offsets) - 1
+        inner = key < known
+        # triples of keys past the old offsets go to the end, already in order
+        at = np.full(len(key), len(first), dtype=np.int64)
+        k = key[inner]
+        at[inner] = _lower_bound(first, second, offsets[k], offsets[k + 1], new_first[inner], new_second[inner])
+        at -= np.searchsorted(gone, at)
+        counts = np.zeros(n, dtype=np.int64)
+        counts[:known] = np.diff(offsets)
+        if len(gone):
+            counts -= np.bincount(np.searchsorted(offsets, gone, side="right") - 1, minlength=n)
+        counts += np.bincount(key, minlength=n)
+        merged[attrs[0]] = np.zeros(n + 1, dtype=OFFSET_DTYPE)
+        np.cumsum(counts, out=merged[attrs[0]][1:])
+        merged[attrs[1]] = np.insert(np.delete(first, gone), at, new_first)
+        merged[attrs[2]] = np.insert(np.delete(second, gone), at, new_second)
+    if relation_index is None:
+        return merged, None
+    sides = []
+    # out side: (subject, predicate) from SPO; in side: (object, predicate) from OSP
+    for side, name, column in ((relation_index[:3], "spo", 1), (relation_index[3:], "osp", 2)):
+        offsets, preds = arrays[_ORDER_ARRAYS[name][0]], arrays[_ORDER_ARRAYS[name][column]]
+        gone = dead[name] if dead else np.zeros(0, dtype=OFFSET_DTYPE)
+        keys = np.concatenate([np.searchsorted(offsets, gone, side="right") - 1, delta.columns[name][0]])
+        values = np.concatenate([preds[gone], delta.columns[name][column]])
+        change = np.r_[np.full(len(gone), -1, dtype=np.int64), np.ones(len(delta), dtype=np.int64)]
+        sides.append(_update_counts(*side, keys.astype(ID_DTYPE), values, change, num_entities))
+    return merged, sides[0] + sides[1]
+
+
+class _Merge:
+    """A background fold of the first ``count`` delta runs into new index arrays."""
+
+    def __init__(self, count: int):
+        self.count = count
+        # (s, p, o) arrays removed while the merge ran, to tombstone in its result
+        self.removed: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self.arrays: Optional[Dict[str, np.ndarray]] = None
+        self.relation_index: Optional[Tuple[np.ndarray, ...]] = None
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+
+
+class CompactGraphStore:
+    """Triple store with interned IDs and CSR (compressed sparse row) indexes.
+
+    Entity and predicate strings are interned to dense integer IDs. Every
+    triple is kept (parallel edges between the same two entities included,
+    exact duplicates dropped) in three permutation indexes, each a CSR layout
+    over its leading term:
+
+    - SPO: ``offsets[s]:offsets[s + 1]`` is the edge range of subject ``s`` in
+      ``edge_predicates`` / ``targets``, sorted by (predicate, object)
+    - POS: ``pos_offsets[p]:pos_offsets[p + 1]`` ranges ``pos_objects`` /
+      ``pos_subjects``, sorted by (object, subject)
+    - OSP: ``osp_offsets[o]:osp_offsets[o + 1]`` ranges ``osp_subjects`` /
+      ``osp_predicates``, sorted by (subject, predicate)
+    - PSO: ``pso_offsets[p]:pso_offsets[p + 1]`` ranges ``pso_subjects`` /
+      ``pso_objects``, sorted by (subject, object)
+
+    so (s,?,?), (s,p,?), (?,p,?), (?,p,o) and (?,?,o) patterns are answered by
+    an offset lookup plus at most one binary search. POS and PSO double as
+    per-predicate adjacency partitions (incoming and outgoing), so a
+    predicate-filtered hop only touches matching edges.
+
+    A type index over ``type_predicates`` (type -> entities and entity ->
+    types, both CSR) is derived from POS/PSO whenever the indexes change. A
+    relation index lists the distinct outgoing and incoming predicates of
+    every entity with their edge counts (CSR over entities); once built, each
+    merge updates it from the triples merged and dropped. Value-sorted
+    literal columns (:class:`kg_agent.literals.NumericColumn`) are built per
+    predicate on first use and dropped when the indexes change.
+
+    Newly added triples are buffered in compact ``array`` columns until the
+    next read. A large buffer (``merge_threshold`` triples, or an eighth of
+    the edges if more) is merged by rebuilding the indexes; a smaller one
+    becomes an immutable delta run (:class:`_DeltaRun`) layered over them,
+    which every read consults after the CSR arrays. Runs are combined like a
+    binary counter, and once they hold that many triples together a
+    background thread merges them into new index arrays; the result is
+    installed by the next write (``merge_listener`` is called when it is
+    ready), so a small write never pays for an index rebuild.
+
+    Removed triples are tombstoned rather than cut out of the arrays: each
+    permutation index (and run) gets a sorted array of dead positions that
+    lookups and traversals skip, and derived counts are corrected from it
+    when read, so a removal costs a few binary searches per triple plus a
+    merge into the tombstones. The next merge (or :meth:`compact`) rewrites
+    the arrays without the dead edges.
+    """
+
+    capabilities = frozenset({BATCH_NEIGHBORS, RELATION_PATHS, ID_SETS, RELATION_INDEX, SNAPSHOTS, FANOUT_CAPS})
+
+    # Index arrays persisted by snapshots, in layout order
+    ARRAYS = (
+        "offsets", "targets", "edge_predicates",
+        "pos_offsets", "pos_objects", "pos_subjects",
+        "osp_offsets", "osp_subjects", "osp_predicates",
+        "pso_offsets", "pso_subjects", "pso_objects",
+    )
+
+    # Smallest number of delta triples merged into the indexes at once
+    merge_threshold = 1 << 16
+
+    def __init__(self, type_predicates: Iterable[str] = DEFAULT_TYPE_PREDICATES):
+        self.entities = TermDictionary()
+        self.predicates = TermDictionary()
+        self.type_predicates = frozenset(type_predicates)
+        self._type_index: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = None
+        self._numeric_columns: Dict[int, NumericColumn] = {}
+        self._relation_index: Optional[Tuple[np.ndarray, ...]] = None
+        empty = np.zeros(0, dtype=ID_DTYPE)
+        self.offsets = np.zeros(1, dtype=OFFSET_DTYPE)
+        self.targets = self.edge_predicates = empty
+        self.pos_offsets = np.zeros(1, dtype=OFFSET_DTYPE)
+        self.pos_objects = self.pos_subjects = empty
+        self.osp_offsets = np.zeros(1, dtype=OFFSET_DTYPE)
+        self.osp_subjects = self.osp_predicates = empty
+        self.pso_offsets = np.zeros(1, dtype=OFFSET_DTYPE)
+        self.pso_subjects = self.pso_objects = empty
+        self._pending_s = array("i")
+        self._pending_p = array("i")
+        self._pending_o = array("i")
+        # index name ("spo", "pos", "osp", "pso") -> sorted dead positions;
+        # replaced, never written, so frozen views can share them
+        self._dead: Optional[Dict[str, np.ndarray]] = None
+        self._num_dead = 0
+        # delta runs over the arrays, oldest first; replaced, never written
+        self._runs: Tuple[_DeltaRun, ...] = ()
+        self._merge: Optional[_Merge] = None
+        # called from the merge thread once a background merge can be installed
+        self.merge_listener: Optional[Callable[[], None]] = None
+
+    @property
+    def num_entities(self) -> int:
+        return len(self.entities)
+
+    @property
+    def num_edges(self) -> int:
+        self._flush()
+        return len(self.targets) - self._num_dead + sum(run.num_live for run in self._runs)
+
+    def add_triples(self, triples: Iterable[tuple]):
+        """Intern and buffer (subject, predicate, object) triples.
+
+        Args:
+            triples: iterable of (subject, predicate, object); consumed lazily
+        """
+        intern_entity = self.entities.intern
+        intern_predicate = self.predicates.intern
+        ps, pp, po = self._pending_s, self._pending_p, self._pending_o
+        for s, p, o in triples:
+            ps.append(intern_entity(s))
+            pp.append(intern_predicate(p))
+            po.append(intern_entity(o))
+
+    def add_encoded(self, chunk):
+        """Merge a worker-encoded chunk, remapping its local IDs to global ones.
+
+        Args:
+            chunk: :class:`kg_agent.loaders.EncodedChunk`
+        """
+        if not len(chunk):
+            return
+        intern_entity = self.entities.intern
+        intern_predicate = self.predicates.intern
+        entity_map = np.fromiter((intern_entity(t) for t in chunk.entities), dtype=np.intc, count=len(chunk.entities))
+        predicate_map = np.fromiter((intern_predicate(t) for t in chunk.predicates), dtype=np.intc, count=len(chunk.predicates))
+        self._pending_s.frombytes(entity_map[np.frombuffer(chunk.s, dtype=np.intc)].tobytes())
+        self._pending_p.frombytes(predicate_map[np.frombuffer(chunk.p, dtype=np.intc)].tobytes())
+        self._pending_o.frombytes(entity_map[np.frombuffer(chunk.o, dtype=np.intc)].tobytes())
+
+    def add_ids(self, s: np.ndarray, p: np.ndarray, o: np.ndarray):
+        """Buffer triples already encoded with this store's dictionaries."""
+        self._pending_s.frombytes(np.ascontiguousarray(s, dtype=np.intc).tobytes())
+        self._pending_p.frombytes(np.ascontiguousarray(p, dtype=np.intc).tobytes())
+        self._pending_o.frombytes(np.ascontiguousarray(o, dtype=np.intc).tobytes())
+
+    def remove_triples(self, triples: Iterable[tuple]) -> int:
+        """Tombstone (subject, predicate, object) triples; unknown ones are ignored.
+
+        Returns:
+            number of triples removed
+        """
+        lookup_entity, lookup_predicate = self.entities.lookup, self.predicates.lookup
+        ids = [(lookup_entity(s), lookup_predicate(p), lookup_entity(o)) for s, p, o in triples]
+        ids = np.array([t for t in ids if None not in t], dtype=ID_DTYPE).reshape(-1, 3)
+        return len(self.remove_ids(ids[:, 0], ids[:, 1], ids[:, 2])[0])
+
+    def remove_ids(self, s: np.ndarray, p: np.ndarray, o: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Tombstone triples given as ID arrays.
+
+        The triples are located in all four indexes (and in the delta runs)
+        by vectorized binary search and the positions are merged into new
+        tombstone arrays, so views holding the old ones are unaffected and
+        nothing edge-sized is copied.
+
+        Returns:
+            (subjects, predicates, objects) of the triples that were live
+        """
+        self._flush()
+        s, p, o = _unique_triples(*(np.asarray(x, dtype=ID_DTYPE) for x in (s, p, o)))
+        removed = self._tombstone(s, p, o)
+        runs = []
+        for run in self._runs:
+            run, hit = run.without(s, p, o)
+            runs.append(run)
+            removed = removed | hit
+        self._runs = tuple(runs)
+        s, p, o = s[removed], p[removed], o[removed]
+        if not len(s):
+            return s, p, o
+        if self._merge is not None:
+            self._merge.removed.append((s, p, o))
+        predicates = set(p.tolist())
+        for predicate in predicates:
+            self._numeric_columns.pop(predicate, None)
+        if predicates & set(self.predicate_ids(self.type_predicates).tolist()):
+            self._type_index = None
+        return s, p, o
+
+    def _tombstone(self, s: np.ndarray, p: np.ndarray, o: np.ndarray) -> np.ndarray:
+        """Tombstone the triples live in the index arrays; returns their mask."""
+        in_base = self._live_in_base(s, p, o)
+        if in_base.any():
+            s, p, o = s[in_base], p[in_base], o[in_base]
+            dead = self._dead or {name: np.zeros(0, dtype=OFFSET_DTYPE) for name in _ORDERS}
+            self._dead = {name: np.union1d(dead[name], self._locate(name, s, p, o)) for name in _ORDERS}
+            self._num_dead = len(self._dead["spo"])
+        return in_base
+
+    def _locate(self, name: str, s: np.ndarray, p: np.ndarray, o: np.ndarray) -> np.ndarray:
+        """Return the position of every (s, p, o) in index ``name`` of the arrays, dead or not, or -1."""
+        offsets, first, second = (getattr(self, attr) for attr in _ORDER_ARRAYS[name])
+        a, b, c = _ORDERS[name]
+        terms = (s, p, o)
+        keys = terms[a]
+        lo, hi = np.zeros(len(keys), dtype=np.int64), np.zeros(len(keys), dtype=np.int64)
+        known = keys < len(offsets) - 1
+        lo[known], hi[known] = offsets[keys[known]], offsets[keys[known] + 1]
+        return _find(first, second, lo, hi, terms[b], terms[c])
+
+    def _live_in_base(self, s: np.ndarray, p: np.ndarray, o: np.ndarray) -> np.ndarray:
+        """Return a mask of the triples live in the index arrays."""
+        positions = self._locate("spo", s, p, o)
+        found = positions >= 0
+        if self._num_dead:
+            found[found] = ~_member(self._dead["spo"], positions[found])
+        return found
+
+    def _alive(self, index: str, lo: int, hi: int):
+        """Return the live-position mask of ``index[lo:hi]`` (a full slice when nothing there is dead)."""
+        dead = self._dead_between(index, lo, hi)
+        if not len(dead):
+            return slice(None)
+        alive = np.ones(hi - lo, dtype=bool)
+        alive[dead - lo] = False
+        return alive
+
+    def _dead_between(self, index: str, lo: int, hi: int) -> np.ndarray:
+        """Return the dead positions of ``index`` within [lo, hi)."""
+        if not self._num_dead:
+            return np.zeros(0, dtype=OFFSET_DTYPE)
+        dead = self._dead[index]
+        a, b = np.searchsorted(dead, [lo, hi])
+        return dead[a:b]
+
+    def _live_mask(self, index: str) -> np.ndarray:
+        """Return the live-position mask of the whole ``index``."""
+        alive = np.ones(len(self.targets), dtype=bool)
+        if self._num_dead:
+            alive[self._dead[index]] = False
+        return alive
+
+    def _dead_keys(self, index: str, offsets: np.ndarray) -> np.ndarray:
+        """Return the CSR key (entity or predicate) of every dead position of ``index``."""
+        return np.searchsorted(offsets, self._dead[index], side="right") - 1
+
+    def dead_edges(self, index: str) -> Optional[np.ndarray]:
+        """Return the sorted tombstoned positions of ``index`` ("spo", "pos", "osp" or "pso"), or None."""
+        return self._dead[index] if self._num_dead else None
+
+    def _merge_limit(self) -> int:
+        """Return the delta size merged into the indexes at once (see class docstring)."""
+        return max(self.merge_threshold, len(self.targets) // 8)
+
+    def _flush(self):
+        """Layer buffered triples over the indexes as a delta run, or merge them in now if there are many."""
+        self._install_merge()
+        if not self._pending_s:
+            return
+        limit = self._merge_limit()
+        if len(self._pending_s) >= limit:
+            self._rebuild()
+            return
+        run = self._take_pending()
+        if run is None:
+            return
+        self._add_run(run)
+        captured = self._merge.count if self._merge is not None else 0
+        if sum(len(run) for run in self._runs[captured:]) >= limit:
+            # writes outpace the running merge: wait for it before starting the next
+            self._finish_merge()
+            self._start_merge()
+
+    def _take_pending(self) -> Optional[_DeltaRun]:
+        """Empty the buffer into a run of the triples not live yet (None if there are none)."""
+        s, p, o = (np.frombuffer(pending, dtype=np.intc).astype(ID_DTYPE)
+                   for pending in (self._pending_s, self._pending_p, self._pending_o))
+        self._pending_s, self._pending_p, self._pending_o = array("i"), array("i"), array("i")
+        s, p, o = _unique_triples(s, p, o)
+        # a triple is live in one place only: drop those already present
+        fresh = ~self._live_in_base(s, p, o)
+        for run in self._runs:
+            fresh &= ~run.contains(s, p, o)
+        if not fresh.any():
+            return None
+        return _DeltaRun(s[fresh], p[fresh], o[fresh])
+
+    def _add_run(self, run: _DeltaRun):
+        """Append a run, combining it with the newest runs no merge has captured while they are small."""
+        runs = list(self._runs)
+        captured = self._merge.count if self._merge is not None else 0
+        while len(runs) > captured and len(runs[-1]) <= 2 * len(run):
+            run = _DeltaRun.merged([runs.pop(), run])
+        runs.append(run)
+        self._runs = tuple(runs)
+        for predicate in np.unique(run.columns["pso"][0]).tolist():
+            self._numeric_columns.pop(predicate, None)
+
+    def _merge_args(self, runs: Tuple[_DeltaRun, ...]) -> tuple:
+        """Return the :func:`_merge_indexes` arguments folding ``runs`` into the current arrays."""
+        arrays = {name: getattr(self, name) for name in self.ARRAYS}
+        return arrays, self._dead, runs, self._relation_index, self.num_entities, len(self.predicates)
+
+    def _start_merge(self):
+        """Merge the current runs into new index arrays in a background thread."""
+        merge = self._merge = _Merge(len(self._runs))
+        args = self._merge_args(self._runs)
+
+        def run():
+            try:
+                merge.arrays, merge.relation_index = _merge_indexes(*args)
+            except BaseException as exc:
+                merge.error = exc
+            merge.done.set()
+            listener = self.merge_listener
+            if listener is not None:
+                listener()
+
+        threading.Thread(target=run, name="kg-merge", daemon=True).start()
+
+    def _install_merge(self):
+        """Swap in the arrays of a finished background merge (writer side, see :meth:`_flush`)."""
+        merge = self._merge
+        if merge is None or not merge.done.is_set():
+            return
+        self._merge = None
+        if merge.error is not None:
+            # the runs are still in place, so nothing is lost
+            raise merge.error
+        self._replace_arrays(merge.arrays, merge.relation_index)
+        self._runs = self._runs[merge.count:]
+        for s, p, o in merge.removed:
+            # removals made meanwhile went to the old arrays; the merged ones still hold them
+            self._tombstone(s, p, o)
+        self._base_changed()
+
+    def _replace_arrays(self, arrays: Dict[str, np.ndarray], relation_index: Optional[Tuple[np.ndarray, ...]]):
+        for name, arr in arrays.items():
+            setattr(self, name, arr)
+        self._dead, self._num_dead = None, 0
+        self._type_index = None
+        self._relation_index = relation_index
+
+    def _finish_merge(self):
+        """Wait for a running background merge and install it."""
+        if self._merge is not None:
+            self._merge.done.wait()
+            self._install_merge()
+
+    def _base_changed(self):
+        """Hook called after the index arrays were replaced (rebuilt or merged)."""
+
+    def compact(self):
+        """Rewrite the index arrays without tombstoned edges or delta runs, reclaiming their space."""
+        self._flush()
+        if self._num_dead or self._runs:
+            self._rebuild()
+
+    def _rebuild(self):
+        """Fold the tombstones, the delta runs and the buffered triples into new index arrays now.
+
+        This is the background merge run synchronously: the live edges are
+        copied around the inserted triples rather than sorted again, and the
+        relation index is updated from the change (built if missing).
+        """
+        self._finish_merge()
+        fresh = self._take_pending()
+        runs = self._runs + ((fresh,) if fresh is not None else ())
+        self._replace_arrays(*_merge_indexes(*self._merge_args(runs)))
+        self._runs = ()
+        self._numeric_columns = {}
+        self._build_type_index()
+        if self._relation_index is None:
+            self._build_relation_index()
+        self._base_changed()
+
+    def _build_type_index(self):
+        """Derive the type -> entities and entity -> types CSR arrays from POS/PSO."""
+        n = self.num_entities
+        typed, types = [], []
+        for p in self.predicate_ids(self.type_predicates).tolist():
+            lo, hi = _slice(self.pso_offsets, p)
+            alive = self._alive("pso", lo, hi)
+            typed.append(self.pso_subjects[lo:hi][alive])
+            types.append(self.pso_objects[lo:hi][alive])
+        typed = np.concatenate(typed) if typed else np.zeros(0, dtype=ID_DTYPE)
+        types = np.concatenate(types) if types else np.zeros(0, dtype=ID_DTYPE)
+        # several type predicates may assert the same membership
+        pairs = np.unique(np.stack([types, typed]), axis=1) if len(typed) else np.zeros((2, 0), dtype=ID_DTYPE)
+        members_by_type = pairs[1]
+        type_offsets = _csr_offsets(pairs[0], n)
+        order = np.lexsort((pairs[0], pairs[1]))
+        entity_type_offsets = _csr_offsets(pairs[1][order], n)
+        self._type_index = (type_offsets, members_by_type, entity_type_offsets, pairs[0][order])
+
+    def _build_relation_index(self):
+        """Derive per-entity (predicate, count) CSR arrays for both directions from SPO/OSP.
+
+        Tombstoned edges are counted too; :meth:`relation_ids` subtracts them,
+        so removals never touch the index.
+        """
+        n = len(self.offsets) - 1
+        subjects = np.repeat(np.arange(n, dtype=ID_DTYPE), np.diff(self.offsets))
+        objects = np.repeat(np.arange(n, dtype=ID_DTYPE), np.diff(self.osp_offsets))
+        out_predicates, in_predicates = self.edge_predicates, self.osp_predicates
+        # SPO is already grouped by (subject, predicate); OSP needs a regroup by predicate
+        order = np.lexsort((in_predicates, objects))
+        self._relation_index = (
+            _run_counts(subjects, out_predicates, n)
+            + _run_counts(objects[order], in_predicates[order], n)
+        )
+
+    def degree_ids(self, ids: np.ndarray, direction: str = "both") -> np.ndarray:
+        """Return the live edge count of every entity in ``ids`` in ``direction``.
+
+        Read off the CSR offsets minus the tombstones in each entity's range,
+        plus the entity's range in every delta run, so views, snapshots and
+        shared-memory workers need no extra arrays. Entities the indexes
+        have never seen have no edges.
+        """
+        self._flush()
+        degree = np.zeros(len(ids), dtype=OFFSET_DTYPE)
+        known = ids < len(self.offsets) - 1
+        known_ids = ids[known]
+        for name, offsets in (("spo", self.offsets), ("osp", self.osp_offsets)):
+            if direction == ("in" if name == "spo" else "out"):
+                continue
+            lo, hi = offsets[known_ids], offsets[known_ids + 1]
+            degree[known] += hi - lo
+            if self._num_dead:
+                dead = self._dead[name]
+                degree[known] -= np.searchsorted(dead, hi) - np.searchsorted(dead, lo)
+            for run in self._runs:
+                degree += run.degree(ids, name == "spo")
+        return degree
+
+    def relation_index(self) -> Tuple[np.ndarray, ...]:
+        """Return (out_offsets, out_predicates, out_counts, in_offsets, in_predicates, in_counts).
+
+        The index covers the CSR arrays, tombstoned edges included; delta
+        runs are counted separately by :meth:`relation_ids`.
+        """
+        self._flush()
+        if self._relation_index is None:
+            self._build_relation_index()
+        return self._relation_index
+
+    def relation_ids(self, entity_id: int, direction: str = "out") -> Tuple[np.ndarray, np.ndarray]:
+        """Return the distinct predicate IDs around ``entity_id`` and their edge counts.
+
+        Args:
+            entity_id: entity ID
+            direction: "out", "in" or "both" (counts of both sides summed)
+
+        Returns:
+            (predicate IDs ascending, int64 counts)
+        """
+        check_direction(direction)
+        index = self.relation_index()
+        out = (index[:3], "spo", self.offsets, self.edge_predicates)
+        inc = (index[3:], "osp", self.osp_offsets, self.osp_predicates)
+        sides = [out] if direction == "out" else [inc] if direction == "in" else [out, inc]
+        preds, counts = [], []
+        for (offsets, predicates, edge_counts), name, edge_offsets, edge_predicates in sides:
+            lo, hi = _slice(offsets, entity_id)
+            entity_preds, entity_counts = predicates[lo:hi], edge_counts[lo:hi]
+            # the index counts tombstoned edges; subtract the entity's dead ones
+            dead = self._dead_between(name, *_slice(edge_offsets, entity_id))
+            if len(dead):
+                dead_counts = np.bincount(np.searchsorted(entity_preds, edge_predicates[dead]), minlength=len(entity_preds))
+                entity_counts = entity_counts - dead_counts
+            live = entity_counts > 0
+            preds.append(entity_preds[live])
+            counts.append(entity_counts[live])
+            for run in self._runs:
+                run_preds = run.match(s=entity_id)[1] if name == "spo" else run.match(o=entity_id)[1]
+                if len(run_preds):
+                    run_preds, run_counts = np.unique(run_preds, return_counts=True)
+                    preds.append(run_preds)
+                    counts.append(run_counts.astype(np.int64))
+        if len(preds) == 1:
+            return preds[0], counts[0]
+        preds, inverse = np.unique(np.concatenate(preds), return_inverse=True)
+        return preds, np.bincount(inverse, weights=np.concatenate(counts), minlength=len(preds)).astype(np.int64)
+
+    def relations_of(self, entity: Hashable, direction: str = "out") -> Dict[str, int]:
+        """Return {predicate: edge count} around ``entity``, sorted by predicate name."""
+        entity_id = self.entities.lookup(entity)
+        if entity_id is None:
+            check_direction(direction)
+            return {}
+        preds, counts = self.relation_ids(entity_id, direction)
+        return dict(sorted(zip(self.predicates.terms(preds.tolist()), counts.tolist())))
+
+    def subjects(self) -> List[str]:
+        """Return the entities that have at least one outgoing edge."""
+        self._flush()
+        degrees = np.diff(self.offsets)
+        if self._num_dead:
+            degrees = degrees - np.bincount(self._dead_keys("spo", self.offsets), minlength=len(degrees))
+        ids = np.flatnonzero(degrees)
+        for run in self._runs:
+            ids = np.union1d(ids, run.match()[0])
+        return self.entities.terms(ids.tolist())
+
+    def successor_ids(self, node_id: int) -> np.ndarray:
+        """Return object IDs of all outgoing edges of ``node_id``."""
+        self._flush()
+        lo, hi = _slice(self.offsets, node_id)
+        objects = [self.targets[lo:hi][self._alive("spo", lo, hi)]]
+        objects += [run.match(s=node_id)[2] for run in self._runs]
+        return np.concatenate(objects) if len(objects) > 1 else objects[0]
+
+    def predicate_ids(self, predicates: Optional[Iterable[Hashable]]) -> Optional[np.ndarray]:
+        """Map predicate names to a sorted ID array (None stays None; unknown names are dropped)."""
+        if predicates is None:
+            return None
+        ids = {self.predicates.lookup(p) for p in predicates}
+        ids.discard(None)
+        return np.array(sorted(ids), dtype=ID_DTYPE)
+
+    def _edge_ranges(self, frontier: np.ndarray, predicate_ids: Optional[np.ndarray], outgoing: bool) -> List[EdgeRanges]:
+        """Return the one-direction edges of ``frontier`` as ranges of index columns (see :data:`EdgeRanges`).
+
+        Costs O(len(frontier)) per allowed predicate and run whatever the
+        degrees; no edge is read until the ranges are taken.
+        """
+        return self._base_edge_ranges(frontier, predicate_ids, outgoing) + self._delta_edge_ranges(frontier, predicate_ids, outgoing)
+
+    def _base_edge_ranges(self, frontier: np.ndarray, predicate_ids: Optional[np.ndarray], outgoing: bool) -> List[EdgeRanges]:
+        """Like :meth:`_edge_ranges`, for the CSR arrays only."""
+        if predicate_ids is None:
+            if outgoing:
+                offsets, column, index = self.offsets, self.targets, "spo"
+            else:
+                offsets, column, index = self.osp_offsets, self.osp_subjects, "osp"
+            keys = frontier[frontier < len(offsets) - 1]
+            starts = offsets[keys]
+            return [(column, self.dead_edges(index), keys, starts, offsets[keys + 1] - starts)]
+        if outgoing:
+            part_offsets, part_keys, column, index = self.pso_offsets, self.pso_subjects, self.pso_objects, "pso"
+        else:
+            part_offsets, part_keys, column, index = self.pos_offsets, self.pos_objects, self.pos_subjects, "pos"
+        bounds = (_slice(part_offsets, p) for p in predicate_ids.tolist())
+        return _partition_ranges(bounds, part_keys, column, self.dead_edges(index), frontier)
+
+    def _delta_edge_ranges(self, frontier: np.ndarray, predicate_ids: Optional[np.ndarray], outgoing: bool) -> List[EdgeRanges]:
+        """Like :meth:`_edge_ranges`, for the delta runs only."""
+        return [ranges for run in self._runs for ranges in run.edge_ranges(frontier, predicate_ids, outgoing)]
+
+    def _gather(self, frontier: np.ndarray, predicate_ids: Optional[np.ndarray], outgoing: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (source, neighbor) ID pairs for all one-direction edges of ``frontier``."""
+        return _concat_pairs([_take_ranges(ranges) for ranges in self._edge_ranges(frontier, predicate_ids, outgoing)])
+
+    def _gather_delta(self, frontier: np.ndarray, predicate_ids: Optional[np.ndarray], direction: str) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Return the (source, neighbor) pairs of the delta-run edges of ``frontier``, one array pair per range."""
+        groups = []
+        if direction != "in":
+            groups += self._delta_edge_ranges(frontier, predicate_ids, True)
+        if direction != "out":
+            groups += self._delta_edge_ranges(frontier, predicate_ids, False)
+        return [_take_ranges(ranges) for ranges in groups]
+
+    def edges_of(self, keys: np.ndarray, outgoing: bool) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return every live one-direction edge of ``keys`` as (rows into ``keys``, neighbors, predicates)."""
+        self._flush()
+        if outgoing:
+            offsets, neighbors, predicates, index = self.offsets, self.targets, self.edge_predicates, "spo"
+        else:
+            offsets, neighbors, predicates, index = self.osp_offsets, self.osp_subjects, self.osp_predicates, "osp"
+        rows = np.flatnonzero(keys < len(offsets) - 1)
+        starts = offsets[keys[rows]]
+        counts = offsets[keys[rows] + 1] - starts
+        positions = _range_positions(starts, counts)
+        rows = np.repeat(rows, counts)
+        if self._num_dead:
+            alive = ~_member(self._dead[index], positions)
+            rows, positions = rows[alive], positions[alive]
+        parts = [(rows, neighbors[positions], predicates[positions])]
+        parts += [run.edges_of(keys, outgoing) for run in self._runs]
+        if len(parts) == 1:
+            return parts[0]
+        return tuple(np.concatenate(column) for column in zip(*parts))
+
+    def expand(self, frontier: np.ndarray, predicate_ids: Optional[np.ndarray] = None, direction: str = "out") -> Tuple[np.ndarray, np.ndarray]:
+        """Return (source, neighbor) ID pairs for every edge leaving ``frontier``.
+
+        Args:
+            frontier: entity IDs to expand
+            predicate_ids: optional allowed predicate IDs (see :meth:`predicate_ids`)
+            direction: "out", "in" or "both"
+        """
+        self._flush()
+        if direction == "out":
+            return self._gather(frontier, predicate_ids, True)
+        if direction == "in":
+            return self._gather(frontier, predicate_ids, False)
+        out_src, out_dst = self._gather(frontier, predicate_ids, True)
+        in_src, in_dst = self._gather(frontier, predicate_ids, False)
+        return np.concatenate([out_src, in_src]), np.concatenate([out_dst, in_dst])
+
+    def neighbor_ids(
+        self,
+        start: int,
+        depth: int = 1,
+        hop_predicates: Optional[List[Optional[np.ndarray]]] = None,
+        direction: str = "out",
+    ) -> np.ndarray:
+        """Return sorted IDs of nodes reachable from ``start`` in 1..depth hops.
+
+        Frontiers are ID arrays expanded by gathering whole CSR ranges at once;
+        a visited mask keeps already reached nodes from being expanded again
+        (per hop when the per-hop filters differ, see :func:`hop_scoped`).
+        The start node is only reported if a cycle leads back to it.
+
+        Args:
+            start: start entity ID
+            depth: maximum hop distance
+            hop_predicates: optional per-hop allowed predicate ID arrays
+            direction: "out", "in" or "both"
+        """
+        return self.capped_neighbor_ids(start, depth, hop_predicates, direction)[0]
+
+    def capped_neighbor_ids(
+        self,
+        start: int,
+        depth: int = 1,
+        hop_predicates: Optional[List[Optional[np.ndarray]]] = None,
+        direction: str = "out",
+        fanout: Optional[FanoutCap] = None,
+    ) -> Tuple[np.ndarray, bool]:
+        """Like :meth:`neighbor_ids`, with an optional per-hop fan-out cap.
+
+        Returns:
+            (sorted reached IDs, whether the cap cut any node's edges)
+        """
+        check_direction(direction)
+        self._flush()
+        scoped = hop_scoped(hop_predicates)
+        n = self.num_entities
+        visited = np.zeros(n, dtype=bool)
+        # scratch slot per node, only ever read after being written
+        slot = np.empty(n, dtype=OFFSET_DTYPE)
+        reached = []
+        truncated = False
+        frontier = np.array([start], dtype=ID_DTYPE)
+        for hop in range(depth):
+            allowed = hop_predicates[hop] if hop_predicates else None
+            sources, candidates = self.expand(frontier, allowed, direction)
+            if fanout is not None:
+                candidates, cut = self._cap_fanout(frontier, sources, candidates, direction, fanout)
+                truncated = truncated or cut
+            if not scoped:
+                candidates = candidates[~visited[candidates]]
+            if not len(candidates):
+                break
+            frontier = _dedupe(candidates, slot)
+            if scoped:
+                reached.append(frontier[~visited[frontier]])
+            else:
+                reached.append(frontier)
+            visited[frontier] = True
+        if not reached:
+            return np.zeros(0, dtype=ID_DTYPE), truncated
+        return np.sort(np.concatenate(reached)), truncated
+
+    def _cap_fanout(self, frontier: np.ndarray, sources: np.ndarray, neighbors: np.ndarray, direction: str,
+                    fanout: FanoutCap) -> Tuple[np.ndarray, bool]:
+        """Keep at most ``fanout.limit`` distinct neighbors of every frontier node.
+
+        Only nodes whose degree (read off the offsets) exceeds the limit are
+        looked at; their (source, neighbor) pairs are deduplicated, since
+        parallel edges lead to one neighbor, ranked per source (by neighbor
+        degree or by a seeded hash) and cut after ``limit``.
+        """
+        hubs = frontier[self.degree_ids(frontier, direction) > fanout.limit]
+        if not len(hubs):
+            return neighbors, False
+        capped = np.isin(sources, hubs)
+        pairs = np.unique((sources[capped].astype(np.int64) << 32) | neighbors[capped].astype(np.int64))
+        hub_sources, hub_neighbors = (pairs >> 32).astype(ID_DTYPE), (pairs & 0xFFFFFFFF).astype(ID_DTYPE)
+        if fanout.sample == "random":
+            key = _mix(hub_sources, hub_neighbors, fanout.seed)
+        else:
+            key = -self.degree_ids(hub_neighbors)
+        order = np.lexsort((hub_neighbors, key, hub_sources))
+        hub_sources, hub_neighbors = hub_sources[order], hub_neighbors[order]
+        # rank of every edge within its source's run
+        starts = np.flatnonzero(np.r_[True, hub_sources[1:] != hub_sources[:-1]])
+        rank = np.arange(len(hub_sources)) - np.repeat(starts, np.diff(np.r_[starts, len(hub_sources)]))
+        keep = rank < fanout.limit
+        return np.concatenate([neighbors[~capped], hub_neighbors[keep]]), not keep.all()
+
+    def neighbors(self, node: Hashable, depth: int = 1, hop_filters: HopFilters = None, direction: str = "out",
+                  fanout: Optional[FanoutCap] = None) -> List[str]:
+        """Return nodes reachable from ``node`` in 1..depth hops.
+
+        Args:
+            node: start node
+            depth: maximum hop distance
+            hop_filters: optional per-hop sets of allowed predicate names
+            direction: "out", "in" or "both"
+            fanout: optional per-hop fan-out cap; the result is then a
+                :class:`kg_agent.protocol.NeighborList`
+
+        Raises:
+            KeyError: if ``node`` is not in the graph
+        """
+        ids, truncated = self._neighbor_ids_of(node, depth, hop_filters, direction, fanout)
+        terms = self.entities.terms(ids.tolist())
+        return terms if fanout is None else NeighborList(terms, truncated)
+
+    def iter_neighbor_ids(
+        self,
+        start: int,
+        depth: int = 1,
+        hop_predicates: Optional[List[Optional[np.ndarray]]] = None,
+        direction: str = "out",
+        block: int = 4096,
+    ) -> Iterator[np.ndarray]:
+        """Lazily yield the IDs reachable from ``start``, hop by hop, in arrays.
+
+        Each hop's frontier is turned into edge ranges of the index columns
+        (no edge is read yet) and the ranges are read in blocks of
+        ``block`` edges, cutting through the ranges of high-degree nodes;
+        the newly reached IDs of every block are yielded before the next one
+        is read, so the first array costs about one block whatever the
+        degrees or the size of the neighborhood. IDs reached on hop ``k``
+        all come before those of hop ``k + 1``. An entity without edges in
+        this version reaches nothing.
+
+        Reached IDs are kept in sorted runs rather than entity-sized masks,
+        so a suspended traversal holds memory in proportion to what it has
+        reached so far.
+        """
+        check_direction(direction)
+        self._flush()
+        scoped = hop_scoped(hop_predicates)
+        visited = _SortedRuns()
+        frontier = np.array([start], dtype=ID_DTYPE)
+        for hop in range(depth):
+            allowed = hop_predicates[hop] if hop_predicates else None
+            # nodes reached on this hop; everything visited unless scoped
+            seen = _SortedRuns() if scoped else visited
+            groups = []
+            if direction != "in":
+                groups += self._edge_ranges(frontier, allowed, True)
+            if direction != "out":
+                groups += self._edge_ranges(frontier, allowed, False)
+            reached = []
+            for _, candidates in _range_blocks(groups, block):
+                if not len(candidates):
+                    continue
+                hop_new = np.sort(candidates)
+                hop_new = hop_new[np.r_[True, hop_new[1:] != hop_new[:-1]] & ~seen.contains(hop_new)]
+                if not len(hop_new):
+                    continue
+                new = hop_new[~visited.contains(hop_new)] if scoped else hop_new
+                if len(new):
+                    visited.add(new)
+                if scoped:
+                    seen.add(hop_new)
+                reached.append(hop_new)
+                if len(new):
+                    yield new
+            if not reached:
+                return
+            frontier = np.concatenate(reached)
+
+    def iter_neighbors(self, node: Hashable, depth: int = 1, hop_filters: HopFilters = None,
+                       direction: str = "out") -> Iterator[str]:
+        """Lazily yield the nodes reachable from ``node`` in hop order (see :meth:`iter_neighbor_ids`).
+
+        Raises:
+            KeyError: if ``node`` is not in the graph
+        """
+        check_direction(direction)
+        start = self.entities.lookup(node)
+        if start is None:
+            raise KeyError(f"Node {node} not in graph")
+        hop_predicates = [self.predicate_ids(f) for f in hop_filters] if hop_filters else None
+        terms = self.entities.terms
+        return (term for ids in self.iter_neighbor_ids(start, depth, hop_predicates, direction) for term in terms(ids.tolist()))
+
+    def neighbor_set(self, node: Hashable, depth: int = 1, hop_filters: HopFilters = None, direction: str = "out"):
+        """Like :meth:`neighbors` but returns an :class:`kg_agent.sets.EntitySet`."""
+        from .sets import EntitySet
+
+        ids, _ = self._neighbor_ids_of(node, depth, hop_filters, direction)
+        return EntitySet.from_ids(ids, self.num_entities, assume_unique_sorted=True)
+
+    def _neighbor_ids_of(self, node: Hashable, depth: int, hop_filters: HopFilters, direction: str,
+                         fanout: Optional[FanoutCap] = None) -> Tuple[np.ndarray, bool]:
+        start = self.entities.lookup(node)
+        if start is None:
+            raise KeyError(f"Node {node} not in graph")
+        hop_predicates = [self.predicate_ids(f) for f in hop_filters] if hop_filters else None
+        return self.capped_neighbor_ids(start, depth, hop_predicates, direction, fanout)
+
+    def entity_set(self, nodes: Iterable[Hashable]):
+        """Return the known entities among ``nodes`` as an :class:`kg_agent.sets.EntitySet`."""
+        from .sets import EntitySet
+
+        lookup = self.entities.lookup
+        ids = [i for i in (lookup(n) for n in nodes) if i is not None]
+        return EntitySet.from_ids(ids, self.num_entities)
+
+    def batch_neighbor_ids(
+        self,
+        starts: np.ndarray,
+        depth: int = 1,
+        hop_predicates: Optional[List[Optional[np.ndarray]]] = None,
+        direction: str = "out",
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Multi-source BFS from ``starts`` in a single pass per block of 64 sources.
+
+        Every node carries a 64-bit mask of the sources that reached it; a hop
+        propagates masks along all frontier edges at once (sort + OR-reduce per
+        target) and keeps only bits the target had not seen before (all of them
+        while the per-hop filters differ, see :func:`hop_scoped`).
+
+        Args:
+            starts: source entity IDs
+            depth: maximum hop distance
+            hop_predicates: optional per-hop allowed predicate ID arrays
+            direction: "out", "in" or "both"
+
+        Returns:
+            (node IDs, source indexes into ``starts``, hop distances) as parallel arrays
+        """
+        check_direction(direction)
+        self._flush()
+        scoped = hop_scoped(hop_predicates)
+        n = self.num_entities
+        out_nodes, out_sources, out_distances = [], [], []
+        for block_start in range(0, len(starts), 64):
+            block = np.asarray(starts[block_start:block_start + 64], dtype=ID_DTYPE)
+            seen = np.zeros(n, dtype=np.uint64)
+            # source bits each frontier node carries into the next hop
+            carried = np.zeros(n, dtype=np.uint64)
+            np.bitwise_or.at(carried, block, np.left_shift(np.uint64(1), np.arange(len(block), dtype=np.uint64)))
+            frontier = np.unique(block)
+            for hop in range(depth):
+                allowed = hop_predicates[hop] if hop_predicates else None
+                src, dst = self.expand(frontier, allowed, direction)
+                bits = carried[src]
+                carried[frontier] = 0
+                if not len(dst):
+                    break
+                order = np.argsort(dst, kind="stable")
+                dst, bits = dst[order], bits[order]
+                first = np.flatnonzero(np.concatenate(([True], dst[1:] != dst[:-1])))
+                targets = dst[first]
+                hop_bits = np.bitwise_or.reduceat(bits, first)
+                new_bits = hop_bits & ~seen[targets]
+                keep = new_bits != 0
+                targets, new_bits = targets[keep], new_bits[keep]
+                if scoped:
+                    # sources that reached a node before still carry it onward
+                    frontier = dst[first]
+                    carried[frontier] = hop_bits
+                else:
+                    frontier = targets
+                    carried[frontier] = new_bits
+                if not len(frontier):
+                    break
+                seen[targets] |= new_bits
+                rows, cols = _bit_positions(new_bits)
+                out_nodes.append(targets[rows])
+                out_sources.append(cols + block_start)
+                out_distances.append(np.full(len(rows), hop + 1, dtype=ID_DTYPE))
+        if not out_nodes:
+            empty = np.zeros(0, dtype=ID_DTYPE)
+            return empty, empty.copy(), empty.copy()
+        return np.concatenate(out_nodes), np.concatenate(out_sources), np.concatenate(out_distances)
+
+    def neighbors_batch(
+        self, nodes: Iterable[Hashable], depth: int = 1, hop_filters: HopFilters = None, direction: str = "out"
+    ) -> Dict[str, Dict[str, int]]:
+        """Run one multi-source BFS from ``nodes`` (names or an EntitySet).
+
+        Returns:
+            reached node -> {source: hop distance}
+
+        Raises:
+            KeyError: if a source node is not in the graph
+        """
+        if hasattr(nodes, "ids"):
+            # EntitySet: IDs are already interned
+            starts = nodes.ids.tolist()
+            sources = self.entities.terms(starts)
+        else:
+            sources = list(dict.fromkeys(str(node) for node in nodes))
+            starts = []
+            for node in sources:
+                node_id = self.entities.lookup(node)
+                if node_id is None:
+                    raise KeyError(f"Node {node} not in graph")
+                starts.append(node_id)
+        hop_predicates = [self.predicate_ids(f) for f in hop_filters] if hop_filters else None
+        ids, source_idx, distances = self.batch_neighbor_ids(np.array(starts, dtype=ID_DTYPE), depth, hop_predicates, direction)
+        if not len(ids):
+            return {}
+        # group pairs by node so each node name is decoded once
+        order = np.argsort(ids, kind="stable")
+        ids, source_idx, distances = ids[order], source_idx[order], distances[order]
+        bounds = np.flatnonzero(ids[1:] != ids[:-1]) + 1
+        names = self.entities.terms(ids[np.concatenate(([0], bounds))].tolist())
+        source_names = [sources[i] for i in source_idx.tolist()]
+        distances = distances.tolist()
+        splits = [0] + bounds.tolist() + [len(ids)]
+        return {
+            name: dict(zip(source_names[a:b], distances[a:b]))
+            for name, a, b in zip(names, splits, splits[1:])
+        }
+
+    def type_index(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Return (type_offsets, type_members, entity_type_offsets, entity_types) CSR arrays.
+
+        The index covers the CSR arrays; memberships in delta runs are added
+        by :meth:`entities_of_type` and :meth:`types_of`.
+        """
+        self._flush()
+        if self._type_index is None:
+            self._build_type_index()
+        return self._type_index
+
+    def entities_of_type(self, type_: Hashable, candidates=None):
+        """Return entities typed ``type_`` as an EntitySet, optionally intersected with ``candidates``."""
+        from .sets import EntitySet
+
+        type_offsets, members, _, _ = self.type_index()
+        type_id = self.entities.lookup(type_)
+        lo, hi = _slice(type_offsets, type_id) if type_id is not None else (0, 0)
+        members = members[lo:hi]
+        if type_id is not None and self._runs:
+            for p in self.predicate_ids(self.type_predicates).tolist():
+                for run in self._runs:
+                    members = np.union1d(members, run.match(p=p, o=type_id)[0])
+        result = EntitySet.from_ids(members, self.num_entities, assume_unique_sorted=True)
+        return result if candidates is None else candidates & result
+
+    def types_of(self, entity: Hashable) -> List[str]:
+        """Return the types of ``entity``."""
+        _, _, entity_type_offsets, entity_types = self.type_index()
+        entity_id = self.entities.lookup(entity)
+        if entity_id is None:
+            return []
+        lo, hi = _slice(entity_type_offsets, entity_id)
+        types = entity_types[lo:hi].tolist()
+        if self._runs:
+            for p in self.predicate_ids(self.type_predicates).tolist():
+                for run in self._runs:
+                    types += run.match(s=entity_id, p=p)[2].tolist()
+            types = list(dict.fromkeys(types))
+        return self.entities.terms(types)
+
+    def numeric_column(self, predicate: Hashable) -> NumericColumn:
+        """Return the value-sorted literal column of ``predicate`` (built on first use)."""
+        self._flush()
+        p = self.predicates.lookup(predicate)
+        if p is None:
+            return NumericColumn(np.zeros(0, dtype=ID_DTYPE), [])
+        column = self._numeric_columns.get(p)
+        if column is None:
+            lo, hi = _slice(self.pso_offsets, p)
+            alive = self._alive("pso", lo, hi)
+            subjects, objects = [self.pso_subjects[lo:hi][alive]], [self.pso_objects[lo:hi][alive]]
+            for run in self._runs:
+                s, _, o = run.match(p=p)
+                subjects.append(s)
+                objects.append(o)
+            objects = self.entities.terms(np.concatenate(objects).tolist())
+            column = self._numeric_columns[p] = NumericColumn(np.concatenate(subjects), objects)
+        return column
+
+    def filter_by_value(self, predicate: Hashable, low=None, high=None, inclusive: bool = True, candidates=None):
+        """Return entities whose ``predicate`` value lies in [low, high] as an EntitySet."""
+        from .sets import EntitySet
+
+        column = self.numeric_column(predicate)
+        result = EntitySet.from_ids(column.entities[column.range_slice(low, high, inclusive)], self.num_entities)
+        return result if candidates is None else candidates & result
+
+    def top_k(self, predicate: Hashable, k: int = 1, candidates=None, largest: bool = True) -> List[Tuple[str, Any]]:
+        """Return the ``k`` entities with the largest (or smallest) ``predicate`` values."""
+        column = self.numeric_column(predicate)
+        mask = candidates.contains_ids(column.entities) if candidates is not None else None
+        return [(self.entities.term(e), v) for e, v in column.top_k(k, mask, largest)]
+
+    def match_ids(
+        self, s: Optional[int] = None, p: Optional[int] = None, o: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return (subjects, predicates, objects) ID arrays matching a pattern.
+
+        None acts as a wildcard; the most selective index is chosen from the
+        bound positions. Triples of the delta runs follow those of the arrays.
+        """
+        self._flush()
+        rows = self._match_base(s, p, o)
+        if not self._runs:
+            return rows
+        parts = [rows] + [run.match(s, p, o) for run in self._runs]
+        return tuple(np.concatenate(column) for column in zip(*parts))
+
+    def _match_base(self, s: Optional[int], p: Optional[int], o: Optional[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Like :meth:`match_ids`, for the CSR arrays only."""
+        if s is not None:
+            if p is None and o is not None:
+                # (s, ?, o): OSP slice is sorted by subject
+                lo, hi = _slice(self.osp_offsets, o)
+                subjects = self.osp_subjects[lo:hi]
+                a, b = np.searchsorted(subjects, [s, s + 1])
+                preds = self.osp_predicates[lo + a:lo + b][self._alive("osp", lo + a, lo + b)]
+                return np.full(len(preds), s, dtype=ID_DTYPE), preds, np.full(len(preds), o, dtype=ID_DTYPE)
+            lo, hi = _slice(self.offsets, s)
+            if p is not None:
+                a, b = np.searchsorted(self.edge_predicates[lo:hi], [p, p + 1])
+                lo, hi = lo + a, lo + b
+                if o is not None:
+                    a, b = np.searchsorted(self.targets[lo:hi], [o, o + 1])
+                    lo, hi = lo + a, lo + b
+            alive = self._alive("spo", lo, hi)
+            preds, objs = self.edge_predicates[lo:hi][alive], self.targets[lo:hi][alive]
+            return np.full(len(objs), s, dtype=ID_DTYPE), preds, objs
+        if p is not None:
+            lo, hi = _slice(self.pos_offsets, p)
+            if o is not None:
+                a, b = np.searchsorted(self.pos_objects[lo:hi], [o, o + 1])
+                lo, hi = lo + a, lo + b
+            alive = self._alive("pos", lo, hi)
+            objs, subjects = self.pos_objects[lo:hi][alive], self.pos_subjects[lo:hi][alive]
+            return subjects, np.full(len(objs), p, dtype=ID_DTYPE), objs
+        if o is not None:
+            lo, hi = _slice(self.osp_offsets, o)
+            alive = self._alive("osp", lo, hi)
+            subjects = self.osp_subjects[lo:hi][alive]
+            return subjects, self.osp_predicates[lo:hi][alive], np.full(len(subjects), o, dtype=ID_DTYPE)
+        subjects = np.repeat(np.arange(len(self.offsets) - 1, dtype=ID_DTYPE), np.diff(self.offsets))
+        if self._num_dead:
+            alive = self._live_mask("spo")
+            return subjects[alive], self.edge_predicates[alive], self.targets[alive]
+        return subjects, self.edge_predicates, self.targets
+
+    def match(self, subject=None, predicate=None, obj=None) -> List[Tuple[str, str, str]]:
+        """Return triples matching a pattern; None acts as a wildcard."""
+        ids = []
+        for term, dictionary in ((subject, self.entities), (predicate, self.predicates), (obj, self.entities)):
+            if term is None:
+                ids.append(None)
+                continue
+            term_id = dictionary.lookup(term)
+            if term_id is None:
+                return []
+            ids.append(term_id)
+        s, p, o = self.match_ids(*ids)
+        return list(zip(self.entities.terms(s.tolist()), self.predicates.terms(p.tolist()), self.entities.terms(o.tolist())))
+
+    def nbytes(self) -> int:
+        """Approximate memory used by the index arrays (excluding dictionaries)."""
+        self._flush()
+        return sum(getattr(self, name).nbytes for name in self.ARRAYS) + sum(run.nbytes() for run in self._runs)
+
+    def compacted(self) -> "CompactGraphStore":
+        """Return a store holding the live triples in arrays without tombstones or delta runs.
+
+        That is this store itself when it has neither; otherwise the live
+        edges are rebuilt into new arrays of a new store sharing the
+        dictionaries, and this store (possibly a frozen view other readers
+        hold) is left untouched.
+        """
+        self._flush()
+        if not self._num_dead and not self._runs:
+            return self
+        store = CompactGraphStore.from_arrays(self.entities, self.predicates, {name: getattr(self, name) for name in self.ARRAYS})
+        store.type_predicates = self.type_predicates
+        store._dead, store._num_dead, store._runs = self._dead, self._num_dead, self._runs
+        store._rebuild()
+        return store
+
+    def index_arrays(self) -> Dict[str, np.ndarray]:
+        """Return the index arrays of the live triples keyed by attribute name (see :meth:`compacted`)."""
+        store = self.compacted()
+        return {name: getattr(store, name) for name in self.ARRAYS}
+
+    def freeze(self) -> "CompactGraphStore":
+        """Return a read-only view of the current indexes in O(1).
+
+        Buffered triples become a delta run and merges build new arrays
+        rather than writing into the old ones, so the view shares the arrays
+        and runs without copying and keeps seeing this version while the
+        store moves on. The dictionaries are shared too: they only ever grow,
+        and terms interned later are simply absent from the view's indexes.
+        """
+        return self._frozen_view(CompactGraphStore)
+
+    def _frozen_view(self, cls):
+        self._flush()
+        view = cls.from_arrays(self.entities, self.predicates, {name: getattr(self, name) for name in self.ARRAYS})
+        view.type_predicates = self.type_predicates
+        # derived indexes are shared when built and otherwise built lazily by the view
+        view._type_index, view._relation_index = self._type_index, self._relation_index
+        # tombstones and delta runs are shared too; writes replace rather than write them
+        view._dead, view._num_dead, view._runs = self._dead, self._num_dead, self._runs
+        return view
+
+    @classmethod
+    def from_arrays(cls, entities: TermDictionary, predicates: TermDictionary, arrays: Dict[str, np.ndarray]):
+        """Build a store around existing dictionaries and index arrays (no copies)."""
+        store = cls()
+        store.entities = entities
+        store.predicates = predicates
+        for name in cls.ARRAYS:
+            setattr(store, name, arrays[name])
+        return store
@@ -0,0 +1,220 @@
+"""KG tools for the agent's toolbox.
+
+Every tool takes the executor as its first argument, like
+:func:`kg_agent.core.neighbor_tool`; :func:`register_kg_tools` binds them to
+one executor and registers them on a :class:`kg_agent.core.KGToolbox`.
+
+Set tools accept entity sets (``KGExecutor.entity_set`` / ``as_set=True``
+query results) or plain lists of node names, and return entity sets.
+"""
+
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional
+
+from .core import KGExecutor, KGToolbox, neighbor_tool
+from .protocol import BATCH_NEIGHBORS
+from .sets import EntitySet
+
+
+def _as_set(executor: KGExecutor, entities: Any):
+    if isinstance(entities, (EntitySet, frozenset, set)):
+        return entities
+    return executor.entity_set(entities)
+
+
+def neighbors_batch_tool(executor: KGExecutor, nodes: Iterable[str], depth: int = 1):
+    """Tool that returns the neighbors of several nodes.
+
+    Uses one multi-source traversal when the backend supports it natively and
+    per-node (cacheable) queries otherwise.
+
+    Args:
+        executor: KGExecutor instance
+        nodes: start node names
+        depth: hop depth
+
+    Returns:
+        Dict node -> list of neighbor node ids
+    """
+    nodes = list(dict.fromkeys(nodes))
+    if not executor.supports(BATCH_NEIGHBORS):
+        return {node: executor.query_neighbors(node, depth) for node in nodes}
+    result: Dict[Any, List[Any]] = {node: [] for node in nodes}
+    for reached, sources in executor.query_neighbors_batch(nodes, depth).items():
+        for source in sources:
+            result[source].append(reached)
+    return result
+
+
+def neighbor_page_tool(executor: KGExecutor, node: str, depth: int = 1, limit: int = 50,
+                       cursor: Optional[str] = None):
+    """Tool that returns one page of a node's neighbors, nearest hops first.
+
+    Args:
+        executor: KGExecutor instance
+        node: start node name
+        depth: hop depth
+        limit: page size
+        cursor: ``cursor`` of the previous page, to continue after it
+
+    Returns:
+        Dict with the page's ``items`` and the ``cursor`` of the next page
+        (None when there are no more neighbors)
+    """
+    page = executor.neighbor_page(node, depth, limit=limit, cursor=cursor)
+    return {"items": page.items, "cursor": page.cursor}
+
+
+def relation_paths_tool(executor: KGExecutor, source: str, target: str, max_length: int = 3,
+                        max_paths: Optional[int] = 20):
+    """Tool that lists the relation paths from ``source`` to ``target``.
+
+    Returns:
+        ``[entity, predicate, entity, ...]`` lists, shortest first
+    """
+    return executor.find_relation_paths(source, target, max_length, max_paths=max_paths, decode=True)
+
+
+def intersect_tool(executor: KGExecutor, *entity_sets: Iterable):
+    """Tool that intersects entity sets.
+
+    Args:
+        executor: KGExecutor instance
+        entity_sets: one or more entity sets or lists of node names
+
+    Returns:
+        Entity set of nodes present in every input
+    """
+    sets = sorted((_as_set(executor, s) for s in entity_sets), key=len)
+    result = sets[0]
+    for other in sets[1:]:
+        # smallest first keeps every intermediate result small
+        result = result & other
+    return result
+
+
+def union_tool(executor: KGExecutor, *entity_sets: Iterable):
+    """Tool that unions entity sets.
+
+    Returns:
+        Entity set of nodes present in any input
+    """
+    sets = [_as_set(executor, s) for s in entity_sets]
+    result = sets[0]
+    for other in sets[1:]:
+        result = result | other
+    return result
+
+
+def difference_tool(executor: KGExecutor, entities: Iterable, excluded: Iterable):
+    """Tool that removes ``excluded`` from ``entities``.
+
+    Returns:
+        Entity set of nodes in ``entities`` but not in ``excluded``
+    """
+    return _as_set(executor, entities) - _as_set(executor, excluded)
+
+
+def count_tool(executor: KGExecutor, entities: Iterable) -> int:
+    """Tool that counts the members of an entity set."""
+    return len(_as_set(executor, entities))
+
+
+def entity_by_type_tool(executor: KGExecutor, type_: str, candidates: Optional[Iterable] = None):
+    """Tool that returns the entities of a class, optionally among candidates.
+
+    Args:
+        executor: KGExecutor instance
+        type_: class node (object of the executor's type predicates)
+        candidates: optional entity set or list of node names
+
+    Returns:
+        Entity set
+    """
+    return executor.get_entities_by_type(type_, candidates)
+
+
+def relation_tool(executor: KGExecutor, entity: str, direction: str = "out"):
+    """Tool that lists the relations around an entity.
+
+    Args:
+        executor: KGExecutor instance
+        entity: entity name
+        direction: "out", "in" or "both"
+
+    Returns:
+        Dict predicate -> number of edges
+    """
+    return executor.get_relations(entity, direction)
+
+
+def link_entity_tool(executor: KGExecutor, mention: str, k: int = 5):
+    """Tool that maps a surface string to candidate entities.
+
+    Args:
+        executor: KGExecutor instance
+        mention: surface string from the question
+        k: number of candidates
+
+    Returns:
+        List of (entity, score) pairs, best first
+    """
+    return executor.link_entities([mention], k)[0]
+
+
+def filter_by_value_tool(executor: KGExecutor, predicate: str, low: Any = None, high: Any = None,
+                         candidates: Optional[Iterable] = None, inclusive: bool = True):
+    """Tool that keeps entities whose numeric/date ``predicate`` value lies in a range.
+
+    Returns:
+        Entity set
+    """
+    return executor.filter_by_value(predicate, low, high, inclusive, candidates)
+
+
+def argmax_tool(executor: KGExecutor, predicate: str, candidates: Optional[Iterable] = None):
+    """Tool that returns the candidate with the largest ``predicate`` value (or None)."""
+    return executor.argmax(predicate, candidates)
+
+
+def argmin_tool(executor: KGExecutor, predicate: str, candidates: Optional[Iterable] = None):
+    """Tool that returns the candidate with the smallest ``predicate`` value (or None)."""
+    return executor.argmin(predicate, candidates)
+
+
+def top_k_tool(executor: KGExecutor, predicate: str, k: int = 1, candidates: Optional[Iterable] = None,
+               largest: bool = True):
+    """Tool that ranks candidates by ``predicate`` value.
+
+    Returns:
+        List of (entity, value) pairs, best first
+    """
+    return executor.top_k(predicate, k, candidates, largest)
+
+
+def register_kg_tools(toolbox: KGToolbox, executor: KGExecutor) -> KGToolbox:
+    """Register the KG tools on ``toolbox``, bound to ``executor``.
+
+    Args:
+        toolbox: toolbox to populate
+        executor: executor the tools run against
+
+    Returns:
+        The same toolbox, for chaining
+    """
+    toolbox.register("neighbors", partial(neighbor_tool, executor))
+    toolbox.register("neighbors_batch", partial(neighbors_batch_tool, executor))
+    toolbox.register("neighbor_page", partial(neighbor_page_tool, executor))
+    toolbox.register("relation_paths", partial(relation_paths_tool, executor))
+    toolbox.register("intersect", partial(intersect_tool, executor))
+    toolbox.register("union", partial(union_tool, executor))
+    toolbox.register("difference", partial(difference_tool, executor))
+    toolbox.register("count", partial(count_tool, executor))
+    toolbox.register("get_entity_by_type", partial(entity_by_type_tool, executor))
+    toolbox.register("get_relation", partial(relation_tool, executor))
+    toolbox.register("link_entity", partial(link_entity_tool, executor))
+    toolbox.register("filter_by_value", partial(filter_by_value_tool, executor))
+    toolbox.register("argmax", partial(argmax_tool, executor))
+    toolbox.register("argmin", partial(argmin_tool, executor))
+    toolbox.register("top_k", partial(top_k_tool, executor))
+    return toolbox
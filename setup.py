@@ -10,6 +10,7 @@ setup(
         "torch>=2.0.0",
         "transformers>=4.30.0",
         "networkx>=3.0",
+        "numpy>=1.22",
         "rdflib>=6.0.0",
     ],
 )
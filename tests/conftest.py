@@ -0,0 +1,28 @@
+import pytest
+
+from kg_agent.core import KGExecutor
+
+BACKENDS = ["networkx", "compact", "partitioned", "sqlite", "durable", "rdflib"]
+# backends whose read views are frozen versions rather than the live store
+FROZEN_BACKENDS = ["compact", "partitioned", "durable"]
+
+
+@pytest.fixture
+def make_executor(tmp_path):
+    """Return a factory building executors of a backend; all are closed after the test."""
+    executors = []
+
+    def make(backend, triples=(), **kwargs):
+        if backend == "rdflib":
+            pytest.importorskip("rdflib")
+        if backend == "durable":
+            kwargs.setdefault("path", str(tmp_path / f"durable-{len(executors)}"))
+        executor = KGExecutor(backend=backend, **kwargs)
+        executors.append(executor)
+        if triples:
+            executor.load_triples(list(triples))
+        return executor
+
+    yield make
+    for executor in executors:
+        executor.close()
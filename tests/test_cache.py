@@ -0,0 +1,37 @@
+import sys
+
+from kg_agent.cache import QueryCache, estimate_nbytes
+
+
+def test_estimate_counts_nested_items():
+    names = tuple(f"node-{i}" for i in range(1000))
+    assert estimate_nbytes((names, True)) >= sum(sys.getsizeof(name) for name in names)
+
+
+def test_byte_budget_evicts_nested_results():
+    names = tuple(f"node-{i}" for i in range(1000))
+    cache = QueryCache(max_entries=100, max_bytes=2 * estimate_nbytes((names, False)))
+    for i in range(5):
+        cache.put(i, 0, (names, False))
+    assert len(cache) == 2
+    assert cache.stats.nbytes <= cache.max_bytes
+
+
+def test_newer_version_drops_stale_entries():
+    cache = QueryCache(max_entries=10)
+    for i in range(5):
+        cache.put(i, 1, i)
+    cache.put("new", 2, "x")
+    assert len(cache) == 1 and cache.stats.entries == 1
+    # a reader pinned to the old version neither hits nor refills the cache
+    cache.put("old", 1, "y")
+    assert cache.get("new", 1) == (False, None)
+    assert cache.get("new", 2) == (True, "x") and len(cache) == 1
+
+
+def test_writes_clear_the_cache(make_executor):
+    executor = make_executor("compact", [("a", "p", "b")], cache_size=16)
+    executor.query_neighbors("a")
+    assert executor.cache_stats().entries == 1
+    executor.load_triples([("a", "p", "c")])
+    assert executor.cache_stats().entries == 0
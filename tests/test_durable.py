@@ -0,0 +1,107 @@
+import json
+import os
+
+import pytest
+
+from kg_agent import durable
+from kg_agent.durable import CURRENT, DurableStore, WriteAheadLog
+
+
+def reopen(store):
+    store.close()
+    return DurableStore(store.directory, checkpoint_threshold=0)
+
+
+def test_reopening_replays_the_log(tmp_path):
+    store = DurableStore(str(tmp_path), checkpoint_threshold=0)
+    store.add_triples([("a", "p", "b"), ("a", "p", "c")])
+    store.remove_triples([("a", "p", "b")])
+    store.add_triples([("c", "q", "a")])
+    store = reopen(store)
+    assert sorted(store.match()) == [("a", "p", "c"), ("c", "q", "a")]
+    assert store.neighbors("c") == ["a"]
+    store.close()
+
+
+def test_torn_final_record_is_dropped(tmp_path):
+    store = DurableStore(str(tmp_path), checkpoint_threshold=0)
+    store.add_triples([("a", "p", "b")])
+    store.close()
+    segment = os.path.join(str(tmp_path), "wal-000000.log")
+    size = os.path.getsize(segment)
+    with open(segment, "ab") as f:
+        f.write(b'{"op": "add", "triples": [["a", "p"')
+    store = DurableStore(str(tmp_path), checkpoint_threshold=0)
+    assert store.match() == [("a", "p", "b")]
+    assert os.path.getsize(segment) == size
+    store.add_triples([("b", "p", "c")])
+    store = reopen(store)
+    assert sorted(store.match()) == [("a", "p", "b"), ("b", "p", "c")]
+    store.close()
+
+
+def test_checkpoint_moves_the_base_and_drops_old_files(tmp_path):
+    store = DurableStore(str(tmp_path), checkpoint_threshold=0)
+    store.add_triples([("a", "p", "b"), ("b", "p", "c")])
+    store.checkpoint()
+    store.remove_triples([("a", "p", "b")])
+    store.checkpoint()
+    with open(os.path.join(str(tmp_path), CURRENT)) as f:
+        current = json.load(f)
+    assert sorted(name for name in os.listdir(str(tmp_path)) if name.startswith("base-")) == [current["base"]]
+    assert WriteAheadLog.segments(str(tmp_path), 0) == [current["wal"]]
+    store = reopen(store)
+    assert store.match() == [("b", "p", "c")] and not store.store._runs
+    store.close()
+
+
+def test_writes_during_a_checkpoint_are_replayed_over_the_new_base(tmp_path, monkeypatch):
+    store = DurableStore(str(tmp_path), checkpoint_threshold=0)
+    store.add_triples([("a", "p", "b")])
+    before = store.freeze()
+    save = durable.save_snapshot
+
+    def save_while_writing(view, directory):
+        store.add_triples([("b", "p", "c")])
+        store.remove_triples([("a", "p", "b")])
+        save(view, directory)
+
+    monkeypatch.setattr(durable, "save_snapshot", save_while_writing)
+    store.checkpoint()
+    assert store.match() == [("b", "p", "c")]
+    assert before.match() == [("a", "p", "b")]
+    store = reopen(store)
+    assert store.match() == [("b", "p", "c")]
+    store.close()
+
+
+def test_failed_checkpoint_keeps_the_previous_state(tmp_path, monkeypatch):
+    store = DurableStore(str(tmp_path), checkpoint_threshold=0)
+    store.add_triples([("a", "p", "b")])
+    store.checkpoint()
+    store.add_triples([("b", "p", "c")])
+
+    def crash(base, wal):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(store, "_write_current", crash)
+    with pytest.raises(OSError):
+        store.checkpoint()
+    assert sorted(store.match()) == [("a", "p", "b"), ("b", "p", "c")]
+    monkeypatch.undo()
+    store = reopen(store)
+    assert sorted(store.match()) == [("a", "p", "b"), ("b", "p", "c")]
+    # the half-written base of the failed checkpoint is removed on reopening
+    assert len([name for name in os.listdir(str(tmp_path)) if name.startswith("base-")]) == 1
+    store.close()
+
+
+def test_views_share_the_delta(tmp_path):
+    store = DurableStore(str(tmp_path), checkpoint_threshold=0)
+    store.add_triples([("a", "p", "b")])
+    store.checkpoint()
+    store.add_triples([("a", "p", "c")])
+    first, second = store.freeze(), store.freeze()
+    assert first._runs and first._runs is second._runs
+    assert first.targets is store.store.targets
+    store.close()
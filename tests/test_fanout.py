@@ -0,0 +1,67 @@
+import pytest
+
+from kg_agent.protocol import FANOUT_CAPS
+from kg_agent.sqlite_store import SQLiteStore
+from conftest import BACKENDS
+
+# h has parallel edges to n0..n2; neighbor degrees 4, 4 and 5
+FANOUT_TRIPLES = (
+    [("h", "p", f"n{i}") for i in range(3)]
+    + [("h", "q", f"n{i}") for i in range(3)]
+    + [(f"n{i}", "r", f"x{j}") for i in range(3) for j in range(i + 1)]
+)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_fanout_counts_distinct_neighbors(make_executor, backend):
+    executor = make_executor(backend, FANOUT_TRIPLES)
+    if not executor.supports(FANOUT_CAPS):
+        pytest.skip("backend cannot cap fan-out")
+    full = executor.query_neighbors("h", max_fanout=3)
+    assert sorted(full) == ["n0", "n1", "n2"] and not full.truncated
+    capped = executor.query_neighbors("h", max_fanout=1)
+    assert capped == ["n2"] and capped.truncated
+    sampled = executor.query_neighbors("h", max_fanout=2, sample="random", seed=3)
+    assert len(set(sampled)) == 2 and sampled.truncated
+
+
+@pytest.mark.parametrize("backend", ["networkx", "sqlite", "rdflib"])
+def test_degrees_follow_writes(make_executor, backend):
+    executor = make_executor(backend, FANOUT_TRIPLES)
+    store = executor.store
+    assert store._degree("h", "out") == 6 and store._degree("n2", "both") == 5
+    executor.remove_triples([("h", "p", "n2"), ("n2", "r", "x0")])
+    assert store._degree("h", "both") == 5 and store._degree("n2", "in") == 1 and store._degree("n2", "out") == 2
+    assert store._degree("unknown", "both") == 0
+
+
+def test_sqlite_counts_the_degrees_of_an_older_database(tmp_path):
+    path = str(tmp_path / "kg.sqlite")
+    store = SQLiteStore(path)
+    store.add_triples(FANOUT_TRIPLES)
+    store._writer.executescript("DROP TRIGGER triples_added; DROP TRIGGER triples_removed; DROP TABLE degrees;")
+    store.close()
+    store = SQLiteStore(path)
+    try:
+        assert store._degree("h", "out") == 6 and store._degree("n2", "both") == 5
+    finally:
+        store.close()
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_seeded_samples_repeat(make_executor, backend):
+    executor = make_executor(backend, [("h", "p", f"n{i}") for i in range(30)])
+    if not executor.supports(FANOUT_CAPS):
+        pytest.skip("backend cannot cap fan-out")
+    first = executor.query_neighbors("h", max_fanout=5, sample="random", seed=11)
+    assert executor.query_neighbors("h", max_fanout=5, sample="random", seed=11) == first
+    assert len(first) == 5 and first.truncated
+
+
+def test_fanout_results_respect_cache_bytes(make_executor):
+    executor = make_executor("compact", [("h", "p", f"n{i}") for i in range(1000)], cache_size=100, cache_bytes=50_000)
+    executor.query_neighbors("h", max_fanout=2000)
+    stats = executor.cache_stats()
+    assert stats.entries == 0 and stats.nbytes == 0
+    executor.query_neighbors("h", max_fanout=10)
+    assert executor.cache_stats().entries == 1
\ No newline at end of file
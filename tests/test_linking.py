@@ -0,0 +1,41 @@
+import pytest
+
+from conftest import BACKENDS
+from kg_agent.linking import LabelIndex
+
+PEOPLE = [(f"ex:Person_{i}", "rdfs:label", f"person number {i}") for i in range(50)]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_links_follow_writes(make_executor, backend):
+    executor = make_executor(backend, PEOPLE + [("ex:Barack_Obama", "ex:born", "ex:Honolulu")])
+    assert executor.link_entities(["barack obama"], k=1) == [[("ex:Barack_Obama", 1.0)]]
+    base = executor.label_index
+    executor.load_triples([("ex:Michelle_Obama", "rdfs:label", "Michelle Robinson")])
+    assert executor.link_entities(["michelle robinson"], k=1) == [[("ex:Michelle_Obama", 1.0)]]
+    # the write relabeled one entity instead of rebuilding the index
+    assert executor.label_index._runs and executor.label_index.labels is base.labels
+    executor.remove_triples([("ex:Barack_Obama", "ex:born", "ex:Honolulu"), PEOPLE[7]])
+    assert "ex:Barack_Obama" not in [e for e, _ in executor.link_entities(["barack obama"])[0]]
+    assert executor.link_entities(["person number 7"], k=1)[0][0][1] < 1.0
+    assert sorted(executor.label_index.pairs()) == sorted(executor._new_label_index(executor.read_view()).pairs())
+
+
+def test_pinned_reader_links_against_its_view(make_executor):
+    executor = make_executor("compact", PEOPLE)
+    executor.link_entities(["person"])
+    with executor.pinned():
+        executor.load_triples([("ex:Ada", "rdfs:label", "Ada Lovelace")])
+        assert executor.link_entities(["ada lovelace"], k=1) == [[]]
+    assert executor.link_entities(["ada lovelace"], k=1) == [[("ex:Ada", 1.0)]]
+
+
+def test_updated_index_leaves_the_original_unchanged():
+    index = LabelIndex([(f"e{i}", f"label {i}") for i in range(20)] + [("x", "old name")])
+    updated = index.updated([("x", "new name"), ("y", "old name")], ["x", "y"])
+    assert index.search("old name", k=1) == [("x", 1.0)]
+    assert updated.search("old name", k=1) == [("y", 1.0)]
+    assert updated.search("new name", k=1) == [("x", 1.0)]
+    assert len(updated) == len(index) + 1
+    emptied = updated.updated([], ["x"])
+    assert "x" not in [e for e, _ in emptied.search("new name")] and len(emptied) == len(index)
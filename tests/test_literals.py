@@ -0,0 +1,34 @@
+import pytest
+
+from conftest import BACKENDS
+from kg_agent.literals import parse_date
+
+HEIGHTS = [(f"e{i}", "height", str(v)) for i, v in enumerate([3, 1.5, "7", "-2", "n/a", 10, "4e0"])]
+BIRTHS = [(f"e{i}", "born", d) for i, d in enumerate(["1990-05-01", "1985", "2001-12-31T10:00:00", "not a date", "1990-05-02"])]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_range_filters_and_ranking(make_executor, backend):
+    executor = make_executor(backend, HEIGHTS + BIRTHS)
+
+    def names(entities):
+        return sorted(executor.entity_names(entities))
+
+    assert names(executor.filter_by_value("height", 1.5, 4)) == ["e0", "e1", "e6"]
+    assert names(executor.filter_by_value("height", 1.5, 4, inclusive=False)) == ["e0"]
+    assert names(executor.filter_by_value("height", low=5)) == ["e2", "e5"]
+    assert names(executor.filter_by_value("height", high=0, candidates=["e1", "e3", "e4"])) == ["e3"]
+    assert executor.top_k("height", 3) == [("e5", 10), ("e2", 7), ("e6", 4)]
+    assert executor.argmin("height") == "e3" and executor.argmax("height", ["e0", "e1", "e6"]) == "e6"
+    # dates compare as days; bounds may be years or ISO strings
+    assert names(executor.filter_by_value("born", 1990, "1990-05-01")) == ["e0"]
+    assert executor.top_k("born", 2) == [("e2", "2001-12-31"), ("e4", "1990-05-02")]
+    assert executor.argmin("born", ["e0", "e4"]) == "e0"
+    executor.remove_triples([("e5", "height", "10")])
+    assert executor.argmax("height") == "e2"
+    assert executor.argmax("unknown") is None
+
+
+def test_parse_date_rejects_impossible_dates():
+    assert parse_date("1970-01-02") == 1.0 and parse_date("1969") == -365.0
+    assert parse_date("2001-02-29") is None and parse_date("May 2001") is None
@@ -0,0 +1,101 @@
+import gzip
+import itertools
+import threading
+import tracemalloc
+from multiprocessing.pool import ThreadPool
+
+import pytest
+
+from kg_agent.loaders import bounded_imap, chunked, iter_triples, parse_ntriples_line, stream_file
+
+LINES = [f'<http://ex/e{i}> <http://ex/p{i % 3}> "v\\u00e9 {i}" .\n' for i in range(500)]
+LINES[7] = "this is not a triple\n"
+LINES[8] = "# a comment\n"
+
+
+def _write(path, lines):
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "wt", encoding="utf-8") as f:
+        f.writelines(lines)
+    return str(path)
+
+
+def _parse(line):
+    try:
+        return parse_ntriples_line(line)
+    except ValueError:
+        return None
+
+
+@pytest.mark.parametrize("name", ["dump.nt", "dump.nt.gz"])
+def test_parallel_load_matches_sequential(make_executor, tmp_path, name):
+    path = _write(tmp_path / name, LINES)
+    sequential, parallel = make_executor("compact"), make_executor("compact")
+    expected = sequential.load_file(path, chunk_size=64)
+    stats = parallel.load_file(path, chunk_size=64, workers=2)
+    assert (stats.triples, stats.skipped) == (expected.triples, expected.skipped) == (498, 1)
+    assert sorted(parallel.store.match()) == sorted(sequential.store.match())
+    assert parallel.store.match(subject="http://ex/e9") == [("http://ex/e9", "http://ex/p0", "vé 9")]
+
+
+@pytest.mark.parametrize("name", ["dump.nt", "dump.nt.gz", "dump.tsv"])
+@pytest.mark.parametrize("backend", ["networkx", "compact"])
+def test_streamed_load_matches_loading_the_triples(make_executor, tmp_path, name, backend):
+    lines = LINES + ['<http://ex/a> <http://ex/name> "Ann \\"A\\" Lee"@en .\n', "_:b0 <http://ex/p0> <http://ex/a> .\n"]
+    triples = [t for t in map(_parse, lines) if t is not None]
+    if name.endswith(".tsv"):
+        lines = ["\t".join(t) + "\n" for t in triples] + ["too\tfew\n"]
+    path = _write(tmp_path / name, lines)
+    streamed, loaded = make_executor(backend), make_executor(backend)
+    seen = []
+    stats = streamed.load_file(path, chunk_size=50, progress=lambda s: seen.append(s.triples))
+    loaded.load_triples(triples)
+    assert stats.triples == len(triples) and stats.skipped == 1
+    assert seen == list(range(50, len(triples), 50)) + [len(triples)]
+    assert sorted(streamed.match_triples()) == sorted(loaded.match_triples())
+    assert streamed.match_triples(subject="http://ex/a") == [("http://ex/a", "http://ex/name", 'Ann "A" Lee')]
+
+
+def test_parsing_is_lazy():
+    endless = itertools.cycle(LINES[:5])
+    assert len(next(chunked(iter_triples(endless, "nt"), 3))) == 3
+
+
+def test_stream_memory_is_bounded_by_the_chunk(tmp_path):
+    lines = [f'<http://ex/entity/{i}> <http://ex/p> "a literal value number {i}" .\n' for i in range(20_000)]
+    path = _write(tmp_path / "dump.nt", lines)
+    tracemalloc.start()
+    try:
+        stream_file(path, lambda chunk: None, chunk_size=500)
+        streamed = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        everything = [parse_ntriples_line(line) for line in lines]
+        materialized = tracemalloc.get_traced_memory()[1]
+        del everything
+    finally:
+        tracemalloc.stop()
+    assert streamed < materialized / 4
+
+
+def test_parallel_strict_load_raises(make_executor, tmp_path):
+    path = _write(tmp_path / "dump.nt", LINES)
+    with pytest.raises(ValueError):
+        make_executor("compact").load_file(path, strict=True, workers=2)
+
+
+def test_bounded_imap_limits_tasks_in_flight():
+    lock = threading.Lock()
+    pulled = []
+
+    def tasks():
+        for i in range(50):
+            with lock:
+                pulled.append(i)
+            yield i
+
+    with ThreadPool(4) as pool:
+        for consumed, result in enumerate(bounded_imap(pool, lambda x: x * x, tasks(), window=3)):
+            assert result == consumed * consumed
+            # the task being consumed plus at most two more are outstanding
+            assert len(pulled) <= consumed + 3
+    assert len(pulled) == 50
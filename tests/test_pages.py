@@ -0,0 +1,63 @@
+import base64
+import json
+
+import numpy as np
+import pytest
+
+from conftest import BACKENDS
+
+# X is reached on hop 1 and again on hop 2; only the hop-3 filter leads on from it
+HOP_TRIPLES = [("S", "a", "X"), ("S", "a", "Y"), ("Y", "b", "X"), ("X", "c", "Z")]
+HOP_FILTERS = [["a"], ["b"], ["c"]]
+
+
+def _forge(state):
+    return base64.urlsafe_b64encode(json.dumps(state).encode()).decode()
+
+
+@pytest.mark.parametrize("field, value", [("id", [1]), ("id", None), ("at", "2"), ("at", -1), ("v", True), ("q", [])])
+def test_malformed_cursor_fields_are_rejected(make_executor, field, value):
+    executor = make_executor("compact", [("a", "p", f"n{i}") for i in range(4)])
+    page = executor.neighbor_page("a", limit=2)
+    state = json.loads(base64.urlsafe_b64decode(page.cursor))
+    state[field] = value
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        executor.neighbor_page("a", limit=2, cursor=_forge(state))
+
+
+def test_garbage_cursor_is_rejected(make_executor):
+    executor = make_executor("compact", [("a", "p", "b")])
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        executor.neighbor_page("a", cursor="not a cursor")
+
+
+@pytest.mark.parametrize("predicates", [None, ["p"]])
+def test_hub_is_read_in_blocks(make_executor, predicates):
+    triples = [("hub", "p", f"n{i}") for i in range(1000)] + [(f"m{i}", "p", "hub") for i in range(50)]
+    executor = make_executor("compact", triples + [("hub", "q", "x")])
+    executor.remove_triples([("hub", "p", "n3")])
+    store = executor.read_view().store
+    hub = store.entities.lookup("hub")
+    hop_predicates = [store.predicate_ids(predicates)] if predicates else None
+    blocks = list(store.iter_neighbor_ids(hub, 1, hop_predicates, "both", block=16))
+    assert max(len(ids) for ids in blocks) <= 16
+    reached = store.entities.terms(np.concatenate(blocks).tolist())
+    assert sorted(reached) == sorted(executor.query_neighbors("hub", predicates=predicates, direction="both"))
+    assert "n3" not in reached and len(reached) == len(set(reached))
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_pages_resume_the_traversal(make_executor, backend):
+    executor = make_executor(backend, HOP_TRIPLES + [("Z", "c", f"z{i}") for i in range(5)])
+    walked = list(executor.iter_neighbors("S", 3, hop_predicates=HOP_FILTERS))
+    assert sorted(walked) == ["X", "Y", "Z"]
+    assert list(executor.iter_neighbors("S", 3, hop_predicates=HOP_FILTERS, limit=2, offset=1)) == walked[1:3]
+    paged, cursor = [], None
+    while True:
+        page = executor.neighbor_page("S", 4, hop_predicates=HOP_FILTERS + [["c"]], limit=3, cursor=cursor)
+        paged += page.items
+        cursor = page.cursor
+        if cursor is None:
+            break
+    assert paged == list(executor.iter_neighbors("S", 4, hop_predicates=HOP_FILTERS + [["c"]]))
+    assert sorted(paged) == ["X", "Y", "Z"] + [f"z{i}" for i in range(5)]
@@ -0,0 +1,58 @@
+import threading
+
+from kg_agent.partition import PartitionedStore
+from kg_agent.store import CompactGraphStore
+
+TRIPLES = [(f"n{i}", "p" if i % 3 else "q", f"n{(i * 7 + j) % 60}") for i in range(60) for j in range(3)]
+
+
+def neighborhoods(store, nodes, **kwargs):
+    return {n: sorted(store.neighbors(n, 2, **kwargs)) for n in nodes if n in store.entities}
+
+
+def test_shards_follow_removals_and_merges():
+    store, reference = PartitionedStore(workers=3), CompactGraphStore()
+    try:
+        store.merge_threshold = reference.merge_threshold = 16
+        nodes = [f"n{i}" for i in range(0, 60, 7)]
+        for start in range(0, len(TRIPLES), 5):
+            batch = TRIPLES[start:start + 5]
+            store.add_triples(batch)
+            reference.add_triples(batch)
+            gone = batch[::3]
+            store.remove_triples(gone)
+            reference.remove_triples(gone)
+            assert neighborhoods(store, nodes) == neighborhoods(reference, nodes)
+        store._finish_merge()
+        for direction in ("in", "both"):
+            assert neighborhoods(store, nodes, direction=direction) == neighborhoods(reference, nodes, direction=direction)
+        # the coordinator reads the arrays the shards map rather than a private copy
+        assert not store.targets.flags.writeable and not store.osp_subjects.flags.writeable
+    finally:
+        store.close()
+
+
+def test_readers_expand_concurrently():
+    store = PartitionedStore(workers=3)
+    try:
+        store.add_triples(TRIPLES)
+        view = store.freeze()
+        expected = {f"n{i}": sorted({o for s, _, o in TRIPLES if s == f"n{i}"}) for i in range(60)}
+        errors = []
+
+        def read(offset):
+            for i in range(200):
+                node = f"n{(offset + i) % 60}"
+                if sorted(view.neighbors(node)) != expected[node]:
+                    errors.append(node)
+
+        readers = [threading.Thread(target=read, args=(k * 13,)) for k in range(4)]
+        for thread in readers:
+            thread.start()
+        store.remove_triples([TRIPLES[0]])
+        for thread in readers:
+            thread.join()
+        assert not errors
+        assert sorted(store.neighbors("n0")) == [t[2] for t in TRIPLES[1:3]]
+    finally:
+        store.close()
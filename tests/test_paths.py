@@ -0,0 +1,33 @@
+import random
+
+import pytest
+
+from conftest import BACKENDS
+
+# a small random multigraph with cycles and parallel edges
+_rng = random.Random(7)
+RANDOM_TRIPLES = sorted({(f"n{_rng.randrange(12)}", _rng.choice("pqr"), f"n{_rng.randrange(12)}") for _ in range(40)})
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_relation_paths_match_a_depth_first_search(make_executor, backend):
+    reference = make_executor("networkx", RANDOM_TRIPLES)
+    executor = make_executor(backend, RANDOM_TRIPLES)
+    for source, target in [("n1", "n5"), ("n3", "n8"), ("n10", "n9")]:
+        for predicates in (None, ["p", "q"]):
+            expected = reference.find_relation_paths(source, target, 3, predicates)
+            found = executor.find_relation_paths(source, target, 3, predicates, decode=True)
+            assert sorted(found) == sorted(expected)
+    with pytest.raises(KeyError):
+        executor.find_relation_paths("n0", "missing")
+
+
+def test_relation_paths_truncate_the_same_paths(make_executor):
+    triples = [("s", p, m) for p in ("zp", "ap") for m in ("m2", "m1")] + [(m, "bp", "t") for m in ("m2", "m1")]
+    results = [
+        make_executor(backend, triples).find_relation_paths("s", "t", 2, max_paths=3, decode=True)
+        for backend in ("networkx", "compact")
+    ]
+    assert results[0] == results[1] == [
+        ["s", "ap", "m1", "bp", "t"], ["s", "ap", "m2", "bp", "t"], ["s", "zp", "m1", "bp", "t"],
+    ]
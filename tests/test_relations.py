@@ -0,0 +1,18 @@
+import numpy as np
+
+from kg_agent.store import CompactGraphStore
+
+
+def test_relation_index_is_updated_through_merges():
+    store = CompactGraphStore()
+    store.merge_threshold = 8
+    store.add_triples([("a", "p", f"b{i}") for i in range(20)] + [("a", "q", "b0")])
+    store.relation_index()
+    store.remove_triples([("a", "p", "b1"), ("a", "q", "b0")])
+    store.add_triples([("c", "r", "a"), ("a", "s", "c")])
+    store.compact()
+    updated = store.relation_index()
+    store._build_relation_index()
+    assert all(np.array_equal(x, y) for x, y in zip(updated, store.relation_index()))
+    assert store.relations_of("a", "both") == {"p": 19, "r": 1, "s": 1}
+    assert store.relations_of("b0", "in") == {"p": 1}
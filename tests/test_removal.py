@@ -0,0 +1,27 @@
+import pytest
+
+from kg_agent.core import KGExecutor
+
+
+@pytest.mark.parametrize("publish", ["save_snapshot", "share"])
+def test_publishing_leaves_the_view_tombstoned(make_executor, tmp_path, publish):
+    executor = make_executor("compact", [("a", "p", "b"), ("a", "p", "c"), ("b", "q", "c")])
+    executor.remove_triples([("a", "p", "c")])
+    view = executor.read_view().store
+    targets, dead = view.targets, view.dead_edges("spo")
+    if publish == "save_snapshot":
+        executor.save_snapshot(str(tmp_path / "snap"))
+        copy = KGExecutor.open_snapshot(str(tmp_path / "snap"))
+    else:
+        shared = executor.share()
+        copy = KGExecutor.attach_shared(shared.spec)
+    try:
+        assert copy.get_relations("a") == {"p": 1}
+        assert copy.query_neighbors("a") == ["b"]
+    finally:
+        copy.close()
+        if publish == "share":
+            shared.close()
+            shared.unlink()
+    assert view.targets is targets and view.dead_edges("spo") is dead
+    assert view.relations_of("a") == {"p": 1}
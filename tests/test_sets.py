@@ -0,0 +1,40 @@
+import random
+
+import numpy as np
+import pytest
+
+from conftest import BACKENDS
+from kg_agent.sets import EntitySet
+from kg_agent.tools import count_tool, difference_tool, intersect_tool, union_tool
+
+
+def random_set(rng, universe, density):
+    return {i for i in range(universe) if rng.random() < density}
+
+
+@pytest.mark.parametrize("densities", [(0.005, 0.01), (0.5, 0.01), (0.01, 0.6), (0.4, 0.7)])
+def test_set_algebra_matches_python_sets(densities):
+    rng = random.Random(5)
+    # the second set comes from a store that interned more entities since
+    universes = (3000, 3500)
+    members = [random_set(rng, universe, density) for universe, density in zip(universes, densities)]
+    a, b = (EntitySet.from_ids(sorted(m), universe) for m, universe in zip(members, universes))
+    assert [s.is_dense for s in (a, b)] == [d * 32 > 1 for d in densities]
+    for result, expected in [(a & b, members[0] & members[1]), (b & a, members[0] & members[1]),
+                             (a | b, members[0] | members[1]), (a - b, members[0] - members[1]),
+                             (b - a, members[1] - members[0])]:
+        assert list(result) == sorted(expected) and len(result) == len(expected)
+        assert result.universe == max(universes)
+    probe = np.array(sorted(rng.sample(range(4000), 200)), dtype=np.int32)
+    assert a.contains_ids(probe).tolist() == [int(i) in members[0] for i in probe]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_set_tools(make_executor, backend):
+    executor = make_executor(backend, [(f"e{i}", "p", f"e{(i + 1) % 10}") for i in range(10)])
+    evens, low = [f"e{i}" for i in range(0, 10, 2)], [f"e{i}" for i in range(5)] + ["unknown"]
+    assert sorted(executor.entity_names(intersect_tool(executor, evens, low))) == ["e0", "e2", "e4"]
+    assert sorted(executor.entity_names(union_tool(executor, evens, low))) == sorted(set(evens) | set(low[:-1]))
+    excluded = executor.entity_set(evens)
+    assert sorted(executor.entity_names(difference_tool(executor, low, excluded))) == ["e1", "e3"]
+    assert count_tool(executor, low) == 5
@@ -0,0 +1,58 @@
+import multiprocessing
+
+import pytest
+
+from conftest import BACKENDS
+from kg_agent.core import KGExecutor
+
+TRIPLES = [("a", "p", "b"), ("a", "q", "c"), ("b", "p", "c"), ("c", "p", "a"), ("a", "rdf:type", "T"), ("gone", "p", "a")]
+
+
+def answers(executor):
+    return (
+        sorted(executor.query_neighbors("a", 2, direction="both")),
+        executor.get_relations("a"),
+        sorted(executor.entity_names(executor.get_entities_by_type("T"))),
+    )
+
+
+def _worker(spec, results):
+    executor = KGExecutor.attach_shared(spec)
+    before = answers(executor)
+    executor.load_triples([("c", "p", "d")])
+    results.put((before, executor.query_neighbors("c")))
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_attached_graph_matches_the_publisher(make_executor, backend):
+    executor = make_executor(backend, TRIPLES)
+    executor.remove_triples([("gone", "p", "a")])
+    with executor.share() as shared:
+        attached = KGExecutor.attach_shared(shared.spec)
+        try:
+            assert answers(attached) == answers(executor)
+            store = attached.store
+            assert not store.targets.flags.writeable and not store.osp_subjects.flags.writeable
+        finally:
+            attached.close()
+
+
+def test_workers_read_one_segment_and_write_privately(make_executor):
+    executor = make_executor("compact", TRIPLES)
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    with executor.share() as shared:
+        workers = [context.Process(target=_worker, args=(shared.spec, results)) for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        outcomes = [results.get(timeout=60) for _ in workers]
+        for worker in workers:
+            worker.join(timeout=60)
+        assert all(worker.exitcode == 0 for worker in workers)
+        # each worker saw the published graph plus its own write
+        assert outcomes == [(answers(executor), ["a", "d"])] * 2
+        # the publisher's graph is unchanged
+        assert executor.query_neighbors("c") == ["a"]
+        attached = KGExecutor.attach_shared(shared.spec)
+        assert attached.query_neighbors("c") == ["a"]
+        attached.close()
@@ -0,0 +1,68 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from conftest import BACKENDS
+from kg_agent.snapshot import MANIFEST, open_snapshot
+
+TRIPLES = [
+    ("a", "p", "b"), ("a", "p", "c"), ("a", "q", "c"), ("b", "p", "c"), ("c", "r", "a"),
+    ("a", "rdf:type", "T"), ("b", "rdf:type", "T"), ("a", "height", "3"), ("b", "height", "5"),
+]
+
+
+def answers(executor):
+    return (
+        sorted(executor.match_triples()),
+        sorted(executor.query_neighbors("a", 2, direction="both")),
+        executor.get_relations("a"),
+        executor.get_relations("c", "in"),
+        sorted(executor.entity_names(executor.get_entities_by_type("T"))),
+    )
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_snapshot_round_trip(make_executor, backend, tmp_path):
+    executor = make_executor(backend, TRIPLES + [("gone", "p", "a")])
+    executor.remove_triples([("gone", "p", "a")])
+    executor.save_snapshot(str(tmp_path / "snap"))
+    opened = type(executor).open_snapshot(str(tmp_path / "snap"))
+    try:
+        assert answers(opened) == answers(executor)
+        # reads go straight to the mapped files
+        assert isinstance(opened.store.targets, np.memmap)
+        # the mapped base takes new triples and leaves the files alone
+        opened.load_triples([("c", "p", "d")])
+        assert opened.query_neighbors("c") == ["a", "d"]
+        assert open_snapshot(str(tmp_path / "snap")).num_edges == len(TRIPLES)
+    finally:
+        opened.close()
+
+
+def test_open_snapshot_leaves_derived_indexes_lazy(make_executor, tmp_path):
+    executor = make_executor("compact", [("a", "p", "b"), ("a", "rdf:type", "T")])
+    executor.save_snapshot(str(tmp_path / "snap"))
+    opened = type(executor).open_snapshot(str(tmp_path / "snap"))
+    try:
+        view = opened.read_view().store
+        assert view._type_index is None and view._relation_index is None
+        assert opened.get_relations("a") == {"p": 1, "rdf:type": 1}
+    finally:
+        opened.close()
+
+
+def test_incomplete_or_foreign_snapshots_are_rejected(make_executor, tmp_path):
+    directory = str(tmp_path / "snap")
+    make_executor("compact", TRIPLES).save_snapshot(directory)
+    path = os.path.join(directory, MANIFEST)
+    with open(path) as f:
+        manifest = json.load(f)
+    with open(path, "w") as f:
+        json.dump(dict(manifest, version=manifest["version"] + 1), f)
+    with pytest.raises(ValueError):
+        open_snapshot(directory)
+    os.remove(path)
+    with pytest.raises(FileNotFoundError):
+        open_snapshot(directory)
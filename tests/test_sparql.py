@@ -0,0 +1,53 @@
+import threading
+
+import pytest
+
+rdflib = pytest.importorskip("rdflib")
+
+from kg_agent.rdf_store import from_term, prepare, to_term  # noqa: E402
+
+TRIPLES = [("http://ex/a", "http://ex/knows", "http://ex/b"), ("http://ex/a", "rdfs:label", "Ann"),
+           ("_:x", "http://ex/knows", "http://ex/a")]
+
+
+def test_bound_queries_compile_once(make_executor):
+    executor = make_executor("rdflib", TRIPLES)
+    query = "SELECT ?o WHERE { ?s <http://ex/knows> ?o }"
+    assert list(executor.sparql(query, {"s": "http://ex/a"})) == [("http://ex/b",)]
+    hits = prepare.cache_info().hits
+    assert list(executor.sparql(query, {"s": "_:x"})) == [("http://ex/a",)]
+    assert prepare.cache_info().hits == hits + 1
+    # prefixed names are stored verbatim, so bind them rather than writing them into the text
+    assert executor.sparql("ASK { ?s ?p ?l }", {"p": "rdfs:label", "l": "Ann"}) is True
+    assert executor.sparql("ASK { ?s ?p ?l }", {"p": "rdfs:label", "l": "Bob"}) is False
+
+
+def test_sparql_needs_the_rdflib_backend(make_executor):
+    with pytest.raises(NotImplementedError):
+        make_executor("compact", TRIPLES).sparql("ASK { ?s ?p ?o }")
+
+
+def test_terms_round_trip():
+    for value in ["http://ex/a", "rdfs:label", "_:x", "Ann", "two words"]:
+        assert from_term(to_term(value)) == value
+    assert isinstance(to_term("two words"), rdflib.Literal) and isinstance(to_term("_:x"), rdflib.BNode)
+
+
+def test_queries_compile_concurrently(make_executor):
+    executor = make_executor("rdflib", TRIPLES)
+    errors = []
+
+    def run(i):
+        try:
+            # distinct texts, so every thread parses a query of its own
+            rows = list(executor.sparql(f"SELECT ?o WHERE {{ ?s <http://ex/knows> ?o . FILTER({i} >= 0) }}"))
+            assert sorted(rows) == [("http://ex/a",), ("http://ex/b",)]
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
@@ -0,0 +1,53 @@
+import os
+import random
+
+import pytest
+
+from kg_agent.sqlite_store import SQLiteStore
+
+_rng = random.Random(3)
+RANDOM_TRIPLES = sorted({(f"n{_rng.randrange(30)}", _rng.choice("pq"), f"n{_rng.randrange(30)}") for _ in range(90)})
+
+
+def test_graph_survives_reopening(make_executor, tmp_path):
+    path = str(tmp_path / "kg.sqlite")
+    executor = make_executor("sqlite", [("a", "p", "b"), ("a", "rdf:type", "T"), ("b", "p", "c")], path=path)
+    executor.remove_triples([("b", "p", "c")])
+    executor.close()
+    reopened = make_executor("sqlite", path=path)
+    assert sorted(reopened.match_triples()) == [("a", "p", "b"), ("a", "rdf:type", "T")]
+    assert sorted(reopened.get_entities_by_type("T")) == ["a"]
+    assert reopened.get_relations("b", "in") == {"p": 1}
+
+
+def test_loads_are_chunked_sets_of_triples(tmp_path):
+    store = SQLiteStore(str(tmp_path / "kg.sqlite"), chunk_size=7)
+    try:
+        store.add_triples(RANDOM_TRIPLES + RANDOM_TRIPLES[:10])
+        assert sorted(store.match()) == RANDOM_TRIPLES
+        store.remove_triples([RANDOM_TRIPLES[0], ("never", "p", "added")])
+        assert len(store.match()) == len(RANDOM_TRIPLES) - 1
+        store.compact()
+        assert sorted(store.match()) == RANDOM_TRIPLES[1:]
+    finally:
+        store.close()
+
+
+@pytest.mark.parametrize("direction", ["out", "in", "both"])
+def test_recursive_traversals_match_networkx(make_executor, direction):
+    reference, executor = make_executor("networkx", RANDOM_TRIPLES), make_executor("sqlite", RANDOM_TRIPLES)
+    for node in ("n0", "n7", "n19"):
+        for depth, predicates in [(1, None), (3, None), (2, ["p"])]:
+            expected = sorted(reference.query_neighbors(node, depth, predicates, direction=direction))
+            assert sorted(executor.query_neighbors(node, depth, predicates, direction=direction)) == expected
+    nodes = ["n0", "n7"]
+    assert executor.query_neighbors_batch(nodes, 2, direction=direction) == \
+        reference.query_neighbors_batch(nodes, 2, direction=direction)
+
+
+def test_temporary_database_is_removed_on_close():
+    store = SQLiteStore()
+    store.add_triples([("a", "p", "b")])
+    path = store.path
+    store.close()
+    assert not os.path.exists(path)
@@ -0,0 +1,42 @@
+import pytest
+
+from kg_agent.protocol import FANOUT_CAPS
+from conftest import BACKENDS
+
+# S-a->X-c->Z is only walkable if X is expanded again on hop 3 after Y-b->X
+HOP_TRIPLES = [("S", "a", "X"), ("S", "a", "Y"), ("Y", "b", "X"), ("X", "c", "Z")]
+HOP_FILTERS = [["a"], ["b"], ["c"]]
+
+# a-p->b-q->e, d-p->c-q->a
+DIRECTION_TRIPLES = [("a", "p", "b"), ("c", "q", "a"), ("d", "p", "c"), ("b", "q", "e")]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_per_hop_filters(make_executor, backend):
+    executor = make_executor(backend, HOP_TRIPLES)
+    expected = ["X", "Y", "Z"]
+    assert sorted(executor.query_neighbors("S", 3, hop_predicates=HOP_FILTERS)) == expected
+    batch = executor.query_neighbors_batch(["S"], 3, hop_predicates=HOP_FILTERS)
+    assert batch == {"X": {"S": 1}, "Y": {"S": 1}, "Z": {"S": 3}}
+    if executor.supports(FANOUT_CAPS):
+        assert sorted(executor.query_neighbors("S", 3, hop_predicates=HOP_FILTERS, max_fanout=10)) == expected
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_uniform_filters_keep_shortest_distances(make_executor, backend):
+    executor = make_executor(backend, HOP_TRIPLES)
+    batch = executor.query_neighbors_batch(["S"], 3, predicates=["a", "b", "c"])
+    assert batch == {"X": {"S": 1}, "Y": {"S": 1}, "Z": {"S": 2}}
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_direction_aware_traversal(make_executor, backend):
+    executor = make_executor(backend, DIRECTION_TRIPLES)
+    assert executor.query_neighbors("a", direction="in") == ["c"]
+    assert sorted(executor.query_neighbors("a", 2, direction="in")) == ["c", "d"]
+    assert sorted(executor.query_neighbors("a", direction="both")) == ["b", "c"]
+    # the start node is reached again over c on the second hop
+    assert sorted(executor.query_neighbors("a", 2, predicates=["q"], direction="both")) == ["a", "c"]
+    assert executor.query_neighbors_batch(["a"], 2, direction="in") == {"c": {"a": 1}, "d": {"a": 2}}
+    with pytest.raises(ValueError):
+        executor.query_neighbors("a", direction="sideways")
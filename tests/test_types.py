@@ -0,0 +1,19 @@
+import pytest
+
+from conftest import BACKENDS
+
+TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_type_index_follows_adds_and_removals(make_executor, backend):
+    executor = make_executor(backend, [("a", "rdf:type", "T"), ("b", "rdf:type", "T"), ("a", TYPE, "T"), ("c", "p", "T")])
+    assert sorted(executor.entity_names(executor.get_entities_by_type("T"))) == ["a", "b"]
+    assert sorted(executor.entity_names(executor.get_entities_by_type("T", candidates=["a", "c"]))) == ["a"]
+    # "a" is still typed through the other type predicate
+    executor.remove_triples([("a", "rdf:type", "T"), ("b", "rdf:type", "T")])
+    assert sorted(executor.entity_names(executor.get_entities_by_type("T"))) == ["a"]
+    executor.load_triples([("d", "rdf:type", "T")])
+    assert sorted(executor.entity_names(executor.get_entities_by_type("T"))) == ["a", "d"]
+    assert executor.get_types("d") == ["T"]
+    assert len(executor.get_entities_by_type("missing")) == 0
@@ -0,0 +1,151 @@
+import threading
+
+import pytest
+
+from conftest import BACKENDS, FROZEN_BACKENDS
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_writes_are_visible_to_the_next_read(make_executor, backend):
+    executor = make_executor(backend, [("a", "p", "b")], cache_size=16)
+    assert executor.query_neighbors("a") == ["b"]
+    executor.load_triples([("a", "p", "c")])
+    assert executor.read_view().version == executor.version
+    assert sorted(executor.query_neighbors("a")) == ["b", "c"]
+    executor.remove_triples([("a", "p", "b")])
+    assert executor.query_neighbors("a") == ["c"]
+    executor.compact()
+    assert executor.read_view().version == executor.version
+    assert executor.query_neighbors("a") == ["c"]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_pinned_reads_agree_while_loading(make_executor, backend):
+    executor = make_executor(backend, [("a", "p", "b")], cache_size=64)
+    stop = threading.Event()
+    errors = []
+
+    def read():
+        while not stop.is_set():
+            try:
+                with executor.pinned() as view:
+                    listed = len(executor.query_neighbors("a"))
+                    counted = executor.get_relations("a").get("p", 0)
+                    assert listed == counted, (listed, counted)
+                    assert executor.read_view() is view
+            except Exception as e:
+                errors.append(e)
+                return
+
+    readers = [threading.Thread(target=read) for _ in range(3)]
+    for thread in readers:
+        thread.start()
+    for i in range(100):
+        executor.load_triples([("a", "p", f"x{i}")])
+    stop.set()
+    for thread in readers:
+        thread.join()
+    assert not errors
+    assert len(executor.query_neighbors("a")) == 101
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_pinned_view_keeps_its_version(make_executor, backend):
+    executor = make_executor(backend, [("a", "p", "b")])
+    with executor.pinned():
+        executor.load_triples([("a", "p", "c")])
+        assert executor.query_neighbors("a") == ["b"]
+    assert sorted(executor.query_neighbors("a")) == ["b", "c"]
+
+
+@pytest.mark.parametrize("backend", ["networkx", "sqlite", "rdflib"])
+def test_pinned_live_store_ignores_later_writes(make_executor, backend):
+    executor = make_executor(backend, [("a", "p", "b"), ("a", "p", "c"), ("a", "rdf:type", "T"), ("c", "q", "a")])
+    with executor.pinned() as view:
+        executor.remove_triples([("a", "p", "c"), ("a", "rdf:type", "T")])
+        executor.load_triples([("a", "p", "d"), ("d", "rdf:type", "T"), ("d", "q", "a")])
+        assert executor.read_view() is view
+        assert sorted(executor.query_neighbors("a", 2)) == ["T", "a", "b", "c"]
+        assert sorted(executor.query_neighbors("a", direction="in")) == ["c"]
+        assert executor.get_relations("a") == {"p": 2, "rdf:type": 1}
+        assert set(executor.get_entities_by_type("T")) == {"a"}
+        assert executor.get_types("a") == ["T"]
+        assert sorted(executor.match_triples(subject="a", predicate="p")) == [("a", "p", "b"), ("a", "p", "c")]
+        assert sorted(view.store.subjects()) == ["a", "c"]
+    assert sorted(executor.query_neighbors("a")) == ["b", "d"]
+    assert set(executor.get_entities_by_type("T")) == {"d"}
+
+
+def test_pinned_digraph_keeps_replaced_edges(make_executor):
+    import networkx as nx
+
+    executor = make_executor("networkx", graph=nx.DiGraph())
+    executor.load_triples([("a", "p", "b")])
+    with executor.pinned():
+        # a plain DiGraph keeps one edge per pair, so this replaces (a, p, b)
+        executor.load_triples([("a", "q", "b")])
+        assert executor.match_triples(subject="a") == [("a", "p", "b")]
+        assert executor.get_relations("b", "in") == {"p": 1}
+    assert executor.match_triples(subject="a") == [("a", "q", "b")]
+
+
+@pytest.mark.parametrize("backend", FROZEN_BACKENDS)
+def test_removal_leaves_earlier_views_unchanged(make_executor, backend):
+    executor = make_executor(backend, [("a", "p", "b"), ("a", "p", "c"), ("a", "q", "c")])
+    before = executor.read_view().store
+    executor.remove_triples([("a", "p", "c")])
+    assert executor.get_relations("a") == {"p": 1, "q": 1}
+    assert before.relations_of("a") == {"p": 2, "q": 1}
+    assert sorted(before.neighbors("a")) == ["b", "c"]
+
+
+@pytest.mark.parametrize("backend", ["compact", "partitioned"])
+def test_entity_interned_after_the_view(make_executor, backend):
+    executor = make_executor(backend, [("a", "p", "b")])
+    with executor.pinned():
+        # the dictionaries are shared, so "new" is known but absent from the view
+        executor.load_triples([("new", "p", "a")])
+        assert executor.query_neighbors("new", max_fanout=1) == []
+        assert executor.query_neighbors("new", 2, direction="both") == []
+        assert list(executor.iter_neighbors("new", 2)) == []
+        assert executor.neighbor_page("new").items == []
+        assert executor.query_neighbors("a", max_fanout=1) == ["b"]
+    assert executor.query_neighbors("new", max_fanout=1) == ["a"]
+
+
+@pytest.mark.parametrize("backend", ["compact", "partitioned"])
+def test_small_writes_are_layered_over_the_indexes(make_executor, backend):
+    executor = make_executor(backend, [("a", "p", f"b{i}") for i in range(10)])
+    arrays = executor.store.targets
+    executor.load_triples([("a", "q", "c"), ("c", "p", "a")])
+    assert executor.store.targets is arrays and executor.store._runs
+    assert sorted(executor.query_neighbors("a", 2)) == ["a"] + [f"b{i}" for i in range(10)] + ["c"]
+    assert executor.get_relations("a") == {"p": 10, "q": 1}
+    executor.remove_triples([("a", "q", "c")])
+    assert executor.query_neighbors("c", direction="in") == []
+    executor.compact()
+    assert not executor.store._runs and executor.store.num_edges == 11
+
+
+@pytest.mark.parametrize("backend", ["compact", "partitioned"])
+def test_background_merges_keep_views_and_removals(make_executor, backend):
+    executor = make_executor(backend)
+    executor.store.merge_threshold = 40
+    expected, views = set(), []
+    for i in range(40):
+        batch = [(f"n{i}", "p", f"n{i + j}") for j in range(1, 4)]
+        executor.load_triples(batch)
+        expected |= set(batch)
+        if i % 3 == 0:
+            gone = (f"n{i // 2}", "p", f"n{i // 2 + 1}")
+            executor.remove_triples([gone])
+            expected.discard(gone)
+        views.append((executor.read_view().store, set(expected)))
+    store = executor.store
+    store._finish_merge()
+    assert len(store.targets) and set(store.match()) == expected
+    for view, triples in views:
+        assert set(view.match()) == triples
+    one = {o for s, _, o in expected if s == "n0"}
+    two = {o for s, _, o in expected if s in one}
+    assert sorted(executor.query_neighbors("n0", 2)) == sorted(one | two)